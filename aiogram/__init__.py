@@ -9,7 +9,8 @@ Telegram integration; it is solely for static analysis and unit tests.
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Callable, Dict, Iterable
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable
 
 
 class Bot:
@@ -18,12 +19,42 @@ class Bot:
         self.token = token
 
 
-class _MessageRegistry:
-    """Helper class to simulate message handler registration."""
+class _Registry:
+    """Handlers of one update type wrapped in that type's middlewares."""
 
     def __init__(self) -> None:
         self._middlewares: list[Any] = []
+
+    def middleware(self, middleware: Any) -> None:
+        """Register a middleware object wrapped around every handler."""
+        self._middlewares.append(middleware)
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop compiled chains after a registration."""
+
+    def _compile(self, handler: Callable[..., Any]) -> Callable[[Any, Dict[str, Any]], Awaitable[Any]]:
+        async def call(event: Any, data: Dict[str, Any]) -> Any:
+            return await handler(event)
+
+        call.__name__ = getattr(handler, "__name__", "handler")
+        for mw in reversed(self._middlewares):
+            call = partial(mw, call)
+        return call
+
+
+class _MessageRegistry(_Registry):
+    """Helper class to simulate message handler registration.
+
+    Each command's handler is wrapped in the registered middlewares once and
+    the resulting chain is cached by command (with and without the leading
+    ``/``); registering a handler or middleware drops the cache.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
         self._handlers: Dict[str, Callable[..., Any]] = {}
+        self._chains: Dict[str, Callable[[Any, Dict[str, Any]], Awaitable[Any]]] | None = None
 
     def register(
         self, handler: Callable[..., Any], *args: Any, commands: Iterable[str] | None = None, **kwargs: Any
@@ -33,10 +64,25 @@ class _MessageRegistry:
             return
         for cmd in commands:
             self._handlers[cmd] = handler
-
-    def middleware(self, middleware: Any) -> None:
-        """Register a middleware object (stored only for inspection)."""
-        self._middlewares.append(middleware)
+        self._chains = None
+
+    def _reset(self) -> None:
+        self._chains = None
+
+    def resolve(self, text: str | None) -> Callable[[Any, Dict[str, Any]], Awaitable[Any]] | None:
+        """Return the compiled chain for the command in ``text`` (``/cmd`` or ``/cmd@bot``)."""
+        chains = self._chains
+        if chains is None:
+            chains = self._chains = {}
+            for cmd, handler in self._handlers.items():
+                chains[cmd] = chains["/" + cmd] = self._compile(handler)
+        if not text:
+            return chains.get("")
+        command = text.split(maxsplit=1)[0]
+        chain = chains.get(command)
+        if chain is None and "@" in command:
+            chain = chains.get(command.partition("@")[0])
+        return chain
 
 
 class Dispatcher:
@@ -46,19 +92,47 @@ class Dispatcher:
         self.message = _MessageRegistry()
         self.callback_query = _CallbackRegistry()
 
+    async def feed_update(self, update: Any) -> Dict[str, Any]:
+        """Run the handler for a message or callback query and return context data."""
+        data: Dict[str, Any] = {}
+        if isinstance(update, types.CallbackQuery):
+            call = self.callback_query.resolve()
+            if call is None:
+                raise ValueError("No callback query handler")
+            await call(update, data)
+            return data
+        call = self.message.resolve(update.text)
+        if call is None:
+            command = update.text.split()[0].lstrip("/") if update.text else ""
+            raise ValueError(f"No handler for command {command}")
+        await call(update, data)
+        return data
+
     async def start_polling(self, bot: Bot) -> None:
         # Polling is no‑op in stub
         await asyncio.sleep(0)
 
 
-class _CallbackRegistry:
-    """Simplified registry for callback query handlers."""
+class _CallbackRegistry(_Registry):
+    """Simplified registry for callback query handlers; the first one registered answers."""
 
     def __init__(self) -> None:
+        super().__init__()
         self._handlers: list[Callable[..., Any]] = []
+        self._chain: Callable[[Any, Dict[str, Any]], Awaitable[Any]] | None = None
 
     def register(self, handler: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
         self._handlers.append(handler)
+        self._chain = None
+
+    def _reset(self) -> None:
+        self._chain = None
+
+    def resolve(self) -> Callable[[Any, Dict[str, Any]], Awaitable[Any]] | None:
+        """Return the compiled chain of the callback handler, if any."""
+        if self._chain is None and self._handlers:
+            self._chain = self._compile(self._handlers[0])
+        return self._chain
 
 
 class types:  # type: ignore
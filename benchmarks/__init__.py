@@ -0,0 +1,5 @@
+"""Micro-benchmarks for hot paths.
+
+Run a benchmark from the repository root, e.g.
+``python -m benchmarks.bench_geoip``.
+"""
@@ -0,0 +1,81 @@
+"""Measure the dispatcher's own overhead per update.
+
+Feeds ``/buy@bench BTC 1`` style messages to a no-op handler wrapped in
+``--middlewares`` pass-through middlewares, once with the previous dispatch
+(middleware chain rebuilt with :func:`functools.partial` and the command
+split out of the text on every update) and once with the compiled chain of
+:class:`TestDispatcher`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import types
+from aiogram.test_utils import TestDispatcher
+
+COMMANDS = ["buy", "sell", "price", "start", "help", "leaderboard"]
+
+
+class PassThrough:
+    async def __call__(self, handler: Callable[..., Awaitable[Any]], event: Any, data: Dict[str, Any]) -> Any:
+        return await handler(event, data)
+
+
+async def _noop(message: types.Message) -> None:
+    return None
+
+
+async def legacy_feed_update(dp: TestDispatcher, message: types.Message) -> Dict[str, Any]:
+    command = message.text.split()[0].lstrip("/").partition("@")[0] if message.text else ""
+    handler = dp.message._handlers.get(command)
+    if handler is None:
+        raise ValueError(f"No handler for command {command}")
+
+    async def base(event: types.Message, data: Dict[str, Any]) -> Any:
+        return await handler(event)
+
+    call: Callable[[types.Message, Dict[str, Any]], Awaitable[Any]] = base
+    for mw in reversed(dp.message._middlewares):
+        call = partial(mw, call)
+    data: Dict[str, Any] = {}
+    await call(message, data)
+    return data
+
+
+async def _time(feed: Callable[[types.Message], Awaitable[Any]], messages: list[types.Message]) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        await feed(message)
+    return time.perf_counter() - start
+
+
+async def run(updates: int, middlewares: int) -> None:
+    dp = TestDispatcher()
+    dp.message.register(_noop, commands=COMMANDS)
+    for _ in range(middlewares):
+        dp.message.middleware(PassThrough())
+    messages = [types.Message(f"/{COMMANDS[i % len(COMMANDS)]}@bench BTC 1") for i in range(updates)]
+
+    results = {}
+    for name, feed in (("before", partial(legacy_feed_update, dp)), ("after", dp.feed_update)):
+        await _time(feed, messages[:1000])  # warm-up
+        results[name] = min([await _time(feed, messages) for _ in range(3)])
+        print(f"{name:<7}{results[name] / updates * 1e6:8.2f} us/update ({updates / results[name]:,.0f} updates/s)")
+    print(f"speed-up {results['before'] / results['after']:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=100_000)
+    parser.add_argument("--middlewares", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.updates, args.middlewares))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measure IP-to-country lookups per second.
+
+Builds a synthetic table of IPv4 ranges for :class:`LocalCountryBackend` and
+resolves random addresses with the bare backend and through the cached
+:class:`CountryResolver` (with a realistic share of repeat visitors).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import ipaddress
+import random
+import time
+
+from hyperliquid_bot.bot.geoip import CountryResolver, LocalCountryBackend
+
+
+def _ranges(count: int) -> list[tuple[str, str, str]]:
+    step = 2**32 // count
+    countries = ["US", "DE", "IR", "JP", "BR", "KP", "FR", "IN"]
+    return [
+        (str(i * step), str(i * step + step - 1), countries[i % len(countries)])
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ranges", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=20_000, help="distinct client IPs")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    backend = LocalCountryBackend(_ranges(args.ranges))
+    print(f"loaded {args.ranges} ranges in {time.perf_counter() - start:.2f} s")
+
+    rng = random.Random(0)
+    clients = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(args.distinct)]
+    ips = [rng.choice(clients) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    for ip in ips:
+        backend.lookup_sync(ip)
+    elapsed = time.perf_counter() - start
+    print(f"local backend:   {args.lookups / elapsed:,.0f} lookups/s")
+
+    resolver = CountryResolver(backend, maxsize=args.distinct)
+
+    async def resolve_all() -> float:
+        start = time.perf_counter()
+        for ip in ips:
+            await resolver.resolve(ip)
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(resolve_all())
+    hit_rate = resolver.cache.hits / max(resolver.cache.hits + resolver.cache.misses, 1)
+    print(f"cached resolver: {args.lookups / elapsed:,.0f} lookups/s (hit rate {hit_rate:.1%})")
+
+
+if __name__ == "__main__":
+    main()
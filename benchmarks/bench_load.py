@@ -0,0 +1,303 @@
+"""Load test of the bot dispatcher and the API.
+
+Replays many concurrent synthetic users through the production dispatcher
+(:class:`~hyperliquid_bot.bot.dispatch.ConcurrentDispatcher` with the
+handlers and timing middleware ``bot.main`` registers): ``/buy`` and
+``/sell`` previews followed by confirm or cancel callbacks, and ``/price``.
+Natural-language phrases call :func:`aparse_order` directly, as no bot
+handler routes free text yet. Confirmed orders go through the trade writer into the database
+(a temporary SQLite file by default, or ``--database-url`` such as a local
+Postgres). The FastAPI app is then driven through an in-process async
+client.
+
+The report lists throughput and p50/p95/p99 latency per operation, plus the
+peak memory allocated while serving one request (measured separately, one
+request at a time, with :mod:`tracemalloc`). ``--save`` writes it as JSON and
+``--baseline`` compares against an earlier report, exiting non-zero when a
+p95 regressed by more than ``--max-regression``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from aiogram import Bot, types
+
+from hyperliquid_bot.bot.config import reload_settings
+from hyperliquid_bot.bot.dispatch import ConcurrentDispatcher
+
+SYMBOLS = ["BTC", "ETH", "SOL", "XRP", "DOGE", "LINK", "ADA", "AVAX"]
+PHRASES = [
+    "Long {sym} {size} with 5x",
+    "Short {size} {sym} at market",
+    "Buy {size} {sym} @ 100",
+    "{sym} {size} please",
+    "sell {sym} {size} 3",
+]
+API_PATHS = ["/health", "/leaderboard", "/sentiment/BTC-PERP", "/metrics"]
+
+
+class SyntheticMessage(types.Message):
+    """Message that keeps the last reply and keyboard, like a Telegram client would."""
+
+    def __init__(self, text: str, from_user: types.User) -> None:
+        super().__init__(text, from_user)
+        self.markup: Any = None
+
+    async def answer(self, text: str, reply_markup: Any = None) -> None:  # type: ignore[override]
+        self.markup = reply_markup
+
+    async def edit_text(self, text: str) -> None:  # type: ignore[override]
+        self.text = text
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class Recorder:
+    """Latencies (ms) per operation."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def time(self, op: str, call: Awaitable[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await call
+        except Exception:
+            self.errors[op] += 1
+            return None
+        finally:
+            self.samples[op].append((time.perf_counter() - start) * 1000)
+
+
+def _order_command(rng: random.Random, side: str) -> str:
+    return f"/{side} {rng.choice(SYMBOLS)} {rng.choice([0.1, 1, 2.5, 10])}"
+
+
+async def _bot_user(user_id: int, dp: ConcurrentDispatcher, steps: int, rec: Recorder, rng: random.Random) -> None:
+    from hyperliquid_bot.bot.nl_parser import aparse_order
+
+    user = types.User(user_id)
+    for _ in range(steps):
+        roll = rng.random()
+        if roll < 0.5:
+            side = "buy" if roll < 0.3 else "sell"
+            msg = SyntheticMessage(_order_command(rng, side), user)
+            await rec.time(side, dp.feed_update(msg))
+            if msg.markup is not None:
+                confirm, cancel = msg.markup.inline_keyboard[0]
+                button = confirm if rng.random() < 0.8 else cancel
+                op = "confirm" if button is confirm else "cancel"
+                await rec.time(op, dp.feed_update(types.CallbackQuery(button.callback_data, msg, user)))
+        elif roll < 0.7:
+            await rec.time("price", dp.feed_update(SyntheticMessage(f"/price {rng.choice(SYMBOLS)}", user)))
+        else:
+            phrase = rng.choice(PHRASES).format(sym=rng.choice(SYMBOLS), size=rng.choice([1, 2, 5]))
+            await rec.time("nl", aparse_order(phrase))
+
+
+async def _bounded(concurrency: int, jobs: List[Callable[[], Awaitable[None]]]) -> None:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def run(job: Callable[[], Awaitable[None]]) -> None:
+        async with gate:
+            await job()
+
+    await asyncio.gather(*(run(job) for job in jobs))
+
+
+async def _setup_bot() -> ConcurrentDispatcher:
+    from hyperliquid_bot.bot.commands import setup_bot
+    from hyperliquid_bot.bot.config import get_settings
+    from hyperliquid_bot.bot.db import init_db
+    from hyperliquid_bot.bot.middleware import ExecutionTimeMiddleware
+    from hyperliquid_bot.sentiment.job import run_sentiment_job
+
+    await init_db()
+    await run_sentiment_job(["BTC-PERP"])
+    settings = get_settings()
+    dp = ConcurrentDispatcher(workers=settings.dispatch_workers, max_pending=settings.dispatch_queue_size)
+    await setup_bot(Bot("bench"), dp)
+    # Same registration as bot.main.
+    timing = ExecutionTimeMiddleware()
+    dp.message.middleware(timing)
+    dp.callback_query.middleware(timing)
+    return dp
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    from hyperliquid_bot.api.main import app
+    from hyperliquid_bot.bot.trade_writer import stop_trade_writers
+
+    dp = await _setup_bot()
+    rng = random.Random(args.seed)
+    bot = Recorder()
+    start = time.perf_counter()
+    await _bounded(
+        args.concurrency,
+        [
+            (lambda uid=uid, seed=rng.random(): _bot_user(uid, dp, args.steps, bot, random.Random(seed)))
+            for uid in range(1, args.users + 1)
+        ],
+    )
+    bot_seconds = time.perf_counter() - start
+
+    api = Recorder()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def get(path: str) -> None:
+            (await client.get(path)).raise_for_status()
+
+        start = time.perf_counter()
+        await _bounded(
+            args.concurrency,
+            [(lambda p=rng.choice(API_PATHS): api.time(f"GET {p}", get(p))) for _ in range(args.api_requests)],
+        )
+        api_seconds = time.perf_counter() - start
+        allocations = await _allocations(dp, client, args.alloc_samples)
+    await dp.drain()
+    await stop_trade_writers()
+    return _report(args, {"bot": (bot, bot_seconds), "api": (api, api_seconds)}, allocations)
+
+
+async def _allocations(dp: ConcurrentDispatcher, client: httpx.AsyncClient, samples: int) -> Dict[str, float]:
+    """Return the mean peak KiB allocated while serving one request of each kind."""
+    from hyperliquid_bot.bot.nl_parser import aparse_order
+
+    rng = random.Random(1)
+    user = types.User(10**9)
+    calls: Dict[str, Callable[[], Awaitable[Any]]] = {
+        "buy": lambda: dp.feed_update(SyntheticMessage(_order_command(rng, "buy"), user)),
+        "price": lambda: dp.feed_update(SyntheticMessage("/price BTC", user)),
+        "nl": lambda: aparse_order(f"Long ETH {rng.randint(1, 10**6)} with 5x"),
+    }
+    calls.update({f"GET {p}": (lambda p=p: client.get(p)) for p in API_PATHS})
+    out = {}
+    if samples <= 0:
+        return out
+    tracemalloc.start()
+    try:
+        for op, call in calls.items():
+            await call()  # warm caches and lazy imports
+            total = 0
+            for _ in range(samples):
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                await call()
+                total += tracemalloc.get_traced_memory()[1] - base
+            out[op] = total / samples / 1024
+    finally:
+        tracemalloc.stop()
+    return out
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _report(args: argparse.Namespace, runs: Dict[str, Any], allocations: Dict[str, float]) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "database": os.environ["DATABASE_URL"].split("://", 1)[0],
+            "users": args.users,
+            "steps": args.steps,
+            "concurrency": args.concurrency,
+            "api_requests": args.api_requests,
+        },
+        "ops": {},
+    }
+    for target, (rec, seconds) in runs.items():
+        total = sum(len(s) for s in rec.samples.values())
+        report[target] = {"requests": total, "seconds": round(seconds, 3), "throughput_rps": round(total / seconds, 1)}
+        for op, samples in sorted(rec.samples.items()):
+            report["ops"][op] = {
+                "count": len(samples),
+                "errors": rec.errors.get(op, 0),
+                "p50_ms": round(percentile(samples, 0.5), 3),
+                "p95_ms": round(percentile(samples, 0.95), 3),
+                "p99_ms": round(percentile(samples, 0.99), 3),
+                "alloc_kib": round(allocations[op], 1) if op in allocations else None,
+            }
+    return report
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    for target in ("bot", "api"):
+        r = report[target]
+        print(f"{target}: {r['requests']:,} requests in {r['seconds']:.2f} s ({r['throughput_rps']:,.0f} req/s)")
+    header = f"{'operation':<22}{'count':>8}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'KiB/req':>9}"
+    print(header + ("   p95 vs baseline" if baseline else ""))
+    for op, s in report["ops"].items():
+        alloc = f"{s['alloc_kib']:.1f}" if s["alloc_kib"] is not None else "-"
+        line = f"{op:<22}{s['count']:>8}{s['errors']:>5}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{alloc:>9}"
+        old = (baseline or {}).get("ops", {}).get(op)
+        if old and old["p95_ms"] > 0:
+            line += f"   {s['p95_ms'] / old['p95_ms'] - 1:+.1%}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--steps", type=int, default=5, help="actions per user")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--api-requests", type=int, default=5_000)
+    parser.add_argument("--alloc-samples", type=int, default=50, help="sequential requests per operation for allocation stats")
+    parser.add_argument("--database-url", default="", help="defaults to a temporary SQLite file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the report as JSON")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative p95 increase")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        os.environ.setdefault("TRACE_EXPORT_PATH", "")
+        reload_settings()
+        report = asyncio.run(run_load(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    print_report(report, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"saved report to {args.save}")
+    if baseline is not None:
+        worse = [
+            op for op, s in report["ops"].items()
+            if op in baseline.get("ops", {}) and s["p95_ms"] > baseline["ops"][op]["p95_ms"] * (1 + args.max_regression)
+        ]
+        if worse:
+            print(f"p95 regressed by more than {args.max_regression:.0%}: {', '.join(worse)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Measure how often natural-language parses escalate to the model.
+
+Runs :func:`parse_order` over a phrase corpus twice: once sending every phrase
+to a simulated model (the behaviour before speculative heuristic parsing) and
+once escalating only low-confidence phrases. The corpus mixes the clean
+synthetic phrases of :mod:`benchmarks.bench_nl_parser` with noisy variants
+(missing side, filler words, second symbol, bare price). Reports the
+escalation rate and its reasons, model tokens spent and preview latency
+percentiles.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import Counter
+from typing import Callable
+
+from benchmarks.bench_nl_parser import synthetic_phrases
+from hyperliquid_bot.bot import nl_parser
+from hyperliquid_bot.bot.budget import BudgetGuard
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.bot.nl_parser import ParseCache, _score_heuristic, parse_order
+
+_NOISE: list[Callable[[list[str], random.Random], list[str]]] = [
+    lambda parts, rng: parts[1:],
+    lambda parts, rng: ["please"] + parts + ["thanks"],
+    lambda parts, rng: parts + [rng.choice(["ETH", "SOL"]), "maybe"],
+    lambda parts, rng: parts + [str(rng.randint(1, 9))],
+]
+
+
+def corpus(count: int, noisy_share: float, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    phrases = synthetic_phrases(count, seed)
+    for i, phrase in enumerate(phrases):
+        if rng.random() < noisy_share:
+            phrases[i] = " ".join(rng.choice(_NOISE)(phrase.split(), rng))
+    return phrases
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _run(phrases: list[str], threshold: float, model_latency: float) -> tuple[list[float], float]:
+    """Return per-phrase latencies (ms) and model tokens spent."""
+    settings = Settings(nl_escalation_threshold=threshold)
+    guard = BudgetGuard(float("inf"))
+    heuristic_model = nl_parser._model_parse
+
+    def slow_model(text, symbols):
+        time.sleep(model_latency)
+        return heuristic_model(text, symbols)
+
+    nl_parser._model_parse = slow_model
+    latencies = []
+    try:
+        for phrase in phrases:
+            nl_parser._parse_cache = ParseCache(maxsize=1)  # measure parsing, not the cache
+            start = time.perf_counter()
+            try:
+                parse_order(phrase, budget=guard, settings=settings)
+            except ValueError:
+                pass
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        nl_parser._model_parse = heuristic_model
+        nl_parser._parse_cache = None
+    return latencies, guard.spent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--phrases", type=int, default=2_000)
+    parser.add_argument("--noisy-share", type=float, default=0.2)
+    parser.add_argument("--threshold", type=float, default=Settings().nl_escalation_threshold)
+    parser.add_argument("--model-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    phrases = corpus(args.phrases, args.noisy_share)
+    reasons: Counter[str] = Counter()
+    escalated = 0
+    for phrase in phrases:
+        why = _score_heuristic(phrase).escalation(args.threshold)
+        escalated += bool(why)
+        reasons.update(why)
+    print(f"escalation rate: {escalated / len(phrases):.1%} of {len(phrases):,} phrases (threshold {args.threshold})")
+    for reason, count in reasons.most_common():
+        print(f"  {reason:<18} {count:,}")
+
+    latency = args.model_latency_ms / 1000
+    for label, threshold in (("always model", 2.0), ("speculative", args.threshold)):
+        samples, tokens = _run(phrases, threshold, latency)
+        print(
+            f"{label:<13} p50 {_percentile(samples, 0.5):7.3f} ms  p95 {_percentile(samples, 0.95):7.3f} ms"
+            f"  tokens {tokens:,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
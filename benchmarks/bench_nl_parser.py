@@ -0,0 +1,100 @@
+"""Measure heuristic natural-language parses per second.
+
+Generates a large synthetic phrase set in the style of the test corpus and
+times :func:`_heuristic_parse` against the previous multi-pass
+implementation, checking that both return the same results.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, Optional
+
+from hyperliquid_bot.bot.nl_parser import _heuristic_parse
+
+
+def _multi_pass_parse(text: str) -> tuple[str, str, float, Optional[float], Optional[int]]:
+    """Previous implementation: four passes with uncompiled patterns."""
+    original = text
+    text = text.replace("@", " @ ")
+    tokens = text.lower().split()
+    side = "buy"
+    if "sell" in tokens or "short" in tokens:
+        side = "sell"
+    if "long" in tokens or "buy" in tokens:
+        side = "buy" if "sell" not in tokens and "short" not in tokens else "sell"
+    symbol = None
+    size: Optional[float] = None
+    price: Optional[float] = None
+    leverage: Optional[int] = None
+    exclude = {"with", "at", "market", "leverage", "long", "short", "buy", "sell"}
+    for tok in tokens:
+        if re.fullmatch(r"[a-z]+(?:-perp)?", tok) and tok not in exclude:
+            symbol = tok.upper()
+            break
+    for tok in tokens:
+        if re.fullmatch(r"\d+(?:\.\d+)?", tok):
+            if size is None:
+                size = float(tok)
+            elif price is None:
+                price = float(tok)
+    for i, tok in enumerate(tokens):
+        if tok in {"@", "at"} and i + 1 < len(tokens):
+            nxt = tokens[i + 1]
+            if nxt != "market" and re.fullmatch(r"\d+(?:\.\d+)?", nxt):
+                price = float(nxt)
+    for tok in tokens:
+        m = re.fullmatch(r"(\d+)x", tok)
+        if m:
+            leverage = int(m.group(1))
+    if symbol is None or size is None:
+        raise ValueError(f"Could not parse order from '{original}'")
+    return symbol, side, size, price, leverage
+
+
+def synthetic_phrases(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    sides = ["Buy", "Sell", "Long", "Short"]
+    symbols = ["BTC", "ETH", "SOL", "DOG-PERP", "XRP", "ADA", "LINK", "DOGE"]
+    phrases = []
+    for _ in range(count):
+        parts = [rng.choice(sides)]
+        sym, size = rng.choice(symbols), str(rng.choice([0.1, 1, 2.5, 10, 1000]))
+        parts += [sym, size] if rng.random() < 0.5 else [size, sym]
+        price = rng.random()
+        if price < 0.3:
+            parts += ["@", str(rng.randint(1, 40000))]
+        elif price < 0.5:
+            parts.append(f"@{rng.randint(1, 40000)}")
+        elif price < 0.7:
+            parts += ["at", "market"]
+        if rng.random() < 0.4:
+            parts += ["with", f"{rng.randint(1, 20)}x"] + (["leverage"] if rng.random() < 0.5 else [])
+        phrases.append(" ".join(parts))
+    return phrases
+
+
+def _time(parse: Callable[[str], tuple], phrases: list[str]) -> tuple[float, list[tuple]]:
+    start = time.perf_counter()
+    results = [parse(p) for p in phrases]
+    return time.perf_counter() - start, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--phrases", type=int, default=200_000)
+    args = parser.parse_args()
+
+    phrases = synthetic_phrases(args.phrases)
+    before, expected = _time(_multi_pass_parse, phrases)
+    after, results = _time(_heuristic_parse, phrases)
+    assert results == expected, "single-pass parser diverged from the multi-pass parser"
+    print(f"multi-pass:  {len(phrases) / before:,.0f} parses/s")
+    print(f"single-pass: {len(phrases) / after:,.0f} parses/s ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
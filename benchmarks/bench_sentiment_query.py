@@ -0,0 +1,112 @@
+"""Latency of the latest-sentiment lookup as the history table grows.
+
+Seeds ``pair_sentiment`` with hourly rows for ``--pairs`` pairs in steps up
+to ``--rows`` rows (a temporary SQLite file by default, or ``--database-url``
+such as a local Postgres) and, at each size, times the previous lookup
+(ORM objects, ``ORDER BY ts DESC`` without ``LIMIT``) against a ``LIMIT 1``
+Core query on the ``(pair, ts DESC)`` index and against the primary-key
+lookup in ``pair_sentiment_latest`` that the endpoint now uses. The indexed
+queries stay flat while the old one grows with each pair's history.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.bot.db import dispose_engines, get_engine, get_sessionmaker, init_db
+from hyperliquid_bot.sentiment.api import _LATEST
+from hyperliquid_bot.sentiment.job import write_sentiment
+from hyperliquid_bot.sentiment.models import PairSentiment, PairSentimentLatest
+
+START = datetime(2020, 1, 1)
+
+
+async def _seed(settings: Settings, pairs: list[str], hours: range) -> None:
+    rows = [
+        {"pair": pair, "ts": START + timedelta(hours=h), "bucket": START + timedelta(hours=h), "score": 0.5, "summary": "Bullish"}
+        for h in hours
+        for pair in pairs
+    ]
+    async with get_engine(settings).begin() as conn:
+        for start in range(0, len(rows), 5_000):
+            await conn.execute(insert(PairSentiment), rows[start:start + 5_000])
+    # The job upserts the newest hour into pair_sentiment_latest as well.
+    await write_sentiment(rows[-len(pairs):], settings)
+
+
+async def _time(lookup, pairs: list[str], queries: int) -> float:
+    rng = random.Random(0)
+    samples = []
+    for _ in range(queries):
+        pair = rng.choice(pairs)
+        start = time.perf_counter()
+        await lookup(pair)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+
+async def run(args: argparse.Namespace, settings: Settings) -> None:
+    await init_db(settings)
+    pairs = [f"PAIR{i}-PERP" for i in range(args.pairs)]
+    engine = get_engine(settings)
+    sessionmaker = get_sessionmaker(settings)
+
+    async def legacy(pair: str) -> None:
+        async with sessionmaker() as session:
+            result = await session.execute(
+                select(PairSentiment).where(PairSentiment.pair == pair).order_by(PairSentiment.ts.desc())
+            )
+            result.scalars().first()
+
+    limit_one = (
+        select(PairSentiment.pair, PairSentiment.score, PairSentiment.summary)
+        .order_by(PairSentiment.ts.desc())
+        .limit(1)
+    )
+
+    async def indexed(pair: str) -> None:
+        async with engine.connect() as conn:
+            (await conn.execute(limit_one.where(PairSentiment.pair == pair))).first()
+
+    async def latest(pair: str) -> None:
+        async with engine.connect() as conn:
+            (await conn.execute(_LATEST.where(PairSentimentLatest.pair == pair))).first()
+
+    print(f"{'rows':>12}{'rows/pair':>11}{'previous p50 ms':>17}{'LIMIT 1 p50 ms':>16}{'latest table p50 ms':>21}")
+    seeded = 0
+    for step in range(1, args.steps + 1):
+        target_hours = args.rows // args.pairs * step // args.steps
+        await _seed(settings, pairs, range(seeded, target_hours))
+        seeded = target_hours
+        old = await _time(legacy, pairs, args.queries)
+        new = await _time(indexed, pairs, args.queries)
+        table = await _time(latest, pairs, args.queries)
+        print(f"{seeded * args.pairs:>12,}{seeded:>11,}{old:>17.3f}{new:>16.3f}{table:>21.3f}")
+    await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=4, help="table sizes to measure")
+    parser.add_argument("--queries", type=int, default=200, help="lookups timed per size")
+    parser.add_argument("--database-url", default="", help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'sentiment.db')}"
+        asyncio.run(run(args, Settings(database_url=url)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare the token-indexed sentiment scorer with the previous substring scorer.
+
+The previous scorer tested every lexicon word with ``word in text`` against
+every text. ``--extra-words`` grows the lexicon with synthetic words to show
+how each approach scales with lexicon size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from hyperliquid_bot.sentiment.scoring import NEGATIVE, POSITIVE, Lexicon
+
+NOISE = "the a btc eth sol to of is im looking at update pumpkin market price chart today week".split()
+
+
+def legacy_score(texts: list[str], positive: set[str], negative: set[str]) -> float:
+    score = 0
+    for t in texts:
+        tl = t.lower()
+        score += sum(word in tl for word in positive)
+        score -= sum(word in tl for word in negative)
+    return max(-1.0, min(1.0, score / max(len(texts), 1)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=200_000)
+    parser.add_argument("--words", type=int, default=20, help="words per text")
+    parser.add_argument("--extra-words", type=int, default=0, help="synthetic words added to the lexicon")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = NOISE * 4 + list(POSITIVE) + list(NEGATIVE) + ["not", "never"]
+    texts = [" ".join(rng.choice(vocabulary) for _ in range(args.words)) for _ in range(args.texts)]
+    extra = [f"zz{i}word" for i in range(args.extra_words)]
+    positive, negative = set(POSITIVE) | set(extra[::2]), set(NEGATIVE) | set(extra[1::2])
+    lexicon = Lexicon({**{w: 1.0 for w in positive}, **{w: -1.0 for w in negative}})
+
+    start = time.perf_counter()
+    legacy_score(texts, positive, negative)
+    legacy = time.perf_counter() - start
+    start = time.perf_counter()
+    lexicon.aggregate(texts)
+    indexed = time.perf_counter() - start
+
+    print(f"lexicon of {len(lexicon.weights)} words, {args.texts:,} texts of {args.words} words")
+    print(f"substring  {legacy:7.3f} s  ({args.texts / legacy:12,.0f} texts/s)")
+    print(f"indexed    {indexed:7.3f} s  ({args.texts / indexed:12,.0f} texts/s)")
+    print(f"speed-up {legacy / indexed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
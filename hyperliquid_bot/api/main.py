@@ -6,16 +6,35 @@ related services. Additional routers (e.g. sentiment) are included here.
 
 from __future__ import annotations
 
-import json
-from urllib.request import urlopen
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI, HTTPException, Request, Response
 
-from ..bot.config import load_deny_countries
+from ..bot.config import install_reload_signal
+from ..bot.db import dispose_engines, init_db
+from ..bot.geofence import get_geofence, stop_geofences
+from ..bot.geoip import close_country_resolver, get_country_resolver
 from ..sentiment.api import router as sentiment_router
-from .metrics import render_metrics
+from .metrics import render_metrics, start_metrics_publisher, stop_metrics_publisher
 
-app = FastAPI(title="Hyperliquid Trading Companion API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Prepare shared resources on startup and release them on shutdown."""
+    install_reload_signal(asyncio.get_running_loop())
+    await init_db()
+    (await get_geofence()).start()
+    start_metrics_publisher()
+    yield
+    await stop_metrics_publisher()
+    await stop_geofences()
+    await close_country_resolver()
+    await dispose_engines()
+
+
+app = FastAPI(title="Hyperliquid Trading Companion API", lifespan=lifespan)
 
 
 @app.get("/health")
@@ -47,16 +66,9 @@ async def approve_callback(request: Request, ip: str | None = None) -> dict[str,
     """Handle builder-fee approval callback with geofence check."""
 
     client_ip = request.headers.get("X-Forwarded-For", ip)
-    country = ""
-    if client_ip:
-        try:
-            with urlopen(f"https://ipapi.co/{client_ip}/json") as fh:  # nosec - test controlled
-                data = json.loads(fh.read().decode("utf-8"))
-                country = data.get("country", "")
-        except Exception:
-            country = ""
-    deny = set(load_deny_countries())
-    if country.upper() in deny:
+    country = await get_country_resolver().resolve(client_ip)
+    geofence = await get_geofence()
+    if geofence.is_denied(country):
         raise HTTPException(status_code=403, detail="Trading not available in your jurisdiction.")
     return {"status": "ok", "country": country}
 
@@ -65,4 +77,5 @@ async def approve_callback(request: Request, ip: str | None = None) -> dict[str,
 async def metrics() -> Response:
     """Expose Prometheus-style metrics."""
 
-    return Response(render_metrics(), media_type="text/plain")
+    # Reading other processes' snapshots means file or Redis I/O.
+    return Response(await asyncio.to_thread(render_metrics), media_type="text/plain")
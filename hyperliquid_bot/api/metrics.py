@@ -1,29 +1,733 @@
-"""Simple in-memory metrics helpers for tests."""
+"""In-process metrics rendered in the Prometheus text format.
+
+Metrics are created once at import time and listed in :data:`REGISTRY`, in
+the order :func:`render_metrics` emits them. Three kinds exist:
+
+* :class:`Counter` - monotonically increasing totals;
+* :class:`Gauge` - last value set;
+* :class:`Histogram` - cumulative buckets ending in ``+Inf`` plus ``_sum``
+  and ``_count``. A histogram may also keep a :class:`QuantileSketch` per
+  label set over a sliding time window, exported as ``<name>_window`` with a
+  ``quantile`` label, so p95/p99 reflect recent traffic rather than all time.
+
+Recording never takes a lock: every thread writes to its own shard of a
+metric (a plain dict reached through :class:`threading.local`) and the
+shards are merged when metrics are rendered. Each metric keeps at most
+``max_series`` label sets; further ones are folded into an ``other`` series.
+
+Several processes (uvicorn workers, the bot, replicas) share their metrics
+through a :class:`MetricsStore` selected with ``METRICS_BACKEND``: each
+process periodically publishes a JSON snapshot of its samples (see
+:class:`MetricsPublisher`) to a per-process file in ``METRICS_DIR`` or to a
+Redis key, and :func:`render_metrics` merges the other processes' snapshots
+with its own live samples. Counters and histogram buckets of a process that
+stopped publishing keep counting, but its gauges are dropped once its snapshot
+is older than ``METRICS_TTL`` seconds, and its window quantiles once the
+snapshot is older than the window. Recording costs the same with either
+backend.
+"""
+
 from __future__ import annotations
 
-from typing import Dict
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+from ..bot.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+try:  # pragma: no cover - optional dependency
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+Labels = Tuple[str, ...]
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _label_str(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch (DDSketch-style logarithmic bins).
+
+    Values are counted in bins whose bounds grow by ``gamma = (1 + alpha) /
+    (1 - alpha)``, so every quantile estimate is within ``alpha`` relative
+    error of a true sample. Sketches with the same ``alpha`` merge by adding
+    bin counts.
+    """
+
+    __slots__ = ("alpha", "_log_gamma", "bins", "zeros", "count")
+
+    def __init__(self, alpha: float = 0.01) -> None:
+        self.alpha = alpha
+        self._log_gamma = math.log((1 + alpha) / (1 - alpha))
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Record ``value``; values at or below zero count as zero."""
+        if value > 0:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+        else:
+            self.zeros += 1
+        self.count += 1
+
+    def dump(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "zeros": self.zeros, "bins": {str(k): n for k, n in self.bins.items()}}
+
+    @classmethod
+    def load(cls, raw: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(raw["alpha"])
+        sketch.bins = {int(k): n for k, n in raw["bins"].items()}
+        sketch.zeros = raw["zeros"]
+        sketch.count = sketch.zeros + sum(sketch.bins.values())
+        return sketch
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add ``other``'s counts to this sketch."""
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the estimated ``q``-quantile, or ``None`` if nothing was recorded."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        gamma = math.exp(self._log_gamma)
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return 2 * gamma ** key / (gamma + 1)
+        return 2 * gamma ** max(self.bins) / (gamma + 1)
+
+
+class _Window:
+    """Ring of per-slice sketches covering the last ``window`` seconds."""
+
+    __slots__ = ("slice_seconds", "slices", "alpha")
+
+    def __init__(self, window: float, slices: int, alpha: float) -> None:
+        self.slice_seconds = window / slices
+        self.slices: List[Tuple[int, QuantileSketch]] = [(-1, QuantileSketch(alpha)) for _ in range(slices)]
+        self.alpha = alpha
+
+    def add(self, value: float, now: float) -> None:
+        sid = int(now // self.slice_seconds)
+        slot = sid % len(self.slices)
+        current, sketch = self.slices[slot]
+        if current != sid:
+            sketch = QuantileSketch(self.alpha)
+            self.slices[slot] = (sid, sketch)
+        sketch.add(value)
+
+    def merge_into(self, target: QuantileSketch, now: float) -> None:
+        oldest = int(now // self.slice_seconds) - len(self.slices)
+        for sid, sketch in list(self.slices):
+            if sid > oldest:
+                target.merge(sketch)
+
+
+class _Metric:
+    """Base class holding per-thread shards of ``labels -> state``.
+
+    By default a series is a single running number summed across threads
+    and processes, which is what :class:`Counter` needs. Subclasses turn
+    their shards into ``labels -> sample`` with :meth:`samples`, and define
+    how samples from several threads or processes
+    :meth:`merge`, how they travel as JSON (:meth:`dump`/:meth:`load`) and how
+    they are rendered.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), *, max_series: int = 1000) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._overflow: Labels = ("other",) * len(self.labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+        REGISTRY.append(self)
+
+    def _shard(self) -> Dict[Labels, Any]:
+        try:
+            return self._local.series
+        except AttributeError:
+            series: Dict[Labels, Any] = {}
+            self._local.series = series
+            self._shards.append(series)  # list.append is atomic
+            return series
+
+    def _series(self, labels: Labels) -> Any:
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            if len(shard) >= self.max_series:
+                labels = self._overflow
+                state = shard.get(labels)
+            if state is None:
+                state = shard[labels] = self._new_state()
+        return state
+
+    def _new_state(self) -> Any:
+        # A single running number; histograms keep richer state.
+        return [0.0]
+
+    def reset(self) -> None:
+        """Drop every recorded value (for tests)."""
+        for shard in list(self._shards):
+            shard.clear()
+
+    def _sample(self, state: Any) -> Any:
+        return state[0]
+
+    def samples(self) -> Dict[Labels, Any]:
+        """Return this process's samples merged across threads."""
+        merged: Dict[Labels, Any] = {}
+        for shard in list(self._shards):
+            for labels, state in list(shard.items()):
+                sample = self._sample(state)
+                merged[labels] = self.merge(merged[labels], sample) if labels in merged else sample
+        return merged
+
+    def merge(self, a: Any, b: Any) -> Any:
+        return a + b
+
+    def _aged(self, sample: Any, age: float, ttl: float) -> Any:
+        """Return what still counts of a ``sample`` from a snapshot ``age`` seconds old.
+
+        ``None`` drops the sample. Totals keep counting after their process
+        stopped publishing.
+        """
+        return sample
+
+    def dump(self, sample: Any) -> Any:
+        return sample
+
+    def load(self, raw: Any) -> Any:
+        return raw
+
+    def _empty(self) -> Any:
+        return 0.0
+
+    def render(self, others: Iterable[Dict[Labels, Any]] = ()) -> List[str]:
+        """Render this process's samples merged with ``others`` (from other processes)."""
+        merged = self.samples()
+        for samples in others:
+            for labels, sample in samples.items():
+                merged[labels] = self.merge(merged[labels], sample) if labels in merged else sample
+        if not merged and not self.labelnames:
+            merged = {(): self._empty()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        self._render_samples(lines, merged)
+        return lines
+
+    def _render_samples(self, lines: List[str], merged: Dict[Labels, Any]) -> None:
+        for labels, sample in sorted(merged.items()):
+            lines.append(f"{self.name}{_label_str(self.labelnames, labels)} {_fmt(sample)}")
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add ``amount`` to the series for ``labels``."""
+        self._series(labels)[0] += amount
+
+    def value(self, *labels: str) -> float:
+        """Return the total for ``labels`` across all threads."""
+        return sum(shard[labels][0] for shard in list(self._shards) if labels in shard)
+
+
+class Gauge(_Metric):
+    """Value that is set rather than accumulated; the latest write wins.
+
+    Across processes the values of a label set are added up, so a queue
+    depth gauge reports the total backlog.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), **kwargs: Any) -> None:
+        super().__init__(name, help, labelnames, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the series for ``labels`` to ``value``."""
+        self._values[labels] = value  # single dict store, atomic
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def reset(self) -> None:
+        self._values.clear()
+
+    def samples(self) -> Dict[Labels, Any]:
+        return dict(self._values)
+
+    def _aged(self, sample: Any, age: float, ttl: float) -> Any:
+        # The process is gone or stuck; its last value is no longer current.
+        return sample if age <= ttl else None
+
+
+class _HistogramState:
+    __slots__ = ("counts", "sum", "count", "window")
+
+    def __init__(self, buckets: int, window: Optional[_Window]) -> None:
+        self.counts = [0] * (buckets + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.window = window
+
+
+HistogramSample = Tuple[List[int], float, int, Optional[QuantileSketch]]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with optional sliding-window quantiles.
+
+    Parameters
+    ----------
+    name: str
+        Metric family name; samples are ``<name>_bucket``, ``<name>_sum`` and
+        ``<name>_count``.
+    help: str
+        Description emitted as ``# HELP``.
+    labelnames: Sequence[str]
+        Label names; :meth:`observe` takes their values positionally.
+    buckets: Iterable[float]
+        Upper bounds of the finite buckets; ``+Inf`` is always added.
+    window: float
+        Seconds of history covered by the quantile sketch; ``0`` disables it.
+    window_slices: int
+        Number of sub-windows the sketch window rotates through.
+    alpha: float
+        Relative accuracy of the quantile sketch.
+    clock: Callable[[], float]
+        Monotonic time source, injectable for tests.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Iterable[float],
+        window: float = 0,
+        window_slices: int = 6,
+        alpha: float = 0.01,
+        clock: Callable[[], float] = time.monotonic,
+        max_series: int = 1000,
+    ) -> None:
+        super().__init__(name, help, labelnames, max_series=max_series)
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        self.window = window
+        self.window_slices = max(1, window_slices)
+        self.alpha = alpha
+        self.clock = clock
 
-_latency_buckets = [50, 100, 250, 500]
-latency_ms_bucket: Dict[int, int] = {b: 0 for b in _latency_buckets}
-_total_orders = 0
+    def _new_state(self) -> _HistogramState:
+        window = _Window(self.window, self.window_slices, self.alpha) if self.window > 0 else None
+        return _HistogramState(len(self.buckets), window)
 
+    def observe(self, value: float, *labels: str) -> None:
+        """Record ``value`` in the series for ``labels``."""
+        state: _HistogramState = self._series(labels)
+        state.counts[bisect_left(self.buckets, value)] += 1
+        state.sum += value
+        state.count += 1
+        if state.window is not None:
+            state.window.add(value, self.clock())
 
-def observe_latency(ms: float) -> None:
+    def _sample(self, state: _HistogramState) -> HistogramSample:
+        sketch = None
+        if state.window is not None:
+            sketch = QuantileSketch(self.alpha)
+            state.window.merge_into(sketch, self.clock())
+        return list(state.counts), state.sum, state.count, sketch
+
+    def _empty(self) -> HistogramSample:
+        return [0] * (len(self.buckets) + 1), 0.0, 0, None
+
+    def merge(self, a: HistogramSample, b: HistogramSample) -> HistogramSample:
+        if len(a[0]) != len(b[0]):
+            # Another process uses different buckets; keep sum and count only.
+            b = ([0] * len(a[0]), b[1], b[2], b[3])
+        sketch = a[3]
+        if b[3] is not None:
+            if sketch is None:
+                sketch = QuantileSketch(b[3].alpha)
+            sketch.merge(b[3])
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2], sketch
+
+    def _aged(self, sample: HistogramSample, age: float, ttl: float) -> HistogramSample:
+        if sample[3] is not None and (age > ttl or age > self.window):
+            return sample[0], sample[1], sample[2], None
+        return sample
+
+    def dump(self, sample: HistogramSample) -> Any:
+        counts, total, count, sketch = sample
+        return [counts, total, count, sketch.dump() if sketch is not None else None]
+
+    def load(self, raw: Any) -> HistogramSample:
+        counts, total, count, sketch = raw
+        return counts, total, count, QuantileSketch.load(sketch) if sketch is not None else None
+
+    def count(self, *labels: str) -> int:
+        """Return the number of observations for ``labels``."""
+        sample = self.samples().get(labels)
+        return sample[2] if sample else 0
+
+    def quantile(self, q: float, *labels: str) -> Optional[float]:
+        """Return the sliding-window ``q``-quantile for ``labels``."""
+        sample = self.samples().get(labels)
+        return sample[3].quantile(q) if sample and sample[3] is not None else None
+
+    def _render_samples(self, lines: List[str], merged: Dict[Labels, HistogramSample]) -> None:
+        quantile_lines: List[str] = []
+        bounds = self.buckets + (math.inf,)
+        for labels, (counts, total, count, sketch) in sorted(merged.items()):
+            running = 0
+            for bound, n in zip(bounds, counts):
+                running += n
+                le = _label_str(self.labelnames, labels, f'le="{_fmt(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {running}")
+            plain = _label_str(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {_fmt(total)}")
+            lines.append(f"{self.name}_count{plain} {count}")
+            if sketch is not None and sketch.count:
+                for q in QUANTILES:
+                    label = _label_str(self.labelnames, labels, f'quantile="{q}"')
+                    quantile_lines.append(f"{self.name}_window{label} {sketch.quantile(q):.6g}")
+        if quantile_lines:
+            lines.append(f"# HELP {self.name}_window {self.help} over the last {_fmt(self.window)}s")
+            lines.append(f"# TYPE {self.name}_window gauge")
+            lines.extend(quantile_lines)
+
+
+REGISTRY: List[_Metric] = []
+
+_settings = get_settings()
+LATENCY = Histogram(
+    "latency_ms",
+    "Handler latency in milliseconds",
+    ("handler",),
+    buckets=_settings.metrics_latency_buckets_ms,
+    window=_settings.metrics_quantile_window_seconds,
+)
+STAGE_LATENCY = Histogram(
+    "stage_latency_ms",
+    "Latency of traced stages in milliseconds",
+    ("stage",),
+    buckets=_settings.metrics_latency_buckets_ms,
+    window=_settings.metrics_quantile_window_seconds,
+)
+ORDERS = Counter("total_orders", "Orders submitted")
+TRADE_BATCH_SIZE = Histogram("trade_batch_size", "Rows written per trade batch commit", buckets=(1, 10, 50, 100, 500))
+TRADE_QUEUE_DEPTH = Gauge("trade_queue_depth", "Trades waiting to be persisted")
+DISPATCH_QUEUE_DEPTH = Gauge("dispatch_queue_depth", "Updates queued or being handled by the dispatcher")
+DISPATCH_CHATS = Gauge("dispatch_chats", "Chats with updates queued or being handled")
+PARSE_CACHE_HITS = Counter("parse_cache_hits_total", "Natural-language parse cache hits")
+PARSE_CACHE_MISSES = Counter("parse_cache_misses_total", "Natural-language parse cache misses")
+NL_PARSES = Counter("nl_parses_total", "Natural-language parses not served from the cache")
+NL_ESCALATIONS = Counter("nl_escalations_total", "Natural-language parses escalated to the model")
+NL_ESCALATION_REASONS = Counter("nl_escalation_reason_total", "Reasons for model escalations", ("reason",))
+del _settings
+
+
+def observe_latency(ms: float, handler: str = "unknown") -> None:
     """Record a handler latency in milliseconds."""
-    for b in _latency_buckets:
-        if ms <= b:
-            latency_ms_bucket[b] += 1
-            break
+    LATENCY.observe(ms, handler)
+
+
+def observe_stage(stage: str, ms: float) -> None:
+    """Record the duration of a traced stage in milliseconds."""
+    STAGE_LATENCY.observe(ms, stage)
 
 
 def inc_orders() -> None:
     """Increment total order counter."""
-    global _total_orders
-    _total_orders += 1
+    ORDERS.inc()
+
+
+def observe_trade_batch(size: int) -> None:
+    """Record the number of rows written by one trade batch commit."""
+    TRADE_BATCH_SIZE.observe(size)
+
+
+def set_trade_queue_depth(depth: int) -> None:
+    """Record the number of trades waiting to be persisted."""
+    TRADE_QUEUE_DEPTH.set(depth)
+
+
+def set_dispatch_queue_depth(updates: int, chats: int) -> None:
+    """Record the updates and chats waiting in or being handled by the dispatcher."""
+    DISPATCH_QUEUE_DEPTH.set(updates)
+    DISPATCH_CHATS.set(chats)
+
+
+def inc_parse_cache(hit: bool) -> None:
+    """Count a natural-language parse cache lookup."""
+    (PARSE_CACHE_HITS if hit else PARSE_CACHE_MISSES).inc()
+
+
+def observe_nl_parse(reasons: Sequence[str]) -> None:
+    """Count a natural-language parse and, if non-empty, why it went to the model."""
+    NL_PARSES.inc()
+    if reasons:
+        NL_ESCALATIONS.inc()
+        for reason in reasons:
+            NL_ESCALATION_REASONS.inc(reason)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return this process's samples of every registered metric as JSON-ready data."""
+    return {
+        "ts": time.time(),
+        "metrics": {
+            m.name: [[list(labels), m.dump(sample)] for labels, sample in m.samples().items()] for m in REGISTRY
+        },
+    }
+
+
+class MetricsStore(Protocol):
+    """Where processes publish snapshots for each other."""
+
+    process_id: str
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        """Publish this process's snapshot, replacing the previous one."""
+        ...
+
+    def read(self) -> List[Dict[str, Any]]:
+        """Return the latest snapshot of every other process."""
+        ...
+
+
+def _process_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class FileMetricsStore:
+    """Snapshots kept as one JSON file per process in a shared directory.
+
+    Files are replaced atomically, so readers never see a partial write.
+    Files of exited processes stay in place so their counters keep counting
+    towards the totals (their gauges and window quantiles age out, see
+    :func:`render_metrics`); clear the directory when the deployment
+    restarts. The directory must be shared by every process, e.g. a volume
+    mounted into both the bot and the API containers.
+    """
+
+    def __init__(self, directory: str, process_id: Optional[str] = None) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.process_id = process_id or _process_id()
+        self.path = self.directory / f"{self.process_id}.json"
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def read(self) -> List[Dict[str, Any]]:
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            if path != self.path:
+                try:
+                    snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+                except (OSError, ValueError):
+                    logger.warning("Skipping unreadable metrics snapshot %s", path)
+        return snapshots
+
+
+class RedisMetricsStore:
+    """Snapshots kept in Redis keys, one per process, that expire when a process stops publishing."""
+
+    prefix = "metrics:"
+    members = "metrics:processes"
+
+    def __init__(self, client: Any, ttl: int = 3600, process_id: Optional[str] = None) -> None:
+        self._client = client
+        self.ttl = ttl
+        self.process_id = process_id or _process_id()
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        key = self.prefix + self.process_id
+        self._client.set(key, json.dumps(snapshot), ex=self.ttl)
+        self._client.sadd(self.members, key)
+
+    def read(self) -> List[Dict[str, Any]]:
+        own = self.prefix + self.process_id
+        keys = sorted(k.decode() if isinstance(k, bytes) else k for k in self._client.smembers(self.members))
+        keys = [k for k in keys if k != own]
+        if not keys:
+            return []
+        snapshots = []
+        for key, raw in zip(keys, self._client.mget(keys)):
+            if raw is None:
+                self._client.srem(self.members, key)
+            else:
+                snapshots.append(json.loads(raw))
+        return snapshots
+
+
+_store: Optional[MetricsStore] = None
+_store_configured = False
+
+
+def get_metrics_store(settings: Optional[Settings] = None) -> Optional[MetricsStore]:
+    """Return the configured shared store, or ``None`` for ``METRICS_BACKEND=memory``."""
+
+    global _store, _store_configured
+    if not _store_configured:
+        s = settings or get_settings()
+        if s.metrics_backend == "file":
+            _store = FileMetricsStore(s.metrics_dir)
+        elif s.metrics_backend == "redis":
+            if redis is None:
+                raise RuntimeError("METRICS_BACKEND=redis requires the 'redis' package")
+            _store = RedisMetricsStore(redis.Redis.from_url(s.redis_url), ttl=s.metrics_ttl)
+        _store_configured = True
+    return _store
+
+
+def set_metrics_store(store: Optional[MetricsStore]) -> None:
+    """Use ``store`` instead of the configured backend (``None`` for in-process only)."""
+
+    global _store, _store_configured
+    _store, _store_configured = store, True
+
+
+class MetricsPublisher:
+    """Background task writing :func:`snapshot` to a store every ``interval`` seconds.
+
+    Writes run in a worker thread so the event loop never waits on the store.
+    """
+
+    def __init__(self, store: MetricsStore, interval: float = 5.0) -> None:
+        self.store = store
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self) -> None:
+        """Write the current snapshot now."""
+        try:
+            self.store.write(snapshot())
+        except Exception as exc:
+            logger.warning("Could not publish metrics: %s", exc)
+
+    def start(self) -> None:
+        """Start publishing from the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            # Writing means file or Redis I/O; snapshots read the per-thread
+            # shards, so a worker thread can take them.
+            await asyncio.to_thread(self.publish)
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        """Stop the task and publish a final snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.publish)
+
+
+_publisher: Optional[MetricsPublisher] = None
+
+
+def start_metrics_publisher(settings: Optional[Settings] = None) -> Optional[MetricsPublisher]:
+    """Start publishing this process's metrics if a shared store is configured."""
+
+    global _publisher
+    s = settings or get_settings()
+    store = get_metrics_store(s)
+    if store is None:
+        return None
+    if _publisher is None:
+        _publisher = MetricsPublisher(store, s.metrics_flush_seconds)
+    _publisher.start()
+    return _publisher
+
+
+async def stop_metrics_publisher() -> None:
+    """Stop the process-wide publisher after a final publish."""
+
+    global _publisher
+    publisher, _publisher = _publisher, None
+    if publisher is not None:
+        await publisher.stop()
+
+
+def _read_snapshots(store: MetricsStore) -> List[Dict[str, Any]]:
+    try:
+        return store.read()
+    except Exception as exc:
+        logger.warning("Could not read other processes' metrics: %s", exc)
+        return []
 
 
 def render_metrics() -> str:
-    """Render metrics in Prometheus text format."""
-    lines = [f'latency_ms_bucket{{le="{b}"}} {latency_ms_bucket[b]}' for b in _latency_buckets]
-    lines.append(f'total_orders {_total_orders}')
+    """Render metrics in Prometheus text format.
+
+    With a shared store, the latest snapshots of the other processes are
+    merged into this process's live samples; a store that cannot be read is
+    logged and skipped. Reading the store blocks, so async callers should run
+    this in a worker thread.
+    """
+    store = get_metrics_store()
+    ttl = get_settings().metrics_ttl
+    now = time.time()
+    others: Dict[str, List[Tuple[float, List[Any]]]] = {}
+    if store is not None:
+        for snap in _read_snapshots(store):
+            age = now - snap.get("ts", now)
+            for name, samples in snap.get("metrics", {}).items():
+                others.setdefault(name, []).append((age, samples))
+    lines: List[str] = []
+    for metric in REGISTRY:
+        remote = []
+        for age, samples in others.get(metric.name, ()):
+            loaded = {tuple(labels): metric._aged(metric.load(raw), age, ttl) for labels, raw in samples}
+            remote.append({labels: sample for labels, sample in loaded.items() if sample is not None})
+        lines.extend(metric.render(remote))
     return "\n".join(lines) + "\n"
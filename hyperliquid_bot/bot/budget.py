@@ -0,0 +1,230 @@
+"""Monthly token budget shared by every parser call.
+
+:class:`BudgetGuard` charges model calls against a ledger keyed by calendar
+month (UTC), so spend resets automatically on the 1st. Calls pre-reserve their
+estimated cost and later reconcile it with the actual usage reported by the
+model. Two ledgers are available:
+
+* :class:`LocalBudgetLedger` keeps totals in process memory behind a lock;
+* :class:`RedisBudgetLedger` reserves with one Lua script (check, then
+  ``INCRBYFLOAT``) so several bot replicas share one budget
+  (``BUDGET_LEDGER_BACKEND=redis``).
+
+Every operation is a constant number of dictionary or Redis commands. Async
+callers use :meth:`BudgetGuard.areserve` and :meth:`BudgetGuard.areconcile`,
+which run Redis round-trips in a worker thread. If the ledger cannot be
+reached the guard fails closed: no reservation is granted, so the model is not
+called and parsing falls back to the heuristic parser.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Protocol
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+try:  # pragma: no cover - optional dependency
+    import redis
+    from redis import RedisError
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+    class RedisError(Exception):  # type: ignore[no-redef]
+        """Placeholder so ``except RedisError`` works without the package."""
+
+
+class BudgetLedger(Protocol):
+    """Storage for per-month spend totals."""
+
+    def reserve(self, month: str, amount: float, limit: float) -> bool:
+        """Atomically add ``amount`` unless the total would exceed ``limit``."""
+        ...
+
+    def adjust(self, month: str, delta: float) -> None:
+        """Add ``delta`` (possibly negative) to the month's total."""
+        ...
+
+    def spent(self, month: str) -> float:
+        """Return the month's total."""
+        ...
+
+
+class LocalBudgetLedger:
+    """Ledger kept in process memory."""
+
+    def __init__(self) -> None:
+        self._totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, month: str, amount: float, limit: float) -> bool:
+        with self._lock:
+            total = self._totals.get(month, 0.0) + amount
+            if total > limit:
+                return False
+            self._totals = {month: total}  # earlier months are no longer needed
+            return True
+
+    def adjust(self, month: str, delta: float) -> None:
+        with self._lock:
+            self._totals[month] = self._totals.get(month, 0.0) + delta
+
+    def spent(self, month: str) -> float:
+        return self._totals.get(month, 0.0)
+
+
+class RedisBudgetLedger:
+    """Ledger shared through Redis ``INCRBYFLOAT`` counters."""
+
+    prefix = "token_budget:"
+    # Keep a month's key a little longer than the month itself.
+    expire_seconds = 40 * 24 * 3600
+    # Check and increment in one atomic round-trip, so the total never
+    # overshoots the limit, not even briefly.
+    reserve_script = """
+local total = tonumber(redis.call('GET', KEYS[1]) or '0') + tonumber(ARGV[1])
+if total > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('INCRBYFLOAT', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+        self._reserve = client.register_script(self.reserve_script)
+
+    def reserve(self, month: str, amount: float, limit: float) -> bool:
+        return bool(self._reserve(keys=[self.prefix + month], args=[amount, limit, self.expire_seconds]))
+
+    def adjust(self, month: str, delta: float) -> None:
+        if delta:
+            self._client.incrbyfloat(self.prefix + month, delta)
+
+    def spent(self, month: str) -> float:
+        raw = self._client.get(self.prefix + month)
+        return float(raw) if raw is not None else 0.0
+
+
+@dataclass(frozen=True)
+class BudgetReservation:
+    """Estimated cost held against a month until the actual cost is known."""
+
+    month: str
+    amount: float
+
+
+class BudgetGuard:
+    """Token budget tracker backed by a month-scoped ledger.
+
+    Parameters
+    ----------
+    monthly_budget: Optional[float]
+        Maximum spend allowed per calendar month; defaults to
+        ``TOKEN_BUDGET_MONTHLY``.
+    ledger: Optional[BudgetLedger]
+        Where spend is recorded. A guard created without one gets a private
+        in-process ledger; :func:`get_budget_guard` returns the shared guard.
+    clock: Callable[[], float]
+        Epoch time source, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        monthly_budget: Optional[float] = None,
+        ledger: Optional[BudgetLedger] = None,
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.monthly_budget = float(
+            monthly_budget if monthly_budget is not None else get_settings().token_budget_monthly
+        )
+        self.ledger: BudgetLedger = ledger if ledger is not None else LocalBudgetLedger()
+        self._clock = clock
+        self._month = ""
+        self._month_end = 0.0
+
+    def current_month(self) -> str:
+        """Return the ledger key (``YYYY-MM``, UTC) for the current month."""
+        now = self._clock()
+        if now >= self._month_end or not self._month:
+            dt = datetime.fromtimestamp(now, timezone.utc)
+            self._month = f"{dt.year:04d}-{dt.month:02d}"
+            nxt = datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1, tzinfo=timezone.utc)
+            self._month_end = nxt.timestamp()
+        return self._month
+
+    @property
+    def spent(self) -> float:
+        """Spend recorded for the current month."""
+        return self.ledger.spent(self.current_month())
+
+    def reserve(self, estimated: float) -> Optional[BudgetReservation]:
+        """Hold ``estimated`` against the budget; ``None`` (and a warning) if it does not fit.
+
+        An unreachable ledger also returns ``None``: spend that cannot be
+        recorded is not allowed.
+        """
+        month = self.current_month()
+        try:
+            granted = self.ledger.reserve(month, estimated, self.monthly_budget)
+        except RedisError as exc:
+            logger.warning("Budget ledger unavailable (%s); using fallback parser", exc)
+            return None
+        if not granted:
+            logger.warning("Budget exceeded; using fallback parser")
+            return None
+        return BudgetReservation(month, estimated)
+
+    def reconcile(self, reservation: BudgetReservation, actual: float) -> None:
+        """Replace a reservation's estimate with the actual cost (``0`` releases it)."""
+        try:
+            self.ledger.adjust(reservation.month, actual - reservation.amount)
+        except RedisError as exc:
+            # The estimate stays charged, which errs on the side of spending less.
+            logger.warning("Budget ledger unavailable (%s); reservation left at its estimate", exc)
+
+    async def areserve(self, estimated: float) -> Optional[BudgetReservation]:
+        """Asynchronous :meth:`reserve`; a shared ledger is called from a worker thread."""
+        if isinstance(self.ledger, LocalBudgetLedger):
+            return self.reserve(estimated)
+        return await asyncio.to_thread(self.reserve, estimated)
+
+    async def areconcile(self, reservation: BudgetReservation, actual: float) -> None:
+        """Asynchronous :meth:`reconcile`; a shared ledger is called from a worker thread."""
+        if isinstance(self.ledger, LocalBudgetLedger):
+            self.reconcile(reservation, actual)
+        else:
+            await asyncio.to_thread(self.reconcile, reservation, actual)
+
+    def can_spend(self, cost: float) -> bool:
+        """Return ``True`` and record ``cost`` if it fits in the budget, else log fallback."""
+        return self.reserve(cost) is not None
+
+
+_guard: Optional[BudgetGuard] = None
+
+
+def get_budget_guard(settings: Optional[Settings] = None) -> BudgetGuard:
+    """Return the process-wide guard using the configured ledger backend."""
+
+    global _guard
+    if _guard is None:
+        s = settings or get_settings()
+        ledger: BudgetLedger
+        if s.budget_ledger_backend == "redis":
+            if redis is None:
+                raise RuntimeError("BUDGET_LEDGER_BACKEND=redis requires the 'redis' package")
+            ledger = RedisBudgetLedger(redis.Redis.from_url(s.redis_url))
+        else:
+            ledger = LocalBudgetLedger()
+        _guard = BudgetGuard(s.token_budget_monthly, ledger)
+    return _guard
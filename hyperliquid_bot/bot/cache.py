@@ -0,0 +1,90 @@
+"""In-process caching helpers.
+
+:class:`LRUCache` is a small bounded mapping with least-recently-used eviction
+and an optional time-to-live. It is not thread-safe; every caller lives on the
+event loop thread.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Iterable, Mapping, Optional, Tuple, TypeVar, Union
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded LRU mapping with optional per-entry expiry.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of entries kept; the least recently used entry is
+        evicted when the cache is full.
+    ttl: Optional[float]
+        Seconds an entry stays valid. ``None`` or ``0`` keeps entries until
+        they are evicted.
+    clock: Callable[[], float]
+        Monotonic time source, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl or None
+        self._clock = clock
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Return the cached value for ``key`` or ``default`` when absent or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires, value = entry
+        if expires and expires <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """Store ``value`` under ``key``, evicting the oldest entry if needed."""
+        expires = self._clock() + self.ttl if self.ttl else 0.0
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def update(self, items: Union[Mapping[K, V], Iterable[Tuple[K, V]]]) -> None:
+        """Store several entries at once."""
+        pairs = items.items() if isinstance(items, Mapping) else items
+        for key, value in pairs:
+            self.put(key, value)
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Remove ``key`` and return its value, or ``default`` when absent or expired."""
+        entry = self._data.pop(key, None)
+        if entry is None or (entry[0] and entry[0] <= self._clock()):
+            return default
+        return entry[1]
+
+    def clear(self) -> None:
+        """Drop every entry and reset hit/miss counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
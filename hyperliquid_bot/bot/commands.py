@@ -11,20 +11,17 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Optional
+from typing import Optional, Tuple, Union
 
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import CommandStart, CommandObject
 
-from .config import load_deny_countries
+from .config import Settings
+from .geofence import get_geofence
 from .hyperliquid import build_order_json
-from .db import (
-    Base,
-    Trade,
-    get_engine,
-    get_or_create_user,
-    get_sessionmaker,
-)
+from .pending import get_pending_orders
+from .trade_writer import get_trade_writer
+from .tracing import span
 from ..api.metrics import inc_orders
 
 
@@ -37,11 +34,11 @@ async def start_handler(message: types.Message, command: CommandObject) -> None:
     Greets the user and checks geofence restrictions. If the user’s IP
     originates from a denied country, they are blocked from further use.
     """
-    deny_countries = set(load_deny_countries())
+    geofence = await get_geofence()
     # In production, you would extract the user's country from an IP lookup.
     # During testing we mock this as always allowed.
     user_country_code: Optional[str] = None  # to be filled via webhook metadata
-    if user_country_code and user_country_code.upper() in deny_countries:
+    if geofence.is_denied(user_country_code):
         await message.answer("Sorry, our service is not available in your region.")
         return
     await message.answer(
@@ -61,52 +58,67 @@ async def approve_handler(message: types.Message) -> None:
     )
 
 
-async def buy_sell_handler(message: types.Message, side: str) -> None:
-    """Handle /buy or /sell commands.
-
-    Expects the command text to include the symbol and size. Optionally
-    accepts a price and leverage. Example: ``/buy ETH 1.5 3000 5`` will
-    build a limit order to buy 1.5 ETH at 3000 USDC with 5x leverage.
-    """
-    args = message.text.strip().split()
+def _parse_order_args(text: str, side: str) -> Union[Tuple[str, float, Optional[float], Optional[int]], str]:
+    """Return ``(symbol, size, price, leverage)`` from a /buy or /sell command, or an error message."""
+    args = text.strip().split()
     # args[0] is the command, e.g., '/buy'
     if len(args) < 3:
-        await message.answer("Usage: /{} SYMBOL SIZE [PRICE] [LEVERAGE]".format(side))
-        return
+        return "Usage: /{} SYMBOL SIZE [PRICE] [LEVERAGE]".format(side)
     symbol = args[1].upper()
     try:
         size = float(args[2])
     except ValueError:
-        await message.answer("Invalid size; please provide a number.")
-        return
+        return "Invalid size; please provide a number."
     price = None
     leverage = None
     if len(args) >= 4:
         try:
             price = float(args[3])
         except ValueError:
-            await message.answer("Invalid price; please provide a number.")
-            return
+            return "Invalid price; please provide a number."
     if len(args) >= 5:
         try:
             leverage = int(args[4])
         except ValueError:
-            await message.answer("Invalid leverage; please provide an integer.")
-            return
-    payload = build_order_json(
-        symbol=symbol, side=side, size=size, price=price, leverage=leverage
-    )
+            return "Invalid leverage; please provide an integer."
+    return symbol, size, price, leverage
+
+
+async def buy_sell_handler(
+    message: types.Message, side: str, *, settings: Optional[Settings] = None
+) -> None:
+    """Handle /buy or /sell commands.
+
+    Expects the command text to include the symbol and size. Optionally
+    accepts a price and leverage. Example: ``/buy ETH 1.5 3000 5`` will
+    build a limit order to buy 1.5 ETH at 3000 USDC with 5x leverage.
+    ``settings`` defaults to the process-wide settings.
+    """
+    with span("parse"):
+        parsed = _parse_order_args(message.text, side)
+    if isinstance(parsed, str):
+        with span("answer"):
+            await message.answer(parsed)
+        return
+    symbol, size, price, leverage = parsed
+    with span("build_payload"):
+        payload = build_order_json(
+            symbol=symbol, side=side, size=size, price=price, leverage=leverage, settings=settings
+        )
+    with span("pending_put"):
+        order_id = await get_pending_orders().put(payload)
     keyboard = types.InlineKeyboardMarkup(
         inline_keyboard=[
             [
-                types.InlineKeyboardButton(text="✅ Place", callback_data="confirm"),
-                types.InlineKeyboardButton(text="❌ Cancel", callback_data="cancel"),
+                types.InlineKeyboardButton(text="✅ Place", callback_data=f"confirm:{order_id}"),
+                types.InlineKeyboardButton(text="❌ Cancel", callback_data=f"cancel:{order_id}"),
             ]
         ]
     )
-    await message.answer(
-        f"Order preview:\n{json.dumps(payload)}", reply_markup=keyboard
-    )
+    with span("answer"):
+        await message.answer(
+            f"Order preview:\n{json.dumps(payload)}", reply_markup=keyboard
+        )
 
 
 async def positions_handler(message: types.Message) -> None:
@@ -145,36 +157,46 @@ async def price_handler(message: types.Message) -> None:
 
 
 async def order_callback_handler(callback: types.CallbackQuery) -> None:
-    """Handle confirm/cancel buttons for orders."""
+    """Handle confirm/cancel buttons for orders.
+
+    ``callback.data`` is ``"<action>:<order id>"``; the payload is looked up in
+    the pending order store rather than parsed back out of the message text.
+    If the trade cannot be submitted the payload is put back, so the preview
+    stays confirmable.
+    """
 
-    if callback.data == "confirm":
-        # Parse order payload from the message text
-        payload = {}
+    action, _, order_id = callback.data.partition(":")
+    with span("pending_pop"):
+        payload = await get_pending_orders().pop(order_id) if order_id else None
+    if action == "confirm":
+        if payload is None:
+            with span("answer"):
+                await callback.message.edit_text("Order preview expired; please create the order again.")
+                await callback.answer()
+            return
         try:
-            _, raw = callback.message.text.split("\n", 1)
-            payload = json.loads(raw)
+            with span("trade_submit"):
+                await get_trade_writer().submit(
+                    callback.from_user.id,
+                    symbol=payload.get("coin", ""),
+                    side="buy" if payload.get("isBuy") else "sell",
+                    size=float(payload.get("sz", "0")),
+                )
         except Exception:
-            pass
-
-        engine = get_engine()
-        sessionmaker = get_sessionmaker()
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        async with sessionmaker() as session:
-            user = await get_or_create_user(session, callback.from_user.id)
-            trade = Trade(
-                user_id=user.id,
-                symbol=payload.get("coin", ""),
-                side="buy" if payload.get("isBuy") else "sell",
-                size=float(payload.get("sz", "0")),
-            )
-            session.add(trade)
-            await session.commit()
+            # Keep the preview (and its buttons) so the user can confirm again.
+            logger.exception("Submitting order %s failed", order_id)
+            await get_pending_orders().restore(order_id, payload)
+            with span("answer"):
+                await callback.message.answer("Could not submit the order; please press Place again.")
+                await callback.answer()
+            return
         inc_orders()
-        await callback.message.edit_text("Order submitted!")
+        text = "Order submitted!"
     else:
-        await callback.message.edit_text("Order cancelled.")
-    await callback.answer()
+        text = "Order cancelled."
+    with span("answer"):
+        await callback.message.edit_text(text)
+        await callback.answer()
 
 
 async def setup_bot(bot: Bot, dispatcher: Dispatcher) -> None:
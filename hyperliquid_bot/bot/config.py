@@ -4,32 +4,66 @@ Environment variables are used for all runtime configuration.  The most
 important ones are ``BUILDER_FEE_TENTH_BPS`` (fee in tenths of a basis point),
 ``ZERO_FEE_UNTIL`` (ISO timestamp for launch promotions) and
 ``DENY_COUNTRIES_URL`` pointing to a JSON/CSV deny‑list for geofencing.
+
+The environment is read once: :func:`get_settings` returns a cached, frozen
+:class:`Settings` instance and :func:`reload_settings` (also bound to
+``SIGHUP`` by the entry points) replaces it after configuration changes.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
-from datetime import datetime
-from typing import List, Optional
+import signal
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 from urllib.request import urlopen
 
 from dataclasses import dataclass, field
 
+logger = logging.getLogger(__name__)
+
+
+def _floats(raw: str) -> Tuple[float, ...]:
+    return tuple(float(v) for v in raw.split(",") if v.strip())
 
-@dataclass
+
+@dataclass(frozen=True)
 class Settings:
     """Application settings loaded from environment variables.
 
     This lightweight replacement for :class:`pydantic.BaseSettings` avoids a
     hard dependency on Pydantic which keeps the test environment minimal. Each
-    field lazily pulls from ``os.environ`` when an instance is created.
+    field pulls from ``os.environ`` when an instance is created; use
+    :func:`get_settings` instead of constructing one per call.
     """
 
     telegram_bot_token: str = field(default_factory=lambda: os.getenv("TELEGRAM_BOT_TOKEN", ""))
     openai_api_key: str = field(default_factory=lambda: os.getenv("OPENAI_API_KEY", ""))
     database_url: str = field(default_factory=lambda: os.getenv("DATABASE_URL", ""))
+    db_pool_size: int = field(default_factory=lambda: int(os.getenv("DB_POOL_SIZE", "5")))
+    db_max_overflow: int = field(default_factory=lambda: int(os.getenv("DB_MAX_OVERFLOW", "10")))
+    db_pool_pre_ping: bool = field(
+        default_factory=lambda: os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    )
+    user_cache_size: int = field(default_factory=lambda: int(os.getenv("USER_CACHE_SIZE", "100000")))
+    user_cache_ttl: float = field(default_factory=lambda: float(os.getenv("USER_CACHE_TTL", "0")))
+    trade_batch_size: int = field(default_factory=lambda: int(os.getenv("TRADE_BATCH_SIZE", "100")))
+    trade_batch_window_ms: float = field(
+        default_factory=lambda: float(os.getenv("TRADE_BATCH_WINDOW_MS", "5"))
+    )
+    dispatch_workers: int = field(default_factory=lambda: int(os.getenv("DISPATCH_WORKERS", "64")))
+    dispatch_queue_size: int = field(default_factory=lambda: int(os.getenv("DISPATCH_QUEUE_SIZE", "1000")))
+    dispatch_drain_timeout: float = field(
+        default_factory=lambda: float(os.getenv("DISPATCH_DRAIN_TIMEOUT", "10"))
+    )
     redis_url: str = field(default_factory=lambda: os.getenv("REDIS_URL", ""))
+    pending_order_backend: str = field(
+        default_factory=lambda: os.getenv("PENDING_ORDER_BACKEND", "memory").lower()
+    )
+    pending_order_ttl: int = field(default_factory=lambda: int(os.getenv("PENDING_ORDER_TTL", "300")))
     builder_fee_tenth_bps: int = field(
         default_factory=lambda: int(os.getenv("BUILDER_FEE_TENTH_BPS", "1"))
     )
@@ -43,12 +77,119 @@ class Settings:
     token_budget_monthly: int = field(
         default_factory=lambda: int(os.getenv("TOKEN_BUDGET_MONTHLY", "200"))
     )
+    parse_cache_backend: str = field(
+        default_factory=lambda: os.getenv("PARSE_CACHE_BACKEND", "memory").lower()
+    )
+    parse_cache_size: int = field(default_factory=lambda: int(os.getenv("PARSE_CACHE_SIZE", "10000")))
+    parse_cache_ttl: float = field(default_factory=lambda: float(os.getenv("PARSE_CACHE_TTL", "0")))
+    nl_escalation_threshold: float = field(
+        default_factory=lambda: float(os.getenv("NL_ESCALATION_THRESHOLD", "0.8"))
+    )
+    nl_batch_max_size: int = field(default_factory=lambda: int(os.getenv("NL_BATCH_MAX_SIZE", "16")))
+    nl_batch_max_wait_ms: float = field(
+        default_factory=lambda: float(os.getenv("NL_BATCH_MAX_WAIT_MS", "5"))
+    )
+    nl_model_timeout: float = field(default_factory=lambda: float(os.getenv("NL_MODEL_TIMEOUT", "2")))
+    sentiment_concurrency: int = field(default_factory=lambda: int(os.getenv("SENTIMENT_CONCURRENCY", "32")))
+    sentiment_source_timeout: float = field(
+        default_factory=lambda: float(os.getenv("SENTIMENT_SOURCE_TIMEOUT", "10"))
+    )
+    sentiment_retries: int = field(default_factory=lambda: int(os.getenv("SENTIMENT_RETRIES", "2")))
+    sentiment_retry_backoff: float = field(
+        default_factory=lambda: float(os.getenv("SENTIMENT_RETRY_BACKOFF", "0.5"))
+    )
+    sentiment_write_chunk_size: int = field(
+        default_factory=lambda: int(os.getenv("SENTIMENT_WRITE_CHUNK_SIZE", "500"))
+    )
+    instruments_path: str = field(default_factory=lambda: os.getenv("INSTRUMENTS_PATH", ""))
+    budget_ledger_backend: str = field(
+        default_factory=lambda: os.getenv("BUDGET_LEDGER_BACKEND", "memory").lower()
+    )
     voice_enabled: bool = field(
         default_factory=lambda: os.getenv("VOICE_ENABLED", "").lower() == "true"
     )
+    voice_workers: int = field(default_factory=lambda: int(os.getenv("VOICE_WORKERS", "2")))
+    voice_executor: str = field(default_factory=lambda: os.getenv("VOICE_EXECUTOR", "thread").lower())
+    voice_queue_size: int = field(default_factory=lambda: int(os.getenv("VOICE_QUEUE_SIZE", "64")))
+    voice_per_user_limit: int = field(default_factory=lambda: int(os.getenv("VOICE_PER_USER_LIMIT", "3")))
+    voice_max_bytes: int = field(
+        default_factory=lambda: int(os.getenv("VOICE_MAX_BYTES", str(20 * 1024 * 1024)))
+    )
+    voice_cache_size: int = field(default_factory=lambda: int(os.getenv("VOICE_CACHE_SIZE", "1024")))
     deny_countries_url: str = field(
         default_factory=lambda: os.getenv("DENY_COUNTRIES_URL", "")
     )
+    deny_countries_refresh_seconds: float = field(
+        default_factory=lambda: float(os.getenv("DENY_COUNTRIES_REFRESH_SECONDS", "300"))
+    )
+    geoip_backend: str = field(default_factory=lambda: os.getenv("GEOIP_BACKEND", "http").lower())
+    geoip_url: str = field(
+        default_factory=lambda: os.getenv("GEOIP_URL", "https://ipapi.co/{ip}/json")
+    )
+    geoip_db_path: str = field(default_factory=lambda: os.getenv("GEOIP_DB_PATH", ""))
+    geoip_timeout: float = field(default_factory=lambda: float(os.getenv("GEOIP_TIMEOUT", "2")))
+    geoip_cache_size: int = field(default_factory=lambda: int(os.getenv("GEOIP_CACHE_SIZE", "10000")))
+    geoip_cache_ttl: float = field(default_factory=lambda: float(os.getenv("GEOIP_CACHE_TTL", "3600")))
+    metrics_latency_buckets_ms: Tuple[float, ...] = field(
+        default_factory=lambda: _floats(
+            os.getenv("METRICS_LATENCY_BUCKETS_MS", "5,10,25,50,100,250,500,1000,2500,5000,10000")
+        )
+    )
+    metrics_quantile_window_seconds: float = field(
+        default_factory=lambda: float(os.getenv("METRICS_QUANTILE_WINDOW_SECONDS", "300"))
+    )
+    metrics_backend: str = field(default_factory=lambda: os.getenv("METRICS_BACKEND", "memory").lower())
+    metrics_dir: str = field(default_factory=lambda: os.getenv("METRICS_DIR", "/var/lib/hyperliquid/metrics"))
+    metrics_flush_seconds: float = field(
+        default_factory=lambda: float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+    )
+    metrics_ttl: int = field(default_factory=lambda: int(os.getenv("METRICS_TTL", "3600")))
+    tracing_enabled: bool = field(
+        default_factory=lambda: os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    )
+    trace_sample_rate: float = field(default_factory=lambda: float(os.getenv("TRACE_SAMPLE_RATE", "0.01")))
+    trace_export_path: str = field(default_factory=lambda: os.getenv("TRACE_EXPORT_PATH", ""))
+    zero_fee_until_ts: Optional[float] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Precompute the promotion deadline as an epoch so the per-order check
+        # is a float comparison. Naive timestamps are taken as UTC.
+        until = self.zero_fee_until
+        if until is not None and until.tzinfo is None:
+            until = until.replace(tzinfo=timezone.utc)
+        object.__setattr__(self, "zero_fee_until_ts", until.timestamp() if until else None)
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Return the process-wide settings, reading the environment on first use."""
+
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """Re-read the environment and replace the process-wide settings."""
+
+    global _settings
+    _settings = Settings()
+    logger.info("Settings reloaded")
+    return _settings
+
+
+def install_reload_signal(loop: asyncio.AbstractEventLoop) -> bool:
+    """Reload settings on ``SIGHUP``; return ``False`` where that is unsupported."""
+
+    try:
+        loop.add_signal_handler(signal.SIGHUP, reload_settings)
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+        # No SIGHUP on Windows; signal handlers only work in the main thread.
+        return False
+    return True
 
 
 def load_deny_countries(url: Optional[str] = None) -> List[str]:
@@ -59,8 +200,7 @@ def load_deny_countries(url: Optional[str] = None) -> List[str]:
     codes.  Invalid or unreachable URLs simply result in an empty list.
     """
 
-    settings = Settings()
-    source = url or settings.deny_countries_url
+    source = url or get_settings().deny_countries_url
     if not source:
         return []
     try:
@@ -68,6 +208,12 @@ def load_deny_countries(url: Optional[str] = None) -> List[str]:
             raw = fh.read().decode("utf-8")
     except Exception:
         return []
+    return parse_deny_countries(raw)
+
+
+def parse_deny_countries(raw: str) -> List[str]:
+    """Parse a JSON array or comma-separated list of ISO country codes."""
+
     try:
         data = json.loads(raw)
         if isinstance(data, list):
@@ -1,16 +1,17 @@
 """Database utilities for storing user and referral information.
 
-This module uses SQLAlchemy's asynchronous API to create a connection pool
-and provides basic models. Tests and the bot may choose to mock out the
+This module uses SQLAlchemy's asynchronous API to maintain one shared
+connection pool per database URL and provides basic models. Tests and the bot may choose to mock out the
 database layer if necessary. In production, a PostgreSQL database should be
 used; for unit tests, SQLite with aiosqlite is sufficient.
 """
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Dict, Iterable, Optional, Set
 
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, select
+from sqlalchemy import Column, Float, ForeignKey, Integer, String, insert, make_url, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -19,7 +20,8 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import declarative_base, relationship
 
-from .config import Settings
+from .cache import LRUCache
+from .config import Settings, get_settings
 
 
 Base = declarative_base()
@@ -49,8 +51,30 @@ class Trade(Base):
     user = relationship("User", back_populates="trades")
 
 
+_engines: Dict[str, AsyncEngine] = {}
+_sessionmakers: Dict[str, async_sessionmaker[AsyncSession]] = {}
+_schema_ready: Set[str] = set()
+_user_id_caches: Dict[str, LRUCache[int, int]] = {}
+
+
+def _engine_options(settings: Settings) -> Dict[str, Any]:
+    """Return pool options for ``settings.database_url``.
+
+    SQLite uses single-connection pools that reject sizing arguments, so only
+    pre-ping is applied there.
+    """
+    options: Dict[str, Any] = {"echo": False, "pool_pre_ping": settings.db_pool_pre_ping}
+    if make_url(settings.database_url).get_backend_name() != "sqlite":
+        options["pool_size"] = settings.db_pool_size
+        options["max_overflow"] = settings.db_max_overflow
+    return options
+
+
 def get_engine(settings: Optional[Settings] = None) -> AsyncEngine:
-    """Create an asynchronous SQLAlchemy engine.
+    """Return the process-wide asynchronous engine for the configured URL.
+
+    Engines are created on first use and cached by ``database_url`` so every
+    caller shares one connection pool.
 
     Parameters
     ----------
@@ -62,24 +86,124 @@ def get_engine(settings: Optional[Settings] = None) -> AsyncEngine:
     AsyncEngine
         SQLAlchemy engine configured for asynchronous use.
     """
-    s = settings or Settings()
-    return create_async_engine(s.database_url, echo=False, future=True)
+    s = settings or get_settings()
+    engine = _engines.get(s.database_url)
+    if engine is None:
+        engine = create_async_engine(s.database_url, **_engine_options(s))
+        _engines[s.database_url] = engine
+    return engine
 
 
 def get_sessionmaker(settings: Optional[Settings] = None) -> async_sessionmaker[AsyncSession]:
-    """Return an async session factory bound to the engine."""
+    """Return the shared async session factory bound to the cached engine."""
+
+    s = settings or get_settings()
+    factory = _sessionmakers.get(s.database_url)
+    if factory is None:
+        factory = async_sessionmaker(get_engine(s), expire_on_commit=False)
+        _sessionmakers[s.database_url] = factory
+    return factory
+
+
+async def init_db(settings: Optional[Settings] = None) -> None:
+    """Create missing tables once per database URL.
+
+    Entry points call this at startup; repeated calls are no-ops.
+    """
+
+    s = settings or get_settings()
+    if s.database_url in _schema_ready:
+        return
+    async with get_engine(s).begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    _schema_ready.add(s.database_url)
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection and reset the registry."""
+
+    engines = list(_engines.values())
+    _engines.clear()
+    _sessionmakers.clear()
+    _schema_ready.clear()
+    _user_id_caches.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+def get_user_id_cache(settings: Optional[Settings] = None) -> LRUCache[int, int]:
+    """Return the ``telegram_id -> users.id`` cache for the configured database."""
+
+    s = settings or get_settings()
+    cache = _user_id_caches.get(s.database_url)
+    if cache is None:
+        cache = LRUCache(s.user_cache_size, s.user_cache_ttl)
+        _user_id_caches[s.database_url] = cache
+    return cache
+
+
+async def warm_user_id_cache(settings: Optional[Settings] = None) -> int:
+    """Bulk-load existing users into the id cache and return how many were loaded."""
+
+    s = settings or get_settings()
+    cache = get_user_id_cache(s)
+    async with get_sessionmaker(s)() as session:
+        result = await session.execute(
+            select(User.telegram_id, User.id).order_by(User.id.desc()).limit(cache.maxsize)
+        )
+        rows = result.tuples().all()
+    # Oldest first so the most recent users end up most recently used.
+    cache.update(reversed(rows))
+    return len(rows)
+
+
+def _insert_users_ignoring_conflicts(dialect: str, telegram_ids: Iterable[int]) -> Any:
+    values = [{"telegram_id": t} for t in telegram_ids]
+    if dialect == "postgresql":
+        return postgresql.insert(User).values(values).on_conflict_do_nothing(index_elements=["telegram_id"])
+    if dialect == "sqlite":
+        return sqlite.insert(User).values(values).on_conflict_do_nothing(index_elements=["telegram_id"])
+    return insert(User).values(values)
+
+
+async def resolve_user_ids(
+    session: AsyncSession,
+    telegram_ids: Iterable[int],
+    cache: Optional[LRUCache[int, int]] = None,
+) -> Dict[int, int]:
+    """Return ``telegram_id -> users.id``, creating missing users.
+
+    Ids found in ``cache`` need no query. Missing users are inserted with an
+    upsert so concurrent first-time inserts for the same Telegram id do not
+    fail on the unique index. Only rows that were already committed are added
+    to the cache here; callers cache new ids after their own commit.
+    """
 
-    engine = get_engine(settings)
-    return async_sessionmaker(engine, expire_on_commit=False)
+    wanted = set(telegram_ids)
+    user_ids: Dict[int, int] = {}
+    if cache is not None:
+        for telegram_id in wanted:
+            user_id = cache.get(telegram_id)
+            if user_id is not None:
+                user_ids[telegram_id] = user_id
+    missing = wanted - user_ids.keys()
+    if not missing:
+        return user_ids
+    result = await session.execute(select(User.telegram_id, User.id).where(User.telegram_id.in_(missing)))
+    found = dict(result.tuples().all())
+    if cache is not None:
+        cache.update(found)
+    user_ids.update(found)
+    missing -= found.keys()
+    if missing:
+        await session.execute(_insert_users_ignoring_conflicts(session.bind.dialect.name, missing))
+        result = await session.execute(select(User.telegram_id, User.id).where(User.telegram_id.in_(missing)))
+        user_ids.update(result.tuples().all())
+    return user_ids
 
 
 async def get_or_create_user(session: AsyncSession, telegram_id: int) -> User:
     """Fetch a user by Telegram ID, creating one if missing."""
 
-    result = await session.execute(select(User).where(User.telegram_id == telegram_id))
-    user = result.scalar_one_or_none()
-    if user is None:
-        user = User(telegram_id=telegram_id)
-        session.add(user)
-        await session.flush()
-    return user
+    user_ids = await resolve_user_ids(session, [telegram_id])
+    return await session.get(User, user_ids[telegram_id])
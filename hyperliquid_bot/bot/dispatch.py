@@ -0,0 +1,215 @@
+"""Concurrent update processing with per-chat ordering.
+
+The dispatcher's own :meth:`feed_update` handles one update at a time. Run
+under :class:`UpdateEngine`, updates from different chats are handled in
+parallel by a bounded pool of asyncio workers, while each chat's updates wait
+in their own queue and run strictly one after another, so a confirm callback
+can never overtake the preview it answers. Workers serve chats round-robin,
+so one busy chat cannot starve the others.
+
+The engine is bounded: once ``max_pending`` updates are queued or running,
+:meth:`UpdateEngine.submit` waits for room, which pushes back on polling.
+Queue depth is exported as the ``dispatch_queue_depth`` and
+``dispatch_chats`` gauges. :class:`ConcurrentDispatcher` plugs the engine in
+beneath :func:`~.commands.setup_bot`; handlers are unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from aiogram import Dispatcher, types
+
+from ..api.metrics import set_dispatch_queue_depth
+
+logger = logging.getLogger(__name__)
+
+
+def chat_key(update: Any) -> Hashable:
+    """Return the id of the chat ``update`` belongs to (the sender's id when it has no chat)."""
+    message = update.message if isinstance(update, types.CallbackQuery) else update
+    chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+    return update.from_user.id
+
+
+def _consume(future: asyncio.Future) -> None:
+    # Failures are logged by the worker; nobody has to await the future.
+    if not future.cancelled():
+        future.exception()
+
+
+@dataclass
+class _Update:
+    """Update waiting in its chat's queue together with its result future."""
+
+    update: Any
+    future: asyncio.Future = field(repr=False)
+
+
+class UpdateEngine:
+    """Per-chat serial queues served by a bounded pool of workers.
+
+    Parameters
+    ----------
+    process: Callable[[Any], Awaitable[Any]]
+        Coroutine function handling one update, typically the dispatcher's
+        ``feed_update``.
+    workers: int
+        Updates handled at once.
+    max_pending: int
+        Updates that may be queued or running; further submissions wait.
+    key: Callable[[Any], Hashable]
+        Function returning the ordering key of an update.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Any], Awaitable[Any]],
+        *,
+        workers: int = 64,
+        max_pending: int = 1000,
+        key: Callable[[Any], Hashable] = chat_key,
+    ) -> None:
+        self.process = process
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.key = key
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._queues: Dict[Hashable, Deque[_Update]] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._space = asyncio.Semaphore(self.max_pending)
+        self._idle = asyncio.Event()
+        self._pending = 0
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        """Updates queued or being handled."""
+        return self._pending
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queues, self._pending = {}, 0
+            self._ready = asyncio.Queue()
+            self._space = asyncio.Semaphore(self.max_pending)
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    def _report(self) -> None:
+        set_dispatch_queue_depth(self._pending, len(self._queues))
+
+    async def submit(self, update: Any) -> asyncio.Future:
+        """Queue ``update`` behind earlier updates of its chat, waiting for room if the engine is full.
+
+        Returns a future resolving to the result of handling the update.
+        """
+        if self._closed:
+            raise RuntimeError("Dispatcher is shutting down")
+        self._ensure_running()
+        await self._space.acquire()
+        if self._closed:
+            # stop() began while this submission waited for room.
+            self._space.release()
+            raise RuntimeError("Dispatcher is shutting down")
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume)
+        key = self.key(update)
+        queue = self._queues.get(key)
+        if queue is None:
+            self._queues[key] = deque([_Update(update, future)])
+            self._ready.put_nowait(key)
+        else:
+            # The chat is queued or busy; its worker picks this up in order.
+            queue.append(_Update(update, future))
+        self._pending += 1
+        self._idle.clear()
+        self._report()
+        return future
+
+    async def feed(self, update: Any) -> Any:
+        """Handle ``update`` in order with its chat and return the result."""
+        return await asyncio.shield(await self.submit(update))
+
+    async def _work(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            item = queue.popleft()
+            try:
+                result = await self.process(item.update)
+            except asyncio.CancelledError:
+                item.future.cancel()
+                raise
+            except Exception as exc:
+                logger.exception("Update handling failed")
+                item.future.set_exception(exc)
+            else:
+                item.future.set_result(result)
+            if queue:
+                self._ready.put_nowait(key)
+            else:
+                del self._queues[key]
+            self._pending -= 1
+            self._space.release()
+            if not self._pending:
+                self._idle.set()
+            self._report()
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting updates, finish the queued ones and stop the workers.
+
+        Updates still queued after ``timeout`` seconds are cancelled.
+        """
+        self._closed = True
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Cancelling %d updates not handled within %.1f s", self._pending, timeout)
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for queue in self._queues.values():
+            for item in queue:
+                item.future.cancel()
+        self._queues.clear()
+        self._pending = 0
+        # Cancelled updates never hand back their slots, so wake one submitter
+        # still waiting for room; it sees _closed and passes the slot on.
+        self._space.release()
+        self._loop = None
+        self._report()
+
+
+class ConcurrentDispatcher(Dispatcher):
+    """Dispatcher whose updates are handled by an :class:`UpdateEngine`.
+
+    Parameters
+    ----------
+    workers: int
+        Updates handled at once.
+    max_pending: int
+        Updates that may be queued or running before :meth:`feed_update` waits.
+    """
+
+    def __init__(self, *, workers: int = 64, max_pending: int = 1000) -> None:
+        super().__init__()
+        self.engine = UpdateEngine(super().feed_update, workers=workers, max_pending=max_pending)
+
+    async def feed_update(self, update: Any) -> Dict[str, Any]:
+        return await self.engine.feed(update)
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Finish the queued updates (cancelling those left after ``timeout``) and stop the workers."""
+        await self.engine.stop(timeout)
@@ -0,0 +1,163 @@
+"""Geofence deny-list service.
+
+:class:`GeofenceService` loads the deny-list from ``DENY_COUNTRIES_URL`` once
+and keeps it as an immutable :class:`frozenset`, so lookups from handlers are
+plain set membership tests without locks or I/O. A background task refreshes
+the list every ``DENY_COUNTRIES_REFRESH_SECONDS``:
+
+* ``http(s)://`` sources are polled with conditional requests
+  (``If-None-Match``/``If-Modified-Since``) so unchanged lists cost a 304;
+* ``file://`` URLs and plain paths are only re-read when their mtime changes.
+
+Fetches run in a worker thread to keep the event loop free. When a refresh
+fails the last successfully loaded list keeps being served.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Dict, FrozenSet, Optional
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+from urllib.request import Request, url2pathname, urlopen
+
+from .config import Settings, get_settings, parse_deny_countries
+
+logger = logging.getLogger(__name__)
+
+
+class GeofenceService:
+    """Cached, periodically refreshed set of denied ISO country codes.
+
+    Parameters
+    ----------
+    source: str
+        URL or filesystem path of a JSON/CSV deny-list. Empty disables
+        geofencing.
+    refresh_interval: float
+        Seconds between background refreshes; ``0`` disables them.
+    timeout: float
+        Timeout in seconds for HTTP fetches.
+    """
+
+    def __init__(self, source: str, refresh_interval: float = 300.0, timeout: float = 5.0) -> None:
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.countries: FrozenSet[str] = frozenset()
+        self.loaded = False
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._mtime: Optional[int] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_denied(self, country: Optional[str]) -> bool:
+        """Return ``True`` if ``country`` is on the deny-list."""
+        return bool(country) and country.upper() in self.countries
+
+    def _fetch(self) -> Optional[str]:
+        """Return the raw deny-list, or ``None`` if it has not changed."""
+        parsed = urlparse(self.source)
+        if parsed.scheme in ("", "file"):
+            path = url2pathname(parsed.path) if parsed.scheme else self.source
+            mtime = os.stat(path).st_mtime_ns
+            if mtime == self._mtime:
+                return None
+            with open(path, encoding="utf-8") as fh:
+                raw = fh.read()
+            self._mtime = mtime
+            return raw
+        request = Request(self.source)
+        if self._etag:
+            request.add_header("If-None-Match", self._etag)
+        if self._last_modified:
+            request.add_header("If-Modified-Since", self._last_modified)
+        try:
+            with urlopen(request, timeout=self.timeout) as fh:  # nosec - configured URL
+                raw = fh.read().decode("utf-8")
+                self._etag = fh.headers.get("ETag")
+                self._last_modified = fh.headers.get("Last-Modified")
+        except HTTPError as exc:
+            if exc.code == 304:
+                return None
+            raise
+        return raw
+
+    async def refresh(self) -> bool:
+        """Reload the deny-list if it changed; return ``True`` when it was replaced.
+
+        Concurrent callers share one in-flight fetch.
+        """
+        if not self.source:
+            self.loaded = True
+            return False
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> bool:
+        try:
+            raw = await asyncio.to_thread(self._fetch)
+        except Exception as exc:
+            logger.warning(
+                "Deny-list refresh from %s failed: %s; keeping %d cached codes",
+                self.source, exc, len(self.countries),
+            )
+            return False
+        finally:
+            self.loaded = True
+        if raw is None:
+            return False
+        self.countries = frozenset(parse_deny_countries(raw))
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    def start(self) -> None:
+        """Start periodic background refreshes on the running event loop."""
+        if self.refresh_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background refresh task."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+_services: Dict[str, GeofenceService] = {}
+
+
+async def get_geofence(settings: Optional[Settings] = None) -> GeofenceService:
+    """Return the shared geofence service for the configured deny-list.
+
+    The list is fetched on first use; afterwards this is a dictionary lookup.
+    """
+
+    s = settings or get_settings()
+    service = _services.get(s.deny_countries_url)
+    if service is None:
+        service = GeofenceService(s.deny_countries_url, s.deny_countries_refresh_seconds)
+        _services[s.deny_countries_url] = service
+    if not service.loaded:
+        await service.refresh()
+    return service
+
+
+async def stop_geofences() -> None:
+    """Stop background refreshes of every geofence service."""
+
+    services = list(_services.values())
+    _services.clear()
+    for service in services:
+        await service.stop()
@@ -0,0 +1,199 @@
+"""IP address to country resolution for geofencing.
+
+:class:`CountryResolver` puts a bounded LRU/TTL cache in front of one of two
+backends:
+
+* :class:`HttpCountryBackend` queries an ipapi-style JSON endpoint through a
+  pooled :class:`httpx.AsyncClient` with a request timeout;
+* :class:`LocalCountryBackend` answers offline from a CSV table of IP ranges
+  (``start,end,country``), binary-searching sorted integer range starts.
+
+Select the backend with ``GEOIP_BACKEND`` (``http`` or ``local``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import ipaddress
+import logging
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Protocol, Tuple
+
+import httpx
+
+from .cache import LRUCache
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CountryBackend(Protocol):
+    """Interface shared by the country lookup backends."""
+
+    async def lookup(self, ip: str) -> str:
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+def _ip_key(value: str) -> Tuple[int, int]:
+    """Return ``(version, integer)`` for an IP address or integer string."""
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return (4 if number < 2**32 else 6), number
+    address = ipaddress.ip_address(value)
+    return address.version, int(address)
+
+
+class LocalCountryBackend:
+    """Offline lookups over sorted, non-overlapping IP ranges.
+
+    Parameters
+    ----------
+    ranges: Iterable[Tuple[str, str, str]]
+        ``(start, end, country)`` rows; ``start``/``end`` are inclusive and may
+        be IP strings or integers.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[str, str, str]]) -> None:
+        rows: Dict[int, List[Tuple[int, int, str]]] = {4: [], 6: []}
+        for start, end, country in ranges:
+            version, lo = _ip_key(start)
+            _, hi = _ip_key(end)
+            rows[version].append((lo, hi, country.strip().upper()))
+        self._starts: Dict[int, List[int]] = {}
+        self._ends: Dict[int, List[int]] = {}
+        self._countries: Dict[int, List[str]] = {}
+        for version, table in rows.items():
+            table.sort()
+            self._starts[version] = [r[0] for r in table]
+            self._ends[version] = [r[1] for r in table]
+            self._countries[version] = [r[2] for r in table]
+
+    @classmethod
+    def from_csv(cls, path: str) -> "LocalCountryBackend":
+        """Load ranges from a ``start,end,country`` CSV file; ``#`` lines are skipped."""
+        with open(path, newline="", encoding="utf-8") as fh:
+            rows = [r for r in csv.reader(fh) if len(r) >= 3 and not r[0].startswith("#")]
+        return cls((r[0], r[1], r[2]) for r in rows)
+
+    def lookup_sync(self, ip: str) -> str:
+        """Return the country for ``ip`` or ``""`` when it is not covered."""
+        version, number = _ip_key(ip)
+        starts = self._starts[version]
+        i = bisect_right(starts, number) - 1
+        if i >= 0 and number <= self._ends[version][i]:
+            return self._countries[version][i]
+        return ""
+
+    async def lookup(self, ip: str) -> str:
+        return self.lookup_sync(ip)
+
+    async def aclose(self) -> None:
+        return None
+
+
+class HttpCountryBackend:
+    """Country lookups against an ipapi-style HTTP endpoint.
+
+    Parameters
+    ----------
+    url_template: str
+        URL containing ``{ip}``; the JSON response must include ``country``.
+    timeout: float
+        Per-request timeout in seconds.
+    transport: Optional[httpx.AsyncBaseTransport]
+        Custom transport, used by tests.
+    """
+
+    def __init__(
+        self,
+        url_template: str,
+        timeout: float = 2.0,
+        *,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.url_template = url_template
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the loop that opened them.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(timeout=self.timeout, transport=self._transport)
+        return self._client
+
+    async def lookup(self, ip: str) -> str:
+        response = await self._get_client().get(self.url_template.format(ip=ip))
+        response.raise_for_status()
+        return str(response.json().get("country") or "").upper()
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+class CountryResolver:
+    """Cached IP-to-country resolution over a pluggable backend."""
+
+    def __init__(self, backend: CountryBackend, maxsize: int = 10_000, ttl: Optional[float] = 3600) -> None:
+        self.backend = backend
+        self.cache: LRUCache[str, str] = LRUCache(maxsize, ttl)
+
+    async def resolve(self, ip: Optional[str]) -> str:
+        """Return the ISO country code for ``ip``, or ``""`` if unknown.
+
+        ``ip`` may be an ``X-Forwarded-For`` list; the first address is used.
+        Backend failures are logged and not cached.
+        """
+        if not ip:
+            return ""
+        ip = ip.split(",", 1)[0].strip()
+        country = self.cache.get(ip)
+        if country is not None:
+            return country
+        try:
+            country = await self.backend.lookup(ip)
+        except Exception as exc:
+            logger.warning("Country lookup for %s failed: %s", ip, exc)
+            return ""
+        self.cache.put(ip, country)
+        return country
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
+
+
+_resolver: Optional[CountryResolver] = None
+
+
+def get_country_resolver(settings: Optional[Settings] = None) -> CountryResolver:
+    """Return the process-wide resolver configured from settings."""
+
+    global _resolver
+    if _resolver is None:
+        s = settings or get_settings()
+        backend: CountryBackend
+        if s.geoip_backend == "local":
+            backend = LocalCountryBackend.from_csv(s.geoip_db_path)
+        else:
+            backend = HttpCountryBackend(s.geoip_url, s.geoip_timeout)
+        _resolver = CountryResolver(backend, s.geoip_cache_size, s.geoip_cache_ttl)
+    return _resolver
+
+
+async def close_country_resolver() -> None:
+    """Close the process-wide resolver's connections."""
+
+    global _resolver
+    resolver, _resolver = _resolver, None
+    if resolver is not None:
+        await resolver.aclose()
@@ -20,9 +20,8 @@ from dataclasses import dataclass
 from typing import Any, Deque, Dict, Optional
 from collections import deque
 import time
-from datetime import datetime, timezone
 
-from .config import Settings
+from .config import Settings, get_settings
 
 
 @dataclass
@@ -142,16 +141,16 @@ def build_order_json(
     builder_fee: Optional[int]
         Fee override in tenths of basis points.
     settings: Optional[Settings]
-        Settings instance. If omitted, loaded automatically.
+        Settings instance. If omitted, the process-wide settings are used.
 
     Returns
     -------
     Dict[str, Any]
         Payload dictionary for the exchange.
     """
-    s = settings or Settings()
+    s = settings or get_settings()
     fee = builder_fee if builder_fee is not None else s.builder_fee_tenth_bps
-    if s.zero_fee_until and datetime.now(timezone.utc) < s.zero_fee_until:
+    if s.zero_fee_until_ts is not None and time.time() < s.zero_fee_until_ts:
         fee = 0
     leverage = leverage if leverage is not None else 10
     order = Order(
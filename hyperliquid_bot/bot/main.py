@@ -9,20 +9,46 @@ from __future__ import annotations
 import asyncio
 import logging
 
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 
-from .config import Settings
+from ..api.metrics import start_metrics_publisher, stop_metrics_publisher
+from .config import get_settings, install_reload_signal
 from .commands import setup_bot
+from .db import dispose_engines, init_db, warm_user_id_cache
+from .dispatch import ConcurrentDispatcher
+from .geofence import get_geofence, stop_geofences
+from .middleware import ExecutionTimeMiddleware
+from .trade_writer import stop_trade_writers
+from .tracing import close_trace_exporter
+from .voice import stop_voice_pipeline
 
 
 async def main() -> None:
     logging.basicConfig(level=logging.INFO)
-    settings = Settings()
+    settings = get_settings()
+    install_reload_signal(asyncio.get_running_loop())
     bot = Bot(token=settings.telegram_bot_token)
-    dispatcher = Dispatcher()
+    dispatcher = ConcurrentDispatcher(workers=settings.dispatch_workers, max_pending=settings.dispatch_queue_size)
+    await init_db(settings)
+    await warm_user_id_cache(settings)
+    (await get_geofence(settings)).start()
+    start_metrics_publisher(settings)
     await setup_bot(bot, dispatcher)
+    # Times every handler and starts the traces their stage spans join.
+    timing = ExecutionTimeMiddleware()
+    dispatcher.message.middleware(timing)
+    dispatcher.callback_query.middleware(timing)
     # Start polling
-    await dispatcher.start_polling(bot)
+    try:
+        await dispatcher.start_polling(bot)
+    finally:
+        await dispatcher.drain(settings.dispatch_drain_timeout)
+        await stop_trade_writers()
+        await stop_voice_pipeline()
+        await stop_metrics_publisher()
+        close_trace_exporter()
+        await stop_geofences()
+        await dispose_engines()
 
 
 if __name__ == "__main__":
@@ -2,8 +2,10 @@
 
 This module currently provides :class:`ExecutionTimeMiddleware` which measures
 how long a handler takes to run. The timing is stored in the context ``data``
-for further inspection and logged using the standard :mod:`logging` module.
-The implementation is intentionally lightweight for the test environment.
+for further inspection, logged using the standard :mod:`logging` module and
+recorded in the per-handler ``latency_ms`` histogram. :func:`~.main.main`
+registers it for both messages and callback queries, so every handler runs
+inside a trace. The implementation is intentionally lightweight for the test environment.
 """
 
 from __future__ import annotations
@@ -14,17 +16,36 @@ from typing import Any, Awaitable, Callable, Dict
 
 
 from ..api.metrics import observe_latency
+from .tracing import trace
 
 logger = logging.getLogger(__name__)
 
 
+def handler_name(handler: Callable[..., Any], event: Any, data: Dict[str, Any]) -> str:
+    """Return the label identifying the handler that serves ``event``.
+
+    Uses aiogram's resolved ``data["handler"]`` when present, otherwise the
+    command of a ``/command`` message (without a ``@bot`` suffix), otherwise
+    the name of ``handler``.
+    """
+    callback = getattr(data.get("handler"), "callback", None)
+    if callback is not None:
+        return getattr(callback, "__name__", "unknown")
+    text = getattr(event, "text", None)
+    if text and text[0] == "/":
+        return text.split(maxsplit=1)[0][1:].partition("@")[0]
+    return getattr(handler, "__name__", type(event).__name__)
+
+
 class ExecutionTimeMiddleware:
     """Measure and log execution time of handlers.
 
     The middleware follows the aiogram v3 protocol where middleware instances
     are callable with ``handler``, ``event`` and a mutable ``data`` mapping. The
-    elapsed time in seconds is stored under ``execution_time`` in ``data`` and
-    logged at INFO level.
+    elapsed time in seconds is stored under ``execution_time`` in ``data``,
+    logged at INFO level and observed under the handler's label (see
+    :func:`handler_name`). The handler runs inside a :func:`~.tracing.trace`
+    so its stage spans can be sampled.
     """
 
     async def __call__(
@@ -33,10 +54,12 @@ class ExecutionTimeMiddleware:
         event: Any,
         data: Dict[str, Any],
     ) -> Any:
+        name = handler_name(handler, event, data)
         start = time.perf_counter()
-        result = await handler(event, data)
+        with trace(name):
+            result = await handler(event, data)
         duration = time.perf_counter() - start
         data["execution_time"] = duration
         logger.info("%s handled in %.4f seconds", getattr(handler, "__name__", str(handler)), duration)
-        observe_latency(duration * 1000)
+        observe_latency(duration * 1000, name)
         return result
@@ -2,117 +2,573 @@
 
 This module parses free-form trading instructions into structured order
 payloads. It uses a very small heuristic parser for unit tests but exposes
-interfaces that could call GPT models in production. A ``BudgetGuard``
-monitors estimated token spend and falls back to a lightweight parser when
-the monthly budget is exceeded.
+interfaces that could call GPT models in production. The heuristic parser
+runs first and scores its own result; only phrases it is unsure about are
+escalated to the model. A ``BudgetGuard`` (see :mod:`.budget`) monitors token
+spend and falls back to the heuristic parse when the monthly budget is
+exceeded. A :class:`ParseCache` memoises parses of
+repeated phrases so they skip both the model and the budget charge, and
+:func:`aparse_order` sends phrases arriving together to the model as one
+batched request through :class:`ParseBatcher`.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import json
 import logging
-import os
 import re
-from typing import Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Protocol, Sequence, Set, Tuple, Union
 
+from ..api.metrics import inc_parse_cache, observe_nl_parse
+from .budget import BudgetGuard, RedisError, get_budget_guard
+from .cache import LRUCache
+from .config import Settings, get_settings
 from .hyperliquid import build_order_json
+from .symbols import SymbolIndex, get_symbol_index
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever parsing rules change so cached parses are not reused.
+PARSER_VERSION = "2"
 
-@dataclass
-class BudgetGuard:
-    """Simple token budget tracker.
+ParsedOrder = tuple[str, str, float, Optional[float], Optional[int]]
 
-    Attributes
-    ----------
-    monthly_budget: float
-        Maximum spend allowed for the current month.
-    spent: float
-        Accumulated spend for the current month.
-    """
+try:  # pragma: no cover - optional dependency
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
 
-    monthly_budget: float = float(os.getenv("TOKEN_BUDGET_MONTHLY", 200))
-    spent: float = 0.0
 
-    def can_spend(self, cost: float) -> bool:
-        """Return ``True`` if ``cost`` may be spent, else log fallback."""
-        if self.spent + cost > self.monthly_budget:
-            logger.warning("Budget exceeded; using fallback parser")
-            return False
-        self.spent += cost
-        return True
+# ``@`` is a token on its own even when glued to a number ("@30000").
+_LEXER = re.compile(r"@|[^\s@]+")
+_CLASSIFY = re.compile(r"(?P<number>\d+(?:\.\d+)?)|(?P<leverage>\d+)x|(?P<word>[a-z]+(?:-perp)?)")
 
+_SELL, _BUY, _AT, _NOISE = "sell", "buy", "at", "noise"
+_KEYWORDS = {
+    "sell": _SELL,
+    "short": _SELL,
+    "buy": _BUY,
+    "long": _BUY,
+    "@": _AT,
+    "at": _AT,
+    "with": _NOISE,
+    "market": _NOISE,
+    "leverage": _NOISE,
+}
 
-def _heuristic_parse(text: str) -> tuple[str, str, float, Optional[float], Optional[int]]:
-    """Parse order parameters using simple heuristics.
 
-    Returns ``(symbol, side, size, price, leverage)``.
+# Confidence lost for each doubt about a heuristic parse. Missing required
+# fields cost everything; unknown words cost up to ``_UNKNOWN_WORDS_WEIGHT``
+# in proportion to their share of the tokens.
+_PENALTIES = {
+    "missing_symbol": 1.0,
+    "missing_size": 1.0,
+    "unlisted_symbol": 0.5,
+    "conflicting_sides": 0.5,
+    "multiple_symbols": 0.5,
+    "no_side": 0.3,
+    "ambiguous_price": 0.3,
+    "extra_numbers": 0.3,
+    "repeated_leverage": 0.2,
+}
+_UNKNOWN_WORDS_WEIGHT = 0.5
+
+
+class HeuristicParse(NamedTuple):
+    """Result of :func:`_score_heuristic`: the parse (if any) and how much to trust it."""
+
+    parsed: Optional[ParsedOrder]
+    confidence: float
+    reasons: Tuple[str, ...]
+
+    def escalation(self, threshold: float) -> Tuple[str, ...]:
+        """Return why the model should parse the phrase instead; empty if it need not."""
+        if self.parsed is not None and self.confidence >= threshold:
+            return ()
+        return self.reasons or ("low_confidence",)
+
+
+def _score_heuristic(text: str, symbols: Optional[SymbolIndex] = None) -> HeuristicParse:
+    """Parse order parameters using simple heuristics and score the result.
+
+    The lowercased text is scanned once; each token is labelled as a keyword
+    (side, ``@``/``at``, filler) or, via a single precompiled pattern, as a
+    number, ``Nx`` leverage or word. A price directly after ``@``/``at`` wins
+    over a second bare number. The symbol is the first word found in the
+    symbol index (``symbols`` or the configured one), so filler words such as
+    "please" are skipped; only an empty index falls back to the first word.
+
+    The same scan collects doubts about the parse (see :data:`_PENALTIES`):
+    no or conflicting side keywords, several symbols, a price given without
+    ``@``/``at``, surplus numbers or leverages and unrecognised words. The
+    confidence starts at ``1.0`` and drops by the penalty of each doubt.
     """
-    original = text
-    text = text.replace("@", " @ ")
-    tokens = text.lower().split()
+    index = symbols if symbols is not None else get_symbol_index()
     side = "buy"
-    if "sell" in tokens or "short" in tokens:
-        side = "sell"
-    if "long" in tokens or "buy" in tokens:
-        side = "buy" if "sell" not in tokens and "short" not in tokens else "sell"
-
+    sides = set()
     symbol = None
+    first_word = None
     size: Optional[float] = None
     price: Optional[float] = None
+    at_price: Optional[float] = None
     leverage: Optional[int] = None
+    after_at = False
+    reasons: List[str] = []
+    tokens = unknown = numbers = leverages = 0
+    size_is_price = False
 
-    exclude = {"with", "at", "market", "leverage", "long", "short", "buy", "sell"}
-    for tok in tokens:
-        if re.fullmatch(r"[a-z]+(?:-perp)?", tok) and tok not in exclude:
-            symbol = tok.upper()
-            break
-    for tok in tokens:
-        if re.fullmatch(r"\d+(?:\.\d+)?", tok):
+    for match in _LEXER.finditer(text.lower()):
+        tok = match.group()
+        tokens += 1
+        kind = _KEYWORDS.get(tok)
+        expect_price, after_at = after_at, kind is _AT
+        if kind is not None:
+            if kind is _SELL:
+                side = "sell"
+                sides.add(_SELL)
+            elif kind is _BUY:
+                sides.add(_BUY)
+            continue
+        m = _CLASSIFY.fullmatch(tok)
+        if m is None:
+            unknown += 1
+            continue
+        label = m.lastgroup
+        if label == "number":
+            value = float(tok)
+            numbers += 1
+            if expect_price:
+                at_price = value
             if size is None:
-                size = float(tok)
+                size = value
+                size_is_price = expect_price
             elif price is None:
-                price = float(tok)
-    for i, tok in enumerate(tokens):
-        if tok in {"@", "at"} and i + 1 < len(tokens):
-            nxt = tokens[i + 1]
-            if nxt != "market" and re.fullmatch(r"\d+(?:\.\d+)?", nxt):
-                price = float(nxt)
-    for tok in tokens:
-        m = re.fullmatch(r"(\d+)x", tok)
-        if m:
-            leverage = int(m.group(1))
-    if symbol is None or size is None:
-        raise ValueError(f"Could not parse order from '{original}'")
-    return symbol, side, size, price, leverage
-
-
-def parse_order(text: str, *, budget: Optional[BudgetGuard] = None) -> dict:
+                price = value
+        elif label == "leverage":
+            leverage = int(m.group("leverage"))
+            leverages += 1
+        else:
+            resolved = index.resolve(tok)
+            if resolved is None:
+                unknown += 1
+            elif symbol is None:
+                symbol = resolved
+            elif resolved != symbol and "multiple_symbols" not in reasons:
+                reasons.append("multiple_symbols")
+            if first_word is None:
+                first_word = tok
+
+    if symbol is None and first_word is not None and not index:
+        symbol = first_word.upper()
+        unknown -= 1
+        reasons.append("unlisted_symbol")
+    if symbol is None:
+        reasons.append("missing_symbol")
+    if size is None:
+        reasons.append("missing_size")
+    if not sides:
+        reasons.append("no_side")
+    elif len(sides) > 1:
+        reasons.append("conflicting_sides")
+    if size_is_price or (price is not None and at_price is None):
+        reasons.append("ambiguous_price")
+    if numbers > 2:
+        reasons.append("extra_numbers")
+    if leverages > 1:
+        reasons.append("repeated_leverage")
+    confidence = 1.0 - sum(_PENALTIES[r] for r in reasons)
+    if unknown:
+        reasons.append("unknown_words")
+        confidence -= _UNKNOWN_WORDS_WEIGHT * unknown / tokens
+    parsed: Optional[ParsedOrder] = None
+    if symbol is not None and size is not None:
+        parsed = (symbol, side, size, at_price if at_price is not None else price, leverage)
+    return HeuristicParse(parsed, max(confidence, 0.0), tuple(reasons))
+
+
+def _unwrap(result: HeuristicParse, text: str) -> ParsedOrder:
+    if result.parsed is None:
+        raise ValueError(f"Could not parse order from '{text}'")
+    return result.parsed
+
+
+def _heuristic_parse(text: str, symbols: Optional[SymbolIndex] = None) -> ParsedOrder:
+    """Parse order parameters using simple heuristics (see :func:`_score_heuristic`).
+
+    Returns ``(symbol, side, size, price, leverage)``.
+    """
+    return _unwrap(_score_heuristic(text, symbols), text)
+
+
+def normalise_phrase(text: str) -> str:
+    """Return the cache key form of ``text``: lowercased with collapsed whitespace."""
+    return " ".join(text.lower().split())
+
+
+class ParseCache:
+    """Memoised ``normalised phrase -> parsed order`` lookups.
+
+    Entries live in a bounded in-process LRU and, when ``client`` (a
+    synchronous Redis client) is given, in Redis so replicas share them. Keys
+    embed :data:`PARSER_VERSION` and the symbol universe version, so changing
+    either invalidates every earlier parse. The async :meth:`aget` and
+    :meth:`aput` run the Redis round-trips in a worker thread so the event
+    loop never waits on the network. Redis errors are logged and the cache
+    carries on with the local tier alone.
+    """
+
+    prefix = "nl_parse:"
+
+    def __init__(self, maxsize: int = 10_000, ttl: Optional[float] = None, client: Any = None) -> None:
+        self.local: LRUCache[str, ParsedOrder] = LRUCache(maxsize, ttl)
+        self.ttl = ttl or None
+        self.client = client
+        self._namespace = ""
+
+    def _key(self, text: str, universe: str) -> str:
+        namespace = f"{PARSER_VERSION}:{universe}"
+        if namespace != self._namespace:
+            self.local.clear()
+            self._namespace = namespace
+        return f"{namespace}:{normalise_phrase(text)}"
+
+    def _remote_get(self, key: str) -> Optional[ParsedOrder]:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except RedisError as exc:
+            logger.warning("Parse cache lookup in Redis failed; using the local cache: %s", exc)
+            return None
+        if raw is None:
+            return None
+        parsed = tuple(json.loads(raw))
+        self.local.put(key, parsed)  # type: ignore[arg-type]
+        return parsed  # type: ignore[return-value]
+
+    def _remote_put(self, key: str, parsed: ParsedOrder) -> None:
+        try:
+            self.client.set(self.prefix + key, json.dumps(parsed), ex=int(self.ttl) if self.ttl else None)
+        except RedisError as exc:
+            logger.warning("Parse cache write to Redis failed; kept locally only: %s", exc)
+
+    def get(self, text: str, universe: str) -> Optional[ParsedOrder]:
+        """Return the cached parse of ``text`` or ``None``."""
+        key = self._key(text, universe)
+        parsed = self.local.get(key)
+        if parsed is None and self.client is not None:
+            parsed = self._remote_get(key)
+        inc_parse_cache(parsed is not None)
+        return parsed
+
+    def put(self, text: str, universe: str, parsed: ParsedOrder) -> None:
+        """Store the parse of ``text``."""
+        key = self._key(text, universe)
+        self.local.put(key, parsed)
+        if self.client is not None:
+            self._remote_put(key, parsed)
+
+    async def aget(self, text: str, universe: str) -> Optional[ParsedOrder]:
+        """Asynchronous :meth:`get`; a Redis lookup runs in a worker thread."""
+        key = self._key(text, universe)
+        parsed = self.local.get(key)
+        if parsed is None and self.client is not None:
+            parsed = await asyncio.to_thread(self._remote_get, key)
+        inc_parse_cache(parsed is not None)
+        return parsed
+
+    async def aput(self, text: str, universe: str, parsed: ParsedOrder) -> None:
+        """Asynchronous :meth:`put`; the Redis write runs in a worker thread."""
+        key = self._key(text, universe)
+        self.local.put(key, parsed)
+        if self.client is not None:
+            await asyncio.to_thread(self._remote_put, key, parsed)
+
+
+_parse_cache: Optional[ParseCache] = None
+
+
+def get_parse_cache(settings: Optional[Settings] = None) -> ParseCache:
+    """Return the process-wide parse cache."""
+
+    global _parse_cache
+    if _parse_cache is None:
+        s = settings or get_settings()
+        client = None
+        if s.parse_cache_backend == "redis":
+            if redis is None:
+                raise RuntimeError("PARSE_CACHE_BACKEND=redis requires the 'redis' package")
+            client = redis.Redis.from_url(s.redis_url)
+        _parse_cache = ParseCache(s.parse_cache_size, s.parse_cache_ttl, client)
+    return _parse_cache
+
+
+def _model_parse(text: str, symbols: SymbolIndex) -> tuple[ParsedOrder, float]:
+    """Parse ``text`` with the model and return the parse and its actual cost.
+
+    Placeholder for the GPT call; the heuristic parser stands in and the cost
+    is the prompt's token count.
+    """
+    logger.debug("Parsing with GPT stub")
+    return _heuristic_parse(text, symbols), float(len(text.split()))
+
+
+def _speculate(text: str, symbols: SymbolIndex, settings: Optional[Settings]) -> tuple[HeuristicParse, Tuple[str, ...]]:
+    """Run the heuristic parser and decide whether the model must take over."""
+    candidate = _score_heuristic(text, symbols)
+    reasons = candidate.escalation((settings or get_settings()).nl_escalation_threshold)
+    observe_nl_parse(reasons)
+    if reasons:
+        logger.debug("Escalating %r to the model (confidence %.2f): %s", text, candidate.confidence, ", ".join(reasons))
+    return candidate, reasons
+
+
+def parse_order(
+    text: str, *, budget: Optional[BudgetGuard] = None, settings: Optional[Settings] = None
+) -> dict:
     """Parse ``text`` into an order JSON payload.
 
-    In a real deployment this would call the OpenAI API. For the test suite we
-    use the heuristic parser above. ``BudgetGuard`` determines whether the
-    model may be called; when the budget is exceeded the same heuristic parser
-    acts as a lightweight fallback.
+    The heuristic parser answers on its own when its confidence reaches
+    ``NL_ESCALATION_THRESHOLD``. Otherwise the phrase is escalated to the
+    model, which in a real deployment would call the OpenAI API; for the test
+    suite the heuristic parser stands in. ``BudgetGuard`` determines whether
+    the model may be called; when the budget is exceeded the heuristic parse
+    is used anyway. Without ``budget`` the process-wide guard is charged.
+    Model calls reserve their estimated cost up front and reconcile it with
+    the reported usage. Phrases found in the parse cache are neither parsed
+    again nor charged to the budget; fallback parses are not cached.
     """
-    budget = budget or BudgetGuard()
-    # Estimate cost by token count (very rough)
-    estimated_cost = len(text.split())
-    if budget.can_spend(estimated_cost):
-        # Placeholder for GPT call; use heuristic for the tests
-        logger.debug("Parsing with GPT stub")
-        symbol, side, size, price, leverage = _heuristic_parse(text)
-    else:
-        logger.debug("Using logistic regression fallback parser")
-        symbol, side, size, price, leverage = _heuristic_parse(text)
-    payload = build_order_json(symbol, side, size, price=price, leverage=leverage)
+    with span("parse"):
+        parsed = _parse(text, budget, settings)
+    symbol, side, size, price, leverage = parsed
+    with span("build_payload"):
+        payload = build_order_json(symbol, side, size, price=price, leverage=leverage, settings=settings)
     return payload
 
 
-def order_preview(text: str, *, budget: Optional[BudgetGuard] = None) -> tuple[str, dict]:
+def _parse(text: str, budget: Optional[BudgetGuard], settings: Optional[Settings]) -> ParsedOrder:
+    symbols = get_symbol_index(settings)
+    cache = get_parse_cache(settings)
+    parsed = cache.get(text, symbols.version)
+    if parsed is None:
+        candidate, reasons = _speculate(text, symbols, settings)
+        if not reasons:
+            parsed = _unwrap(candidate, text)
+        else:
+            budget = budget or get_budget_guard(settings)
+            # Estimate cost by token count (very rough)
+            reservation = budget.reserve(len(text.split()))
+            if reservation is not None:
+                try:
+                    parsed, actual_cost = _model_parse(text, symbols)
+                except Exception:
+                    budget.reconcile(reservation, 0)
+                    raise
+                budget.reconcile(reservation, actual_cost)
+            else:
+                logger.debug("Using logistic regression fallback parser")
+                # Not cached, so the model gets the phrase once budget is available again.
+                return _unwrap(candidate, text)
+        cache.put(text, symbols.version, parsed)
+    return parsed
+
+
+ModelResult = Union[Tuple[ParsedOrder, float], Exception]
+
+
+class ParserBackend(Protocol):
+    """Model backend able to parse several phrases in one request."""
+
+    async def parse_batch(self, texts: Sequence[str]) -> List[ModelResult]:
+        """Return ``(parsed, cost)`` or an exception for each text, in order."""
+        ...
+
+
+class HeuristicBackend:
+    """Local stand-in for the model backend built on :func:`_heuristic_parse`."""
+
+    def __init__(self, symbols: Optional[SymbolIndex] = None) -> None:
+        self.symbols = symbols
+
+    async def parse_batch(self, texts: Sequence[str]) -> List[ModelResult]:
+        symbols = self.symbols if self.symbols is not None else get_symbol_index()
+        results: List[ModelResult] = []
+        for text in texts:
+            try:
+                results.append(_model_parse(text, symbols))
+            except ValueError as exc:
+                results.append(exc)
+        return results
+
+
+class ParseBatcher:
+    """Collect phrases for a few milliseconds and parse them in one model call.
+
+    Identical phrases (after normalisation) that are already waiting or in
+    flight share one slot and one budget reservation. A batch is sent when it
+    reaches ``max_batch`` phrases or ``max_wait`` seconds after its first
+    phrase. If the backend does not answer within ``timeout`` seconds, fails
+    as a whole or returns the wrong number of results, every phrase of the
+    batch falls back to :func:`_heuristic_parse`. Whatever happens to a
+    batch, each of its callers gets a result or an exception. Results say
+    whether the model answered, so callers can avoid caching fallbacks.
+    """
+
+    def __init__(
+        self,
+        backend: ParserBackend,
+        *,
+        max_batch: int = 16,
+        max_wait: float = 0.005,
+        timeout: float = 2.0,
+    ) -> None:
+        self.backend = backend
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, str, BudgetGuard, Any, asyncio.Future]] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def parse(self, text: str, budget: BudgetGuard, symbols: SymbolIndex) -> Tuple[ParsedOrder, bool]:
+        """Return the parse of ``text`` and whether the model produced it.
+
+        ``budget`` is charged if the model is used.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._pending, self._inflight, self._timer, self._tasks = loop, [], {}, None, set()
+        key = normalise_phrase(text)
+        future = self._inflight.get(key)
+        if future is None:
+            reservation = await budget.areserve(len(text.split()))
+            if reservation is None:
+                logger.debug("Using logistic regression fallback parser")
+                return _heuristic_parse(text, symbols), False
+            future = self._inflight.get(key)
+            if future is not None:
+                # The same phrase was queued while the reservation was made.
+                await budget.areconcile(reservation, 0)
+                return await asyncio.shield(future)
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._pending.append((key, text, budget, reservation, future))
+            if len(self._pending) >= self.max_batch:
+                self._flush_now(symbols)
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush_now, symbols)
+        return await asyncio.shield(future)
+
+    def _flush_now(self, symbols: SymbolIndex) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch, symbols))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, str, BudgetGuard, Any, asyncio.Future]], symbols: SymbolIndex) -> None:
+        try:
+            await self._resolve(batch, symbols)
+        except Exception:
+            logger.exception("Resolving a model batch of %d failed", len(batch))
+        finally:
+            for key, _, _, _, future in batch:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+                if not future.done():
+                    future.set_exception(RuntimeError("Model batch was abandoned"))
+
+    async def _resolve(self, batch: List[Tuple[str, str, BudgetGuard, Any, asyncio.Future]], symbols: SymbolIndex) -> None:
+        texts = [text for _, text, _, _, _ in batch]
+        results: Optional[List[ModelResult]] = None
+        timed_out = False
+        try:
+            results = await asyncio.wait_for(self.backend.parse_batch(texts), self.timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            logger.warning("Model batch of %d timed out; using heuristic parser", len(batch))
+        except Exception as exc:
+            logger.warning("Model batch of %d failed (%s); using heuristic parser", len(batch), exc)
+        if results is not None and len(results) != len(batch):
+            logger.warning("Model returned %d results for a batch of %d; using heuristic parser", len(results), len(batch))
+            results = None
+        from_model = results is not None
+        for i, (key, text, budget, reservation, future) in enumerate(batch):
+            self._inflight.pop(key, None)
+            result: ModelResult
+            if results is None:
+                # A timed-out request may still be billed, so its estimate stays charged.
+                try:
+                    result = (_heuristic_parse(text, symbols), reservation.amount if timed_out else 0)
+                except ValueError as exc:
+                    result = exc
+            else:
+                result = results[i]
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                await budget.areconcile(reservation, 0)
+            else:
+                parsed, cost = result
+                future.set_result((parsed, from_model))
+                await budget.areconcile(reservation, cost)
+
+
+_batcher: Optional[ParseBatcher] = None
+
+
+def get_parse_batcher(settings: Optional[Settings] = None) -> ParseBatcher:
+    """Return the process-wide batcher using the local backend."""
+
+    global _batcher
+    if _batcher is None:
+        s = settings or get_settings()
+        _batcher = ParseBatcher(
+            HeuristicBackend(),
+            max_batch=s.nl_batch_max_size,
+            max_wait=s.nl_batch_max_wait_ms / 1000,
+            timeout=s.nl_model_timeout,
+        )
+    return _batcher
+
+
+async def aparse_order(
+    text: str, *, budget: Optional[BudgetGuard] = None, settings: Optional[Settings] = None
+) -> dict:
+    """Asynchronous :func:`parse_order` that batches model calls.
+
+    Cache hits and confident heuristic parses return immediately; escalated
+    phrases are parsed through the shared :class:`ParseBatcher`. Heuristic
+    fallbacks for escalated phrases (model timeout, failure or no budget) are
+    not cached, so the model is asked again next time.
+    """
+    with span("parse"):
+        symbols = get_symbol_index(settings)
+        cache = get_parse_cache(settings)
+        parsed = await cache.aget(text, symbols.version)
+        if parsed is None:
+            candidate, reasons = _speculate(text, symbols, settings)
+            if not reasons:
+                parsed, cacheable = _unwrap(candidate, text), True
+            else:
+                batcher = get_parse_batcher(settings)
+                parsed, cacheable = await batcher.parse(text, budget or get_budget_guard(settings), symbols)
+            if cacheable:
+                await cache.aput(text, symbols.version, parsed)
+    symbol, side, size, price, leverage = parsed
+    with span("build_payload"):
+        return build_order_json(symbol, side, size, price=price, leverage=leverage, settings=settings)
+
+
+def order_preview(
+    text: str, *, budget: Optional[BudgetGuard] = None, settings: Optional[Settings] = None
+) -> tuple[str, dict]:
     """Return a human-readable preview and the payload awaiting confirmation."""
-    payload = parse_order(text, budget=budget)
+    payload = parse_order(text, budget=budget, settings=settings)
     preview = f"Order preview:\n{payload}\n\nConfirm?"
     return preview, payload
 
@@ -0,0 +1,100 @@
+"""Short-lived storage for order previews awaiting confirmation.
+
+``buy_sell_handler`` stores the preview payload under a short random id and
+puts that id into the inline keyboard's ``callback_data``. The confirm
+callback pops the payload by id, so confirmation is a single lookup and a
+preview can be confirmed at most once; if the trade cannot be submitted the
+callback restores the payload so the user can confirm again. Entries expire
+after ``PENDING_ORDER_TTL`` seconds.
+
+Two backends are available: an in-process store (default) and Redis, selected
+with ``PENDING_ORDER_BACKEND=redis`` so replicas share previews. The Redis
+backend needs the optional ``redis`` package.
+"""
+
+from __future__ import annotations
+
+import json
+import secrets
+from typing import Any, Dict, Optional
+
+from .cache import LRUCache
+from .config import Settings, get_settings
+
+try:  # pragma: no cover - optional dependency
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - optional dependency
+    aioredis = None
+
+_MAX_PENDING = 100_000
+
+
+def new_order_id() -> str:
+    """Return a short URL-safe id that fits comfortably in ``callback_data``."""
+    return secrets.token_urlsafe(6)
+
+
+class MemoryPendingOrderStore:
+    """Pending orders kept in process memory with a TTL."""
+
+    def __init__(self, ttl: float, maxsize: int = _MAX_PENDING) -> None:
+        self._orders: LRUCache[str, Dict[str, Any]] = LRUCache(maxsize, ttl)
+
+    async def put(self, payload: Dict[str, Any]) -> str:
+        """Store ``payload`` and return its id."""
+        order_id = new_order_id()
+        self._orders.put(order_id, payload)
+        return order_id
+
+    async def pop(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Remove and return the payload for ``order_id``; ``None`` if unknown or expired."""
+        return self._orders.pop(order_id)
+
+    async def restore(self, order_id: str, payload: Dict[str, Any]) -> None:
+        """Store ``payload`` again under ``order_id`` after a failed confirmation."""
+        self._orders.put(order_id, payload)
+
+
+class RedisPendingOrderStore:
+    """Pending orders shared between replicas through Redis keys with an expiry."""
+
+    prefix = "pending_order:"
+
+    def __init__(self, client: Any, ttl: int) -> None:
+        self._client = client
+        self._ttl = ttl
+
+    async def put(self, payload: Dict[str, Any]) -> str:
+        """Store ``payload`` and return its id."""
+        order_id = new_order_id()
+        await self._client.set(self.prefix + order_id, json.dumps(payload), ex=self._ttl)
+        return order_id
+
+    async def pop(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically remove and return the payload for ``order_id``."""
+        raw = await self._client.getdel(self.prefix + order_id)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def restore(self, order_id: str, payload: Dict[str, Any]) -> None:
+        """Store ``payload`` again under ``order_id`` after a failed confirmation."""
+        await self._client.set(self.prefix + order_id, json.dumps(payload), ex=self._ttl)
+
+
+_store: Optional[Any] = None
+
+
+def get_pending_orders(settings: Optional[Settings] = None) -> Any:
+    """Return the process-wide pending order store."""
+
+    global _store
+    if _store is None:
+        s = settings or get_settings()
+        if s.pending_order_backend == "redis":
+            if aioredis is None:
+                raise RuntimeError("PENDING_ORDER_BACKEND=redis requires the 'redis' package")
+            _store = RedisPendingOrderStore(aioredis.from_url(s.redis_url), s.pending_order_ttl)
+        else:
+            _store = MemoryPendingOrderStore(s.pending_order_ttl)
+    return _store
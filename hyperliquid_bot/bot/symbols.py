@@ -0,0 +1,108 @@
+"""Index of tradable symbols for natural-language parsing.
+
+The symbol universe comes from an instrument file: either an exchange
+metadata snapshot (``{"universe": [{"name": "BTC"}, ...], "aliases": {...}}``)
+or a plain JSON list of names. :class:`SymbolIndex` maps lowercased names and
+aliases to canonical symbols with a hash table, so resolving a token costs one
+hash of the token. A character trie over the same keys serves prefix queries
+such as suggestions for misspelt symbols.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from .config import Settings, get_settings
+
+DEFAULT_INSTRUMENTS_PATH = str(Path(__file__).resolve().parents[1] / "config" / "instruments.json")
+
+_PERP_SUFFIX = "-perp"
+_TERMINAL = ""
+
+
+class SymbolIndex:
+    """Known symbols and aliases with exact and prefix lookups.
+
+    Parameters
+    ----------
+    symbols: Iterable[str]
+        Canonical symbol names as listed by the exchange.
+    aliases: Optional[Mapping[str, str]]
+        Alternative spellings mapped to canonical names (``"bitcoin"`` ->
+        ``"BTC"``).
+    """
+
+    def __init__(self, symbols: Iterable[str], aliases: Optional[Mapping[str, str]] = None) -> None:
+        self.symbols = frozenset(s.upper() for s in symbols)
+        self._lookup: Dict[str, str] = {s.lower(): s for s in self.symbols}
+        for alias, target in (aliases or {}).items():
+            self._lookup[alias.lower()] = target.upper()
+        self._trie: Dict[str, Any] = {}
+        for key, target in self._lookup.items():
+            node = self._trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[_TERMINAL] = target
+        digest = hashlib.sha1(json.dumps(sorted(self._lookup.items())).encode()).hexdigest()
+        self.version = digest[:12]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, token: str) -> bool:
+        return self.resolve(token) is not None
+
+    def resolve(self, token: str) -> Optional[str]:
+        """Return the canonical symbol for ``token`` or ``None`` if unknown.
+
+        ``X-perp`` resolves to ``X`` unless ``X-perp`` itself is listed.
+        """
+        key = token.lower()
+        symbol = self._lookup.get(key)
+        if symbol is None and key.endswith(_PERP_SUFFIX):
+            symbol = self._lookup.get(key[: -len(_PERP_SUFFIX)])
+        return symbol
+
+    def suggest(self, prefix: str, limit: int = 5) -> List[str]:
+        """Return up to ``limit`` canonical symbols whose name or alias starts with ``prefix``."""
+        node = self._trie
+        for ch in prefix.lower():
+            node = node.get(ch)
+            if node is None:
+                return []
+        found: List[str] = []
+        stack = [node]
+        while stack and len(found) < limit:
+            current = stack.pop()
+            target = current.get(_TERMINAL)
+            if target is not None and target not in found:
+                found.append(target)
+            stack.extend(child for ch, child in sorted(current.items(), reverse=True) if ch != _TERMINAL)
+        return found
+
+    @classmethod
+    def from_file(cls, path: str) -> "SymbolIndex":
+        """Load an exchange metadata snapshot or a JSON list of names."""
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if isinstance(data, list):
+            return cls(str(s) for s in data)
+        names = (u["name"] if isinstance(u, dict) else str(u) for u in data.get("universe", []))
+        return cls(names, data.get("aliases", {}))
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+
+
+def get_symbol_index(settings: Optional[Settings] = None) -> SymbolIndex:
+    """Return the cached index for the configured instrument file."""
+
+    s = settings or get_settings()
+    path = s.instruments_path or DEFAULT_INSTRUMENTS_PATH
+    index = _indexes.get(path)
+    if index is None:
+        index = SymbolIndex.from_file(path)
+        _indexes[path] = index
+    return index
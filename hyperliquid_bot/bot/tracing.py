@@ -0,0 +1,194 @@
+"""Lightweight tracing of the stages inside a handler.
+
+Wrap a stage in ``with span("parse"):``. Every finished span is observed in
+the ``stage_latency_ms`` histogram under its name. When the span runs inside
+a trace (started by :class:`~.middleware.ExecutionTimeMiddleware` through
+:func:`trace`) that was sampled, it is also kept on the trace, which is
+appended to ``TRACE_EXPORT_PATH`` as one JSON line when the handler returns.
+
+The current trace and span travel in :mod:`contextvars`, so concurrent
+handlers never see each other's spans, and durations come from the
+monotonic :func:`time.perf_counter`. With ``TRACING_ENABLED=false``
+:func:`span` and :func:`trace` return a shared no-op object.
+
+Work handed to another task (such as the trade writer's batch commit) runs
+outside the caller's trace; its spans still feed the stage histograms.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, TextIO
+
+from ..api.metrics import observe_stage
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+_trace: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_parent: ContextVar[Optional["Span"]] = ContextVar("span", default=None)
+_ids = itertools.count(1)
+
+
+class _NoopSpan:
+    """Returned instead of a span or trace while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """Timed stage; use as a context manager (also around ``await``)."""
+
+    __slots__ = ("name", "start", "duration", "parent", "trace", "_token")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0.0
+        self.duration = 0.0
+        self.parent: Optional[Span] = None
+        self.trace: Optional[Trace] = None
+        self._token: Any = None
+
+    def __enter__(self) -> "Span":
+        self.trace = _trace.get()
+        if self.trace is not None:
+            self.parent = _parent.get()
+            self._token = _parent.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.duration = time.perf_counter() - self.start
+        observe_stage(self.name, self.duration * 1000)
+        if self.trace is not None:
+            _parent.reset(self._token)
+            self.trace.spans.append(self)
+
+
+class Trace:
+    """Root of a sampled trace collecting the spans finished inside it."""
+
+    __slots__ = ("trace_id", "name", "start", "wall_start", "duration", "spans", "_token", "_exporter")
+
+    def __init__(self, name: str, exporter: "JsonlTraceExporter") -> None:
+        self.trace_id = f"{os.getpid():x}-{next(_ids):x}"
+        self.name = name
+        self.start = 0.0
+        self.wall_start = 0.0
+        self.duration = 0.0
+        self.spans: List[Span] = []
+        self._token: Any = None
+        self._exporter = exporter
+
+    def __enter__(self) -> "Trace":
+        self._token = _trace.set(self)
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.duration = time.perf_counter() - self.start
+        _trace.reset(self._token)
+        self._exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the trace as JSON-ready data; span offsets are relative to the trace start."""
+        index = {id(s): i for i, s in enumerate(self.spans)}
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "ts": self.wall_start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": [
+                {
+                    "name": s.name,
+                    "parent": index.get(id(s.parent)) if s.parent is not None else None,
+                    "offset_ms": round((s.start - self.start) * 1000, 3),
+                    "duration_ms": round(s.duration * 1000, 3),
+                }
+                for s in self.spans
+            ],
+        }
+
+
+class JsonlTraceExporter:
+    """Appends traces to a JSON-lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        line = json.dumps(trace.to_dict())
+        with self._lock:
+            try:
+                if self._fh is None:
+                    self._fh = open(self.path, "a", encoding="utf-8", buffering=1)
+                self._fh.write(line + "\n")
+            except OSError as exc:
+                logger.warning("Could not export trace to %s: %s", self.path, exc)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+_configured_for: Optional[Settings] = None
+_enabled = False
+_sample_rate = 0.0
+_exporter: Optional[JsonlTraceExporter] = None
+
+
+def _configure() -> None:
+    global _configured_for, _enabled, _sample_rate, _exporter
+    s = get_settings()
+    if s is _configured_for:
+        return
+    _configured_for = s
+    _enabled = s.tracing_enabled
+    _sample_rate = s.trace_sample_rate
+    if _exporter is None or _exporter.path != s.trace_export_path:
+        if _exporter is not None:
+            _exporter.close()
+        _exporter = JsonlTraceExporter(s.trace_export_path) if s.trace_export_path else None
+
+
+def span(name: str) -> Any:
+    """Return a context manager timing the stage ``name``."""
+    _configure()
+    return Span(name) if _enabled else _NOOP
+
+
+def trace(name: str) -> Any:
+    """Return a context manager starting a trace, or a no-op if this one is not sampled."""
+    _configure()
+    if not _enabled or _exporter is None or _trace.get() is not None or random.random() >= _sample_rate:
+        return _NOOP
+    return Trace(name, _exporter)
+
+
+def close_trace_exporter() -> None:
+    """Flush and close the trace file."""
+    global _configured_for, _exporter
+    if _exporter is not None:
+        _exporter.close()
+    _configured_for, _exporter = None, None
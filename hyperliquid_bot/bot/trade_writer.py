@@ -0,0 +1,184 @@
+"""Batched persistence of confirmed trades.
+
+Confirm callbacks hand their trade to :class:`TradeWriter` instead of opening a
+session each. The writer collects rows for a short window (or until a batch is
+full), resolves the batch's Telegram users through the shared id cache (one
+query for any misses), writes the trades with a single multi-row ``INSERT``
+and commits once. Each caller's future resolves only after that commit, so a
+confirmed order is durable by the time the user sees "Order submitted!".
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+
+from ..api.metrics import observe_trade_batch, set_trade_queue_depth
+from .config import Settings, get_settings
+from .db import Trade, get_sessionmaker, get_user_id_cache, resolve_user_ids
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingTrade:
+    """Trade waiting in the queue together with its caller's future."""
+
+    telegram_id: int
+    symbol: str
+    side: str
+    size: float
+    future: asyncio.Future = field(repr=False)
+
+
+class TradeWriter:
+    """Group-commit queue for :class:`~hyperliquid_bot.bot.db.Trade` rows.
+
+    Parameters
+    ----------
+    settings: Optional[Settings]
+        Settings providing the database URL and batching limits. If omitted,
+        loaded automatically.
+    max_batch: Optional[int]
+        Maximum rows per commit; defaults to ``TRADE_BATCH_SIZE``.
+    max_wait: Optional[float]
+        Seconds to wait for more rows after the first one arrives; defaults to
+        ``TRADE_BATCH_WINDOW_MS``.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        *,
+        max_batch: Optional[int] = None,
+        max_wait: Optional[float] = None,
+    ) -> None:
+        self.settings = settings or get_settings()
+        self.user_ids = get_user_id_cache(self.settings)
+        self.max_batch = max(1, max_batch if max_batch is not None else self.settings.trade_batch_size)
+        self.max_wait = max_wait if max_wait is not None else self.settings.trade_batch_window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_running(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        assert self._queue is not None
+        return self._queue
+
+    async def submit(self, telegram_id: int, symbol: str, side: str, size: float) -> None:
+        """Queue a trade and wait until the batch containing it is committed."""
+
+        queue = self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait(_PendingTrade(telegram_id, symbol, side, size, future))
+        set_trade_queue_depth(queue.qsize())
+        await future
+
+    async def stop(self) -> None:
+        """Flush queued trades and stop the background task."""
+
+        task, queue = self._task, self._queue
+        if task is None or task.done() or queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        queue.put_nowait(None)
+        await task
+        self._task = None
+
+    async def _collect(self, queue: asyncio.Queue, first: _PendingTrade) -> tuple[List[_PendingTrade], bool]:
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if queue.empty():
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = queue.get_nowait()
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self) -> None:
+        queue = self._queue
+        assert queue is not None
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is None:
+                break
+            batch, stopping = await self._collect(queue, first)
+            set_trade_queue_depth(queue.qsize())
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_PendingTrade]) -> None:
+        try:
+            async with get_sessionmaker(self.settings)() as session:
+                with span("db_acquire"):
+                    await session.connection()
+                with span("db_resolve_users"):
+                    user_ids = await resolve_user_ids(session, (t.telegram_id for t in batch), self.user_ids)
+                with span("db_insert"):
+                    await session.execute(
+                        insert(Trade).values(
+                            [
+                                {
+                                    "user_id": user_ids[t.telegram_id],
+                                    "symbol": t.symbol,
+                                    "side": t.side,
+                                    "size": t.size,
+                                }
+                                for t in batch
+                            ]
+                        )
+                    )
+                with span("db_commit"):
+                    await session.commit()
+        except Exception as exc:
+            logger.exception("Failed to persist batch of %d trades", len(batch))
+            for t in batch:
+                if not t.future.done():
+                    t.future.set_exception(exc)
+            return
+        self.user_ids.update(user_ids)
+        observe_trade_batch(len(batch))
+        for t in batch:
+            if not t.future.done():
+                t.future.set_result(None)
+
+
+_writers: Dict[str, TradeWriter] = {}
+
+
+def get_trade_writer(settings: Optional[Settings] = None) -> TradeWriter:
+    """Return the process-wide :class:`TradeWriter` for the configured database."""
+
+    s = settings or get_settings()
+    writer = _writers.get(s.database_url)
+    if writer is None:
+        writer = TradeWriter(s)
+        _writers[s.database_url] = writer
+    return writer
+
+
+async def stop_trade_writers() -> None:
+    """Flush and stop every writer started in this process."""
+
+    writers = list(_writers.values())
+    _writers.clear()
+    for writer in writers:
+        await writer.stop()
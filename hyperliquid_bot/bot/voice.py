@@ -1,29 +1,285 @@
-"""Voice message handling stub.
+"""Voice message handling.
 
 The real implementation would invoke Whisper to transcribe `.ogg` files. For
-unit tests and offline environments this module provides a minimal stub that
-reads the input file as UTF‑8 text and feeds the result into the natural-
-language parser.
+unit tests and offline environments the transcriber is a stub that decodes the
+file contents as UTF‑8 text; the result is fed into the natural-language
+parser.
+
+Transcription is slow and CPU bound, so the bot does not run it on the event
+loop. :class:`VoicePipeline` reads voice notes in chunks while hashing them,
+answers repeated notes (e.g. forwarded ones) from a transcript cache keyed by
+content hash, and queues the rest for a bounded thread or process pool. The
+queue is bounded: callers wait for space when it is full, a user with too
+many notes in flight is turned away with :class:`VoiceBusyError`, and workers
+serve users round-robin so one user's backlog cannot starve the others.
 """
 
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Optional
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple
 
-from .nl_parser import parse_order, BudgetGuard
+from .cache import LRUCache
+from .config import Settings, get_settings
+from .nl_parser import parse_order, aparse_order, BudgetGuard
 
+logger = logging.getLogger(__name__)
 
-def transcribe(path: str) -> str:
-    """Return the text representation of an `.ogg` file.
+CHUNK_SIZE = 64 * 1024
+
+
+class VoiceBusyError(RuntimeError):
+    """Raised when a user already has the maximum number of voice notes queued."""
+
+
+def read_voice(path: str, chunk_size: int = CHUNK_SIZE, max_bytes: Optional[int] = None) -> Tuple[str, bytes]:
+    """Read ``path`` in chunks and return its SHA-256 digest and contents.
+
+    Raises :class:`ValueError` as soon as more than ``max_bytes`` have been
+    read, without loading the rest of the file.
+    """
+    digest = hashlib.sha256()
+    data = bytearray()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            data += chunk
+            if max_bytes is not None and len(data) > max_bytes:
+                raise ValueError(f"Voice message larger than {max_bytes} bytes")
+            digest.update(chunk)
+    return digest.hexdigest(), bytes(data)
+
+
+def transcribe_bytes(data: bytes) -> str:
+    """Return the text of an `.ogg` voice note.
 
-    The stub simply reads the file contents as text. Test fixtures write the
-    desired phrase directly to the file.
+    The stub simply decodes the bytes as text. Test fixtures write the desired
+    phrase directly to the file.
     """
-    return Path(path).read_text(encoding="utf-8").strip()
+    return data.decode("utf-8").strip()
+
+
+def transcribe(path: str) -> str:
+    """Return the text representation of an `.ogg` file."""
+    return transcribe_bytes(read_voice(path)[1])
 
 
 def voice_to_order(path: str, *, budget: Optional[BudgetGuard] = None) -> dict:
     """Convert a voice message to an order payload."""
     text = transcribe(path)
     return parse_order(text, budget=budget)
+
+
+@dataclass
+class _VoiceJob:
+    """Voice note waiting for a worker together with its callers' future."""
+
+    user_id: Hashable
+    digest: str
+    data: bytes = field(repr=False)
+    future: asyncio.Future = field(repr=False)
+
+
+class VoicePipeline:
+    """Bounded, fair transcription queue in front of a worker pool.
+
+    Parameters
+    ----------
+    transcriber: Callable[[bytes], str]
+        Function turning audio bytes into text. It runs in ``executor`` and
+        must be picklable (a module-level function) for a process pool.
+    workers: int
+        Number of notes transcribed at once.
+    queue_size: int
+        Notes that may wait for a worker; further callers wait for space.
+    per_user_limit: int
+        Notes one user may have queued or in transcription at once.
+    chunk_size: int
+        Bytes read from a voice file at a time.
+    max_bytes: Optional[int]
+        Largest voice file accepted.
+    cache_size: int
+        Transcripts kept by content hash.
+    processes: bool
+        Run the default pool as processes instead of threads, for
+        transcribers that hold the GIL.
+    executor: Optional[Executor]
+        Pool running ``transcriber`` instead of the default one; it is left
+        running by :meth:`stop`.
+    """
+
+    def __init__(
+        self,
+        transcriber: Callable[[bytes], str] = transcribe_bytes,
+        *,
+        workers: int = 2,
+        queue_size: int = 64,
+        per_user_limit: int = 3,
+        chunk_size: int = CHUNK_SIZE,
+        max_bytes: Optional[int] = None,
+        cache_size: int = 1024,
+        processes: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.transcriber = transcriber
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.per_user_limit = max(1, per_user_limit)
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.cache: LRUCache[str, str] = LRUCache(cache_size)
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = (
+                ProcessPoolExecutor(self.workers)
+                if processes
+                else ThreadPoolExecutor(self.workers, thread_name_prefix="voice")
+            )
+        self._executor = executor
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._queues: "OrderedDict[Hashable, Deque[_VoiceJob]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._per_user: Dict[Hashable, int] = {}
+        self._space = asyncio.Semaphore(self.queue_size)
+        self._ready = asyncio.Semaphore(0)
+
+    @property
+    def queued(self) -> int:
+        """Notes waiting for a worker."""
+        return sum(len(q) for q in self._queues.values())
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queues, self._inflight, self._per_user = OrderedDict(), {}, {}
+            self._space = asyncio.Semaphore(self.queue_size)
+            self._ready = asyncio.Semaphore(0)
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def transcribe(self, user_id: Hashable, path: str) -> str:
+        """Return the transcript of the voice file at ``path`` sent by ``user_id``."""
+        self._ensure_running()
+        digest, data = await asyncio.to_thread(read_voice, path, self.chunk_size, self.max_bytes)
+        cached = self.cache.get(digest)
+        if cached is not None:
+            return cached
+        future = self._inflight.get(digest)
+        if future is None:
+            if self._per_user.get(user_id, 0) >= self.per_user_limit:
+                raise VoiceBusyError("Too many voice messages in progress; please wait")
+            self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+            try:
+                await self._space.acquire()
+            except BaseException:
+                self._release_user(user_id)
+                raise
+            future = self._inflight.get(digest)
+            if future is not None:
+                # The same note was queued while this caller waited for space.
+                self._space.release()
+                self._release_user(user_id)
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[digest] = future
+                self._queues.setdefault(user_id, deque()).append(_VoiceJob(user_id, digest, data, future))
+                self._ready.release()
+        return await asyncio.shield(future)
+
+    def _release_user(self, user_id: Hashable) -> None:
+        remaining = self._per_user.get(user_id, 0) - 1
+        if remaining > 0:
+            self._per_user[user_id] = remaining
+        else:
+            self._per_user.pop(user_id, None)
+
+    def _next_job(self) -> _VoiceJob:
+        # Serve the user at the head, then rotate them to the back.
+        user_id, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        if queue:
+            self._queues.move_to_end(user_id)
+        else:
+            del self._queues[user_id]
+        return job
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.acquire()
+            job = self._next_job()
+            self._space.release()
+            try:
+                text = await loop.run_in_executor(self._executor, self.transcriber, job.data)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as exc:
+                logger.warning("Transcription failed: %s", exc)
+                job.future.set_exception(exc)
+            else:
+                self.cache.put(job.digest, text)
+                job.future.set_result(text)
+            finally:
+                self._inflight.pop(job.digest, None)
+                self._release_user(job.user_id)
+
+    async def stop(self) -> None:
+        """Cancel queued notes, stop the workers and shut down an owned pool."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for queue in self._queues.values():
+            for job in queue:
+                job.future.cancel()
+        self._queues.clear()
+        self._loop = None
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pipeline: Optional[VoicePipeline] = None
+
+
+def get_voice_pipeline(settings: Optional[Settings] = None) -> VoicePipeline:
+    """Return the process-wide voice pipeline."""
+
+    global _pipeline
+    if _pipeline is None:
+        s = settings or get_settings()
+        _pipeline = VoicePipeline(
+            workers=s.voice_workers,
+            queue_size=s.voice_queue_size,
+            per_user_limit=s.voice_per_user_limit,
+            max_bytes=s.voice_max_bytes or None,
+            cache_size=s.voice_cache_size,
+            processes=s.voice_executor == "process",
+        )
+    return _pipeline
+
+
+async def stop_voice_pipeline() -> None:
+    """Stop the process-wide voice pipeline, if one was started."""
+
+    global _pipeline
+    pipeline, _pipeline = _pipeline, None
+    if pipeline is not None:
+        await pipeline.stop()
+
+
+async def avoice_to_order(
+    path: str,
+    *,
+    user_id: Hashable = 0,
+    budget: Optional[BudgetGuard] = None,
+    settings: Optional[Settings] = None,
+) -> dict:
+    """Transcribe a voice message through the shared pipeline and parse it."""
+    text = await get_voice_pipeline(settings).transcribe(user_id, path)
+    return await aparse_order(text, budget=budget, settings=settings)
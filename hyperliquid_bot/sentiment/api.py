@@ -1,36 +1,47 @@
-"""FastAPI router exposing sentiment data."""
+"""FastAPI router exposing sentiment data.
+
+Both endpoints read ``pair_sentiment_latest``, which the sentiment job keeps
+at one row per pair, so a lookup is a primary-key probe rather than a search
+of the history table, and ``/sentiment?pairs=...`` answers many pairs with a
+single query.
+"""
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from hyperliquid_bot.bot.db import get_sessionmaker
-from .models import PairSentiment
+from hyperliquid_bot.bot.db import get_engine
+from .models import PairSentimentLatest
 
-SessionLocal: async_sessionmaker | None = None
+MAX_PAIRS = 500
 
+router = APIRouter()
 
-def _sessionmaker() -> async_sessionmaker:
-    global SessionLocal
-    if SessionLocal is None:
-        SessionLocal = get_sessionmaker()
-    return SessionLocal
+_LATEST = select(PairSentimentLatest.pair, PairSentimentLatest.score, PairSentimentLatest.summary)
 
 
-router = APIRouter()
+@router.get("/sentiment")
+async def get_sentiments(
+    pairs: str = Query(..., description="Comma-separated pairs, e.g. BTC-PERP,ETH-PERP"),
+) -> list[dict]:
+    """Return latest sentiment for each known pair in ``pairs``, in request order."""
+    wanted = list(dict.fromkeys(p.strip() for p in pairs.split(",") if p.strip()))
+    if not wanted:
+        raise HTTPException(status_code=400, detail="no pairs given")
+    if len(wanted) > MAX_PAIRS:
+        raise HTTPException(status_code=400, detail=f"at most {MAX_PAIRS} pairs per request")
+    async with get_engine().connect() as conn:
+        rows = (await conn.execute(_LATEST.where(PairSentimentLatest.pair.in_(wanted)))).all()
+    found = {row.pair: {"pair": row.pair, "score": row.score, "summary": row.summary} for row in rows}
+    return [found[pair] for pair in wanted if pair in found]
 
 
 @router.get("/sentiment/{pair}")
 async def get_sentiment(pair: str) -> dict:
     """Return latest sentiment for ``pair``."""
-    sessionmaker = _sessionmaker()
-    async with sessionmaker() as session:
-        result = await session.execute(
-            select(PairSentiment).where(PairSentiment.pair == pair).order_by(PairSentiment.ts.desc())
-        )
-        row = result.scalars().first()
-        if not row:
-            raise HTTPException(status_code=404, detail="pair not found")
-        return {"pair": row.pair, "score": row.score, "summary": row.summary}
+    async with get_engine().connect() as conn:
+        row = (await conn.execute(_LATEST.where(PairSentimentLatest.pair == pair))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="pair not found")
+    return {"pair": row.pair, "score": row.score, "summary": row.summary}
@@ -1,16 +1,38 @@
-"""Sentiment aggregation job."""
+"""Sentiment aggregation job.
+
+Every pair is fetched from every source concurrently. Fetches share a
+semaphore of ``SENTIMENT_CONCURRENCY`` slots, each attempt is bounded by
+``SENTIMENT_SOURCE_TIMEOUT`` and failures are retried ``SENTIMENT_RETRIES``
+times with jittered exponential backoff, so a slow or failing source costs at
+most its own timeouts rather than holding up the run. Fetched pairs go
+through a queue to a consumer that scores them (see :mod:`.scoring`) while
+other fetches are still in flight; pairs for which every source failed are
+skipped.
+
+Scores are written without ORM objects, ``SENTIMENT_WRITE_CHUNK_SIZE`` rows
+per multi-row ``INSERT``, as an upsert on ``(pair, bucket)`` where the bucket
+is the hour the run is recorded for. Rerunning or backfilling an hour
+replaces its rows instead of duplicating them. The same transaction upserts
+each pair's row in ``pair_sentiment_latest``, which the API reads.
+"""
 
 from __future__ import annotations
 
-from typing import Iterable
+import asyncio
+import logging
+import random
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
 
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
 
-from hyperliquid_bot.bot.db import get_engine, Base
-from .models import PairSentiment
+from hyperliquid_bot.bot.config import Settings, get_settings
+from hyperliquid_bot.bot.db import get_engine, init_db
+from .models import PairSentiment, PairSentimentLatest, hour_bucket
+from .scoring import DEFAULT_LEXICON
 
-_positive = {"moon", "up", "bull", "bullish", "pump", "long"}
-_negative = {"down", "bear", "bearish", "dump", "short"}
+logger = logging.getLogger(__name__)
 
 
 async def _fetch_texts(pair: str) -> list[str]:
@@ -18,25 +40,121 @@ async def _fetch_texts(pair: str) -> list[str]:
     return [f"{pair} to the moon", f"I am long {pair}"]
 
 
-def _score(texts: list[str]) -> float:
-    score = 0
-    for t in texts:
-        tl = t.lower()
-        score += sum(word in tl for word in _positive)
-        score -= sum(word in tl for word in _negative)
-    return max(-1.0, min(1.0, score / max(len(texts), 1)))
-
-
-async def run_sentiment_job(pairs: Iterable[str]) -> None:
-    """Compute sentiment for ``pairs`` and store in the database."""
-    engine = get_engine()
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
-    async with SessionLocal() as session:
-        for pair in pairs:
-            texts = await _fetch_texts(pair)
-            score = _score(texts)
+class SentimentSource(Protocol):
+    """Provider of recent texts mentioning a pair."""
+
+    name: str
+
+    async def fetch(self, pair: str) -> List[str]:
+        ...
+
+
+class PlaceholderSource:
+    """Source returning the placeholder lines of :func:`_fetch_texts`."""
+
+    name = "placeholder"
+
+    async def fetch(self, pair: str) -> List[str]:
+        return await _fetch_texts(pair)
+
+
+async def _fetch_source(
+    source: SentimentSource, pair: str, gate: asyncio.Semaphore, s: Settings
+) -> Optional[List[str]]:
+    """Return the texts ``source`` has for ``pair``, or ``None`` once every attempt failed."""
+    for attempt in range(s.sentiment_retries + 1):
+        try:
+            async with gate:
+                return await asyncio.wait_for(source.fetch(pair), s.sentiment_source_timeout)
+        except Exception as exc:
+            if attempt == s.sentiment_retries:
+                logger.warning(
+                    "Source %s failed for %s after %d attempts: %r", source.name, pair, attempt + 1, exc
+                )
+                return None
+        # Back off outside the semaphore so retries do not hold slots.
+        await asyncio.sleep(s.sentiment_retry_backoff * 2**attempt * random.uniform(0.5, 1.5))
+    return None
+
+
+async def _fetch_pair(
+    pair: str,
+    sources: Sequence[SentimentSource],
+    gate: asyncio.Semaphore,
+    s: Settings,
+    queue: "asyncio.Queue[Tuple[str, Optional[List[str]]]]",
+) -> None:
+    results = await asyncio.gather(*(_fetch_source(source, pair, gate, s) for source in sources))
+    fetched = [texts for texts in results if texts is not None]
+    await queue.put((pair, [t for texts in fetched for t in texts] if fetched else None))
+
+
+def _upsert(dialect: str, model: Any, rows: List[Dict[str, Any]], keys: Sequence[str], newer_only: bool = False) -> Any:
+    """Return a multi-row insert of ``rows`` into ``model`` replacing rows with the same ``keys``.
+
+    With ``newer_only`` an existing row is only replaced by a row with a later
+    (or equal) ``ts``.
+    """
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(model).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: stmt.excluded[column] for column in rows[0] if column not in keys},
+            where=model.ts <= stmt.excluded.ts if newer_only else None,
+        )
+    return insert(model).values(rows)
+
+
+async def write_sentiment(rows: Sequence[Dict[str, Any]], settings: Optional[Settings] = None) -> None:
+    """Upsert ``pair_sentiment`` rows and the matching ``pair_sentiment_latest`` rows.
+
+    Both tables are written in chunks within one transaction. A backfill
+    leaves a pair's latest row alone when that row is newer.
+    """
+    s = settings or get_settings()
+    chunk = max(1, s.sentiment_write_chunk_size)
+    async with get_engine(s).begin() as conn:
+        dialect = conn.dialect.name
+        for start in range(0, len(rows), chunk):
+            batch = list(rows[start:start + chunk])
+            await conn.execute(_upsert(dialect, PairSentiment, batch, ("pair", "bucket")))
+            await conn.execute(_upsert(dialect, PairSentimentLatest, batch, ("pair",), newer_only=True))
+
+
+async def run_sentiment_job(
+    pairs: Iterable[str],
+    *,
+    sources: Optional[Sequence[SentimentSource]] = None,
+    at: Optional[datetime] = None,
+    settings: Optional[Settings] = None,
+) -> None:
+    """Compute sentiment for ``pairs`` from ``sources`` and store in the database.
+
+    ``at`` is the (UTC) time the scores are recorded for, now by default;
+    backfills pass an earlier time to fill that hour.
+    """
+    s = settings or get_settings()
+    sources = sources or [PlaceholderSource()]
+    ts = at or datetime.utcnow()
+    bucket = hour_bucket(ts)
+    pairs = list(dict.fromkeys(pairs))
+    await init_db(s)
+    gate = asyncio.Semaphore(max(1, s.sentiment_concurrency))
+    queue: "asyncio.Queue[Tuple[str, Optional[List[str]]]]" = asyncio.Queue(maxsize=max(1, s.sentiment_concurrency))
+    producers = [asyncio.create_task(_fetch_pair(pair, sources, gate, s, queue)) for pair in pairs]
+    rows = []
+    try:
+        for _ in pairs:
+            pair, texts = await queue.get()
+            if texts is None:
+                logger.warning("No source answered for %s; skipping it", pair)
+                continue
+            score = DEFAULT_LEXICON.aggregate(texts)
             summary = "Bullish" if score > 0 else "Bearish" if score < 0 else "Neutral"
-            session.add(PairSentiment(pair=pair, score=score, summary=summary))
-        await session.commit()
+            rows.append({"pair": pair, "ts": ts, "bucket": bucket, "score": score, "summary": summary})
+    finally:
+        for task in producers:
+            task.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+    if rows:
+        await write_sentiment(rows, s)
@@ -1,21 +1,45 @@
-"""Database model for sentiment scores."""
+"""Database models for sentiment scores."""
 
 from __future__ import annotations
 
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import DateTime, Float, Integer, String
+from sqlalchemy import DateTime, Float, Index, Integer, String, UniqueConstraint
 
 from hyperliquid_bot.bot.db import Base
 
 
+def hour_bucket(ts: datetime) -> datetime:
+    """Return the start of the hour containing ``ts``."""
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
 class PairSentiment(Base):
-    """Stored sentiment score for a trading pair."""
+    """Stored sentiment score for a trading pair, one row per pair and hour."""
 
     __tablename__ = "pair_sentiment"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    pair: Mapped[str] = mapped_column(String, index=True)
+    pair: Mapped[str] = mapped_column(String)
     ts: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime, default=lambda: hour_bucket(datetime.utcnow()))
+    score: Mapped[float] = mapped_column(Float)
+    summary: Mapped[str] = mapped_column(String(120))
+
+    __table_args__ = (
+        UniqueConstraint("pair", "bucket", name="uq_pair_sentiment_pair_bucket"),
+        # Latest row of a pair; also serves every lookup by pair.
+        Index("ix_pair_sentiment_pair_ts", "pair", ts.desc()),
+    )
+
+
+class PairSentimentLatest(Base):
+    """Most recent sentiment score of each pair, maintained by the sentiment job."""
+
+    __tablename__ = "pair_sentiment_latest"
+
+    pair: Mapped[str] = mapped_column(String, primary_key=True)
+    ts: Mapped[datetime] = mapped_column(DateTime)
+    bucket: Mapped[datetime] = mapped_column(DateTime)
     score: Mapped[float] = mapped_column(Float)
     summary: Mapped[str] = mapped_column(String(120))
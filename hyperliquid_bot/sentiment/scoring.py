@@ -0,0 +1,134 @@
+"""Token-indexed sentiment scoring.
+
+Texts are lower-cased and split into word tokens once; every token is then
+looked up in a compiled ``word -> weight`` dictionary, so a text costs
+O(tokens) however large the lexicon is, and only whole words match ("up"
+does not match "update", nor "pump" "pumpkin"). Apostrophes are dropped, so
+"isn't" is the token ``isnt``. A negator such as "not" or "never" flips the
+sign of the weighted words among the next few tokens of the same clause, so
+"not bullish" counts as bearish but "not bad, bullish" does not.
+
+A batch is tokenised in one pass: the texts are joined with a boundary
+token, lower-cased, stripped of punctuation with :meth:`str.translate` (clause
+punctuation becomes a separator token) and split together.
+:meth:`Lexicon.score_batch` then cuts the token stream at the boundaries, and
+:meth:`Lexicon.aggregate` weighs it whole. Weights are summed with ``map``
+over the dictionary lookup; only the windows after negators are visited
+individually.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+from itertools import repeat
+from typing import Iterable, List, Mapping, Sequence
+
+POSITIVE = ("moon", "up", "bull", "bullish", "pump", "long")
+NEGATIVE = ("down", "bear", "bearish", "dump", "short")
+NEGATORS = ("not", "no", "never", "isn't", "aren't", "don't", "doesn't", "won't", "can't", "cannot")
+
+_SEPARATOR = "\x01"
+_BOUNDARY = "\x02"
+_STOPS = (_SEPARATOR, _BOUNDARY)
+_WORD_CHARS = set(string.ascii_lowercase + string.digits + _SEPARATOR + _BOUNDARY)
+_ASCII_TABLE = {i: " " for i in range(128) if chr(i) not in _WORD_CHARS}
+_ASCII_TABLE.update({ord("'"): None, **{ord(c): f" {_SEPARATOR} " for c in ".,;:!?"}})
+_TOKEN = re.compile(f"[a-z0-9]+|[{_SEPARATOR}{_BOUNDARY}]")
+_ZEROS = repeat(0.0)
+
+
+def tokenize(texts: Iterable[str]) -> List[str]:
+    """Return the tokens of ``texts`` as one list, with a boundary token between texts and a separator between clauses."""
+    joined = f" {_BOUNDARY} ".join(texts).lower().translate(_ASCII_TABLE)
+    return joined.split() if joined.isascii() else _TOKEN.findall(joined)
+
+
+def _normalise(word: str) -> str:
+    return word.lower().replace("'", "")
+
+
+class Lexicon:
+    """Compiled word weights with negation handling.
+
+    Parameters
+    ----------
+    weights: Mapping[str, float]
+        Weight of each word; positive words raise the score.
+    negators: Iterable[str]
+        Words flipping the sign of the weighted words that follow them.
+    negation_window: int
+        Number of tokens after a negator that it applies to.
+    """
+
+    def __init__(
+        self,
+        weights: Mapping[str, float],
+        negators: Iterable[str] = NEGATORS,
+        negation_window: int = 3,
+    ) -> None:
+        self.weights = {_normalise(word): float(weight) for word, weight in weights.items()}
+        self.negators = frozenset(_normalise(word) for word in negators)
+        self.negation_window = negation_window
+
+    def _weigh(self, tokens: Sequence[str]) -> float:
+        get = self.weights.get
+        total = sum(map(get, tokens, _ZEROS))
+        present = self.negators.intersection(tokens)
+        if not present:
+            return total
+        positions = []
+        for negator in present:
+            i = -1
+            try:
+                while True:
+                    i = tokens.index(negator, i + 1)
+                    positions.append(i)
+            except ValueError:
+                pass
+        positions.sort()
+        flipped = 0.0
+        covered = 0
+        for i in positions:
+            # Overlapping windows negate each word once; none crosses a clause
+            # or text, and a cut-short window only covers what it kept.
+            start = max(i + 1, covered)
+            window = tokens[start:i + 1 + self.negation_window]
+            for stop in _STOPS:
+                if stop in window:
+                    window = window[:window.index(stop)]
+            covered = start + len(window)
+            flipped += sum(map(get, window, _ZEROS))
+        # Negated words were counted once above; flip them by subtracting twice.
+        return total - 2 * flipped
+
+    def score(self, text: str) -> float:
+        """Return the summed word weights of ``text``."""
+        return self._weigh(tokenize((text,)))
+
+    def score_batch(self, texts: Iterable[str]) -> List[float]:
+        """Return the score of every text in ``texts``, in order."""
+        texts = list(texts)
+        if not texts:
+            return []
+        tokens = tokenize(texts)
+        if tokens.count(_BOUNDARY) != len(texts) - 1:
+            # A text carried a control character that reads as a boundary.
+            return [self._weigh(tokenize((text,))) for text in texts]
+        scores = []
+        start = 0
+        for _ in range(len(texts) - 1):
+            end = tokens.index(_BOUNDARY, start)
+            scores.append(self._weigh(tokens[start:end]))
+            start = end + 1
+        scores.append(self._weigh(tokens[start:]))
+        return scores
+
+    def aggregate(self, texts: Sequence[str]) -> float:
+        """Return the mean score of ``texts`` clamped to ``[-1, 1]`` (``0`` for no texts)."""
+        if not texts:
+            return 0.0
+        return max(-1.0, min(1.0, self._weigh(tokenize(texts)) / len(texts)))
+
+
+DEFAULT_LEXICON = Lexicon({**{w: 1.0 for w in POSITIVE}, **{w: -1.0 for w in NEGATIVE}})
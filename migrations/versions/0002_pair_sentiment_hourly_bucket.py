@@ -0,0 +1,31 @@
+"""add hourly bucket to pair_sentiment, unique per pair"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("pair_sentiment", sa.Column("bucket", sa.DateTime, nullable=True))
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("UPDATE pair_sentiment SET bucket = date_trunc('hour', ts)")
+    else:
+        op.execute("UPDATE pair_sentiment SET bucket = strftime('%Y-%m-%d %H:00:00.000000', ts)")
+    # Keep only the latest row of each pair and hour so the constraint can be created.
+    op.execute(
+        "DELETE FROM pair_sentiment WHERE id NOT IN "
+        "(SELECT MAX(id) FROM pair_sentiment GROUP BY pair, bucket)"
+    )
+    with op.batch_alter_table("pair_sentiment") as batch:
+        batch.alter_column("bucket", existing_type=sa.DateTime, nullable=False)
+        batch.create_unique_constraint("uq_pair_sentiment_pair_bucket", ["pair", "bucket"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("pair_sentiment") as batch:
+        batch.drop_constraint("uq_pair_sentiment_pair_bucket", type_="unique")
+        batch.drop_column("bucket")
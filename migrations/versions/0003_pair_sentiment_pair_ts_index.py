@@ -0,0 +1,20 @@
+"""index pair_sentiment by (pair, ts DESC)"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_pair_sentiment_pair_ts", "pair_sentiment", ["pair", sa.text("ts DESC")])
+    # The composite index leads with pair, so the single-column index is redundant.
+    op.drop_index("ix_pair_sentiment_pair", table_name="pair_sentiment")
+
+
+def downgrade() -> None:
+    op.create_index("ix_pair_sentiment_pair", "pair_sentiment", ["pair"])
+    op.drop_index("ix_pair_sentiment_pair_ts", table_name="pair_sentiment")
@@ -0,0 +1,29 @@
+"""create pair_sentiment_latest table"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pair_sentiment_latest",
+        sa.Column("pair", sa.String, primary_key=True),
+        sa.Column("ts", sa.DateTime, nullable=False),
+        sa.Column("bucket", sa.DateTime, nullable=False),
+        sa.Column("score", sa.Float, nullable=False),
+        sa.Column("summary", sa.String(length=120), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO pair_sentiment_latest (pair, ts, bucket, score, summary) "
+        "SELECT pair, ts, bucket, score, summary FROM pair_sentiment s WHERE s.id = "
+        "(SELECT l.id FROM pair_sentiment l WHERE l.pair = s.pair ORDER BY l.ts DESC, l.id DESC LIMIT 1)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pair_sentiment_latest")
@@ -1,8 +1,20 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from hyperliquid_bot.bot import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings():
+    """Let each test's environment changes reach the cached settings."""
+    config._settings = None
+    yield
+    config._settings = None
+
 
 def pytest_collection_modifyitems(config, items):
     target = None
@@ -1,3 +1,11 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from hyperliquid_bot.bot import budget, nl_parser
+from hyperliquid_bot.bot.budget import RedisBudgetLedger
+from hyperliquid_bot.bot.config import Settings
 from hyperliquid_bot.bot.nl_parser import BudgetGuard, parse_order
 
 
@@ -7,3 +15,141 @@ def test_budget_guard_logs(caplog):
     with caplog.at_level("WARNING"):
         parse_order(long_text, budget=guard)
     assert "Budget exceeded" in caplog.text
+
+
+class FakeRedis:
+    """Synchronous stand-in for the Redis commands used by the ledger."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, float] = {}
+        self.expiry: dict[str, int] = {}
+
+    def incrbyfloat(self, key: str, amount: float) -> float:
+        self.data[key] = self.data.get(key, 0.0) + amount
+        return self.data[key]
+
+    def expire(self, key: str, seconds: int) -> None:
+        self.expiry[key] = seconds
+
+    def get(self, key: str):
+        value = self.data.get(key)
+        return None if value is None else str(value).encode()
+
+    def register_script(self, script: str):
+        # Emulates RedisBudgetLedger.reserve_script.
+        def reserve(keys, args):
+            amount, limit, seconds = args
+            if self.data.get(keys[0], 0.0) + amount > limit:
+                return 0
+            self.incrbyfloat(keys[0], amount)
+            self.expire(keys[0], seconds)
+            return 1
+
+        return reserve
+
+
+class DownRedis(FakeRedis):
+    def register_script(self, script: str):
+        def reserve(keys, args):
+            raise budget.RedisError("connection refused")
+
+        return reserve
+
+    def incrbyfloat(self, key: str, amount: float) -> float:
+        raise budget.RedisError("connection refused")
+
+
+def test_budget_resets_each_calendar_month():
+    now = [datetime(2024, 1, 31, 23, 59, tzinfo=timezone.utc).timestamp()]
+    guard = BudgetGuard(10, clock=lambda: now[0])
+    assert guard.can_spend(8)
+    assert not guard.can_spend(5)
+    assert guard.current_month() == "2024-01"
+    now[0] = datetime(2024, 2, 1, tzinfo=timezone.utc).timestamp()
+    assert guard.spent == 0
+    assert guard.can_spend(5)
+    now[0] = datetime(2024, 12, 31, tzinfo=timezone.utc).timestamp()
+    assert guard.current_month() == "2024-12"
+    now[0] = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+    assert guard.current_month() == "2025-01"
+
+
+def test_reserve_then_reconcile_actual_cost():
+    guard = BudgetGuard(100)
+    reservation = guard.reserve(10)
+    assert reservation is not None and guard.spent == 10
+    guard.reconcile(reservation, 4)
+    assert guard.spent == 4
+    guard.reconcile(guard.reserve(6), 0)
+    assert guard.spent == 4
+
+
+def test_concurrent_reservations_never_overspend():
+    guard = BudgetGuard(50)
+
+    async def run() -> list[bool]:
+        return await asyncio.gather(*(asyncio.to_thread(guard.can_spend, 1) for _ in range(200)))
+
+    results = asyncio.run(run())
+    assert sum(results) == 50
+    assert guard.spent == 50
+
+
+def test_redis_ledger_shared_between_guards():
+    client = FakeRedis()
+    first = BudgetGuard(10, RedisBudgetLedger(client))
+    second = BudgetGuard(10, RedisBudgetLedger(client))
+    assert first.can_spend(6)
+    assert not second.can_spend(6)
+    assert second.spent == 6
+    second.reconcile(second.reserve(4), 2)
+    assert first.spent == 8
+    assert client.expiry
+
+
+def test_ledger_outage_fails_closed(caplog):
+    guard = BudgetGuard(10, RedisBudgetLedger(DownRedis()))
+
+    async def run():
+        return await guard.areserve(1)
+
+    assert asyncio.run(run()) is None
+    assert "Budget ledger unavailable" in caplog.text
+    guard.reconcile(budget.BudgetReservation(guard.current_month(), 1), 0)
+    assert "left at its estimate" in caplog.text
+
+
+def test_async_reservations_on_shared_ledger():
+    guard = BudgetGuard(10, RedisBudgetLedger(FakeRedis()))
+
+    async def run():
+        reservation = await guard.areserve(6)
+        assert await guard.areserve(6) is None
+        await guard.areconcile(reservation, 2)
+
+    asyncio.run(run())
+    assert guard.spent == 2
+
+
+def test_parse_order_charges_shared_guard(monkeypatch):
+    monkeypatch.setattr(budget, "_guard", None)
+    guard = budget.get_budget_guard(Settings(token_budget_monthly=1000))
+    assert budget.get_budget_guard() is guard
+    parse_order("3 LINK with 4x leverage shared-guard-check")
+    assert guard.spent == 6
+    monkeypatch.setattr(budget, "_guard", None)
+    monkeypatch.setattr(budget, "redis", None)
+    with pytest.raises(RuntimeError):
+        budget.get_budget_guard(Settings(budget_ledger_backend="redis"))
+    monkeypatch.setattr(budget, "_guard", None)
+
+
+def test_model_failure_releases_reservation(monkeypatch):
+    def boom(text, symbols):
+        raise RuntimeError("model down")
+
+    monkeypatch.setattr(nl_parser, "_model_parse", boom)
+    guard = BudgetGuard(100)
+    with pytest.raises(RuntimeError):
+        parse_order("9 sol release-check", budget=guard)
+    assert guard.spent == 0
@@ -0,0 +1,30 @@
+"""Tests for the in-process LRU cache."""
+
+from hyperliquid_bot.bot.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert len(cache) == 2
+
+
+def test_ttl_expires_entries():
+    now = [0.0]
+    cache: LRUCache[str, int] = LRUCache(10, ttl=5, clock=lambda: now[0])
+    cache.update({"a": 1})
+    cache.update([("b", 2)])
+    now[0] = 4.9
+    assert cache.get("a") == 1
+    now[0] = 5.0
+    assert cache.get("a", -1) == -1
+    cache.pop("b")
+    assert len(cache) == 0
+    cache.clear()
+    assert cache.hits == 0
@@ -0,0 +1,53 @@
+"""Tests for cached settings and reloading."""
+
+import asyncio
+import dataclasses
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from hyperliquid_bot.bot import config
+from hyperliquid_bot.bot.config import Settings, get_settings, install_reload_signal, reload_settings
+from hyperliquid_bot.bot.hyperliquid import build_order_json
+
+
+def test_settings_cached_until_reload(monkeypatch):
+    monkeypatch.setenv("BUILDER_FEE_TENTH_BPS", "4")
+    settings = get_settings()
+    assert get_settings() is settings
+    monkeypatch.setenv("BUILDER_FEE_TENTH_BPS", "9")
+    assert build_order_json("ETH", "buy", 1)["f"] == 4
+    assert reload_settings().builder_fee_tenth_bps == 9
+    assert build_order_json("ETH", "buy", 1)["f"] == 9
+
+
+def test_settings_are_frozen():
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        get_settings().database_url = "sqlite://"  # type: ignore[misc]
+
+
+def test_zero_fee_deadline_precomputed(monkeypatch):
+    monkeypatch.setenv("ZERO_FEE_UNTIL", "2030-01-01T00:00:00")
+    settings = Settings()
+    assert settings.zero_fee_until_ts == datetime(2030, 1, 1, tzinfo=timezone.utc).timestamp()
+    monkeypatch.delenv("ZERO_FEE_UNTIL")
+    assert Settings().zero_fee_until_ts is None
+    monkeypatch.setattr(time, "time", lambda: settings.zero_fee_until_ts + 1)
+    assert build_order_json("ETH", "buy", 1, builder_fee=3, settings=settings)["f"] == 3
+
+
+def test_sighup_reloads_settings(monkeypatch):
+    async def run() -> bool:
+        return install_reload_signal(asyncio.get_running_loop())
+
+    assert asyncio.run(run()) is True
+    calls: list = []
+
+    class NoSignals:
+        def add_signal_handler(self, *args):
+            calls.append(args)
+            raise NotImplementedError
+
+    assert install_reload_signal(NoSignals()) is False
+    assert calls[0][1] is config.reload_settings
@@ -0,0 +1,115 @@
+"""Tests for the shared database engine registry."""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, inspect
+
+from hyperliquid_bot.bot import db
+from hyperliquid_bot.bot.config import Settings
+
+
+def test_engine_shared_per_url(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path}/a.db")
+    engine = db.get_engine()
+    assert db.get_engine() is engine
+    assert db.get_sessionmaker() is db.get_sessionmaker()
+    assert db.get_sessionmaker().kw["bind"] is engine
+
+    other = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path}/b.db")
+    assert db.get_engine(other) is not engine
+
+
+def test_engine_options_pool_sizing():
+    pg = Settings(database_url="postgresql+asyncpg://u:p@localhost/db", db_pool_size=3, db_max_overflow=4)
+    options = db._engine_options(pg)
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 4
+    assert options["pool_pre_ping"] is True
+
+    lite = db._engine_options(Settings(database_url="sqlite+aiosqlite://"))
+    assert "pool_size" not in lite
+
+
+def test_init_db_runs_once_and_dispose_resets(monkeypatch, tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path}/init.db"
+    monkeypatch.setenv("DATABASE_URL", url)
+
+    async def run() -> list[str]:
+        await db.init_db()
+        assert url in db._schema_ready
+        await db.init_db()
+        async with db.get_engine().connect() as conn:
+            tables = await conn.run_sync(lambda c: inspect(c).get_table_names())
+        await db.dispose_engines()
+        return tables
+
+    tables = asyncio.run(run())
+    assert "trades" in tables and "users" in tables
+    assert url not in db._engines
+    assert not db._schema_ready
+
+
+def test_api_lifespan_initialises_schema(monkeypatch, tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path}/api.db"
+    monkeypatch.setenv("DATABASE_URL", url)
+    from hyperliquid_bot.api.main import app
+
+    with TestClient(app) as client:
+        assert url in db._schema_ready
+        assert client.get("/health").status_code == 200
+    assert url not in db._engines
+
+
+def _count_queries(engine) -> list[str]:
+    statements: list[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    return statements
+
+
+def test_user_id_cache_hit_skips_database(tmp_path):
+    settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path}/users.db")
+
+    async def run() -> tuple[dict, list[str]]:
+        await db.init_db(settings)
+        async with db.get_sessionmaker(settings)() as session:
+            await db.resolve_user_ids(session, [1, 2])
+            await session.commit()
+        assert await db.warm_user_id_cache(settings) == 2
+        statements = _count_queries(db.get_engine(settings))
+        async with db.get_sessionmaker(settings)() as session:
+            ids = await db.resolve_user_ids(session, [1, 2], db.get_user_id_cache(settings))
+        await db.dispose_engines()
+        return ids, statements
+
+    ids, statements = asyncio.run(run())
+    assert set(ids) == {1, 2}
+    assert not [s for s in statements if "users" in s]
+
+
+def test_resolve_user_ids_tolerates_concurrent_insert(tmp_path):
+    settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path}/race.db")
+
+    async def run() -> tuple[int, int]:
+        await db.init_db(settings)
+        factory = db.get_sessionmaker(settings)
+        async with factory() as first, factory() as second:
+            ids_first = await db.resolve_user_ids(first, [42])
+            await first.commit()
+            # The second session already decided 42 was missing; the upsert must
+            # not trip the unique index.
+            stmt = db._insert_users_ignoring_conflicts("sqlite", [42])
+            await second.execute(stmt)
+            ids_second = await db.resolve_user_ids(second, [42])
+            await second.commit()
+            user = await db.get_or_create_user(second, 42)
+        await db.dispose_engines()
+        assert user.id == ids_first[42]
+        return ids_first[42], ids_second[42]
+
+    a, b = asyncio.run(run())
+    assert a == b
@@ -0,0 +1,191 @@
+"""Tests for the concurrent, per-chat ordered dispatcher."""
+
+import asyncio
+import random
+
+import pytest
+from aiogram import types
+
+from hyperliquid_bot.api.metrics import DISPATCH_CHATS, DISPATCH_QUEUE_DEPTH
+from hyperliquid_bot.bot.dispatch import ConcurrentDispatcher, UpdateEngine, chat_key
+
+
+def test_chat_key_uses_chat_then_sender():
+    user = types.User(7)
+    message = types.Message("/buy", user)
+    assert chat_key(message) == 7
+    assert chat_key(types.CallbackQuery("confirm", message, types.User(7))) == 7
+    message.chat = types.User(-100)
+    assert chat_key(types.CallbackQuery("confirm", message, types.User(8))) == -100
+
+
+def test_chats_run_in_parallel_but_each_in_order():
+    seen = {}
+    running = 0
+    peak = 0
+
+    async def process(update):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(random.random() / 1000)
+        seen.setdefault(update.from_user.id, []).append(update.text)
+        running -= 1
+        return update.text
+
+    async def run():
+        engine = UpdateEngine(process, workers=8, max_pending=1000)
+        futures = [
+            await engine.submit(types.Message(str(i), types.User(chat)))
+            for i in range(20)
+            for chat in range(10)
+        ]
+        results = await asyncio.gather(*futures)
+        await engine.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert results == [str(i) for i in range(20) for _ in range(10)]
+    assert all(texts == [str(i) for i in range(20)] for texts in seen.values())
+    assert 1 < peak <= 8
+
+
+def test_confirm_cannot_overtake_its_preview():
+    events = []
+
+    async def preview(message):
+        await asyncio.sleep(0.01)
+        events.append("preview")
+
+    async def confirm(callback):
+        events.append("confirm")
+
+    async def run():
+        dp = ConcurrentDispatcher(workers=4)
+        dp.message.register(preview, commands={"buy"})
+        dp.callback_query.register(confirm)
+        user = types.User(1)
+        message = types.Message("/buy BTC 1", user)
+        await asyncio.gather(
+            dp.feed_update(message), dp.feed_update(types.CallbackQuery("confirm:1", message, user))
+        )
+        await dp.drain()
+
+    asyncio.run(run())
+    assert events == ["preview", "confirm"]
+
+
+def test_backpressure_and_queue_depth_gauges():
+    async def run():
+        gate = asyncio.Event()
+
+        async def process(update):
+            await gate.wait()
+
+        engine = UpdateEngine(process, workers=1, max_pending=2)
+        await engine.submit(types.Message("a", types.User(1)))
+        await engine.submit(types.Message("b", types.User(2)))
+        assert DISPATCH_QUEUE_DEPTH.value() == 2
+        assert DISPATCH_CHATS.value() == 2
+        third = asyncio.ensure_future(engine.submit(types.Message("c", types.User(3))))
+        await asyncio.sleep(0.01)
+        assert not third.done()
+        gate.set()
+        await (await third)
+        await engine.stop()
+        assert DISPATCH_QUEUE_DEPTH.value() == 0
+
+    asyncio.run(run())
+
+
+def test_failures_are_reported_and_the_chat_continues(caplog):
+    async def process(update):
+        if update.text == "boom":
+            raise RuntimeError("handler failed")
+        return update.text
+
+    async def run():
+        engine = UpdateEngine(process, workers=2)
+        user = types.User(1)
+        failed = await engine.submit(types.Message("boom", user))
+        ok = await engine.feed(types.Message("ok", user))
+        with pytest.raises(RuntimeError):
+            await failed
+        await engine.stop()
+        return ok
+
+    assert asyncio.run(run()) == "ok"
+    assert "Update handling failed" in caplog.text
+
+
+def test_drain_finishes_queued_updates_then_refuses_new_ones():
+    done = []
+
+    async def process(update):
+        await asyncio.sleep(0.001)
+        done.append(update.text)
+
+    async def run():
+        engine = UpdateEngine(process, workers=2)
+        for i in range(10):
+            await engine.submit(types.Message(str(i), types.User(i % 3)))
+        await engine.stop(timeout=5)
+        with pytest.raises(RuntimeError):
+            await engine.submit(types.Message("late", types.User(1)))
+
+    asyncio.run(run())
+    assert sorted(done) == [str(i) for i in range(10)]
+
+
+def test_submitter_waiting_for_room_is_refused_once_draining():
+    async def run():
+        gate = asyncio.Event()
+
+        async def process(update):
+            await gate.wait()
+
+        engine = UpdateEngine(process, workers=1, max_pending=1)
+        await engine.submit(types.Message("a", types.User(1)))
+        late = asyncio.ensure_future(engine.submit(types.Message("b", types.User(2))))
+        await asyncio.sleep(0)
+        stopping = asyncio.ensure_future(engine.stop(timeout=5))
+        await asyncio.sleep(0)
+        gate.set()
+        await stopping
+        with pytest.raises(RuntimeError, match="shutting down"):
+            await late
+
+    asyncio.run(run())
+
+
+def test_drain_timeout_cancels_stuck_updates(caplog):
+    async def process(update):
+        await asyncio.sleep(60)
+
+    async def run():
+        engine = UpdateEngine(process, workers=1)
+        stuck = await engine.submit(types.Message("a", types.User(1)))
+        queued = await engine.submit(types.Message("b", types.User(1)))
+        await engine.stop(timeout=0.01)
+        return stuck, queued
+
+    stuck, queued = asyncio.run(run())
+    assert stuck.cancelled() and queued.cancelled()
+    assert "not handled" in caplog.text
+
+
+def test_timed_out_drain_refuses_blocked_submitters():
+    async def process(update):
+        await asyncio.sleep(60)
+
+    async def run():
+        engine = UpdateEngine(process, workers=1, max_pending=1)
+        await engine.submit(types.Message("a", types.User(1)))
+        late = [asyncio.ensure_future(engine.submit(types.Message("b", types.User(i)))) for i in (2, 3)]
+        await asyncio.sleep(0)
+        await engine.stop(timeout=0.1)
+        for submission in late:
+            with pytest.raises(RuntimeError, match="shutting down"):
+                await asyncio.wait_for(submission, 1)
+
+    asyncio.run(run())
@@ -1,6 +1,15 @@
 """Tests for geofence list loading."""
 
+import asyncio
+import os
+from urllib.error import HTTPError
+
+import httpx
+
+from hyperliquid_bot.bot import geofence
 from hyperliquid_bot.bot.config import load_deny_countries
+from hyperliquid_bot.bot.geofence import GeofenceService
+from hyperliquid_bot.bot.geoip import CountryResolver, HttpCountryBackend
 from fastapi.testclient import TestClient
 import hyperliquid_bot.api.main as api_main
 
@@ -29,20 +38,104 @@ def test_approve_callback_blocks(monkeypatch, tmp_path):
     deny_file.write_text('["IR", "KP"]')
     monkeypatch.setenv("DENY_COUNTRIES_URL", deny_file.as_uri())
 
-    def fake_urlopen(url: str):
-        class Resp:
-            def read(self) -> bytes:
-                return b'{"country":"IR"}'
-
-            def __enter__(self):
-                return self
-
-            def __exit__(self, *args):
-                return False
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/1.2.3.4/json"
+        return httpx.Response(200, json={"country": "IR"})
 
-        return Resp()
-
-    monkeypatch.setattr(api_main, "urlopen", fake_urlopen)
+    resolver = CountryResolver(HttpCountryBackend("https://ipapi.co/{ip}/json", transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(api_main, "get_country_resolver", lambda: resolver)
     client = TestClient(api_main.app)
     resp = client.post("/approve/callback", headers={"X-Forwarded-For": "1.2.3.4"})
     assert resp.status_code == 403
+
+
+def test_geofence_reloads_file_only_when_modified(tmp_path):
+    deny_file = tmp_path / "deny.csv"
+    deny_file.write_text("ir, kp")
+    service = GeofenceService(deny_file.as_uri(), refresh_interval=0)
+
+    async def run() -> None:
+        assert await service.refresh() is True
+        assert service.countries == frozenset({"IR", "KP"})
+        assert await service.refresh() is False
+        deny_file.write_text('["CU"]')
+        os.utime(deny_file, ns=(1, 1))
+        assert await service.refresh() is True
+        assert service.is_denied("cu") and not service.is_denied("IR")
+        assert not service.is_denied(None)
+
+    asyncio.run(run())
+
+
+def test_geofence_keeps_last_good_list_on_failure(tmp_path):
+    deny_file = tmp_path / "deny.json"
+    deny_file.write_text('["SY"]')
+    service = GeofenceService(str(deny_file), refresh_interval=0)
+
+    async def run() -> None:
+        await service.refresh()
+        deny_file.unlink()
+        assert await service.refresh() is False
+        assert service.countries == frozenset({"SY"})
+
+    asyncio.run(run())
+
+
+def test_geofence_http_conditional_requests(monkeypatch):
+    seen_headers: list[dict] = []
+
+    class Resp:
+        headers = {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+        def read(self) -> bytes:
+            return b'["RU"]'
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    def fake_urlopen(request, timeout):
+        seen_headers.append(dict(request.header_items()))
+        if len(seen_headers) == 1:
+            return Resp()
+        if len(seen_headers) == 2:
+            raise HTTPError(request.full_url, 304, "Not Modified", {}, None)
+        raise HTTPError(request.full_url, 500, "Server Error", {}, None)
+
+    monkeypatch.setattr(geofence, "urlopen", fake_urlopen)
+    service = GeofenceService("https://example.com/deny.json", refresh_interval=0)
+
+    async def run() -> None:
+        assert await service.refresh() is True
+        assert await service.refresh() is False
+        assert await service.refresh() is False
+
+    asyncio.run(run())
+    assert service.countries == frozenset({"RU"})
+    assert seen_headers[1]["If-none-match"] == '"v1"'
+    assert "If-modified-since" in seen_headers[1]
+
+
+def test_shared_geofence_refreshes_in_background(monkeypatch, tmp_path):
+    deny_file = tmp_path / "deny.json"
+    deny_file.write_text('["IR"]')
+    monkeypatch.setenv("DENY_COUNTRIES_URL", deny_file.as_uri())
+    monkeypatch.setenv("DENY_COUNTRIES_REFRESH_SECONDS", "0.01")
+
+    async def run() -> GeofenceService:
+        service = await geofence.get_geofence()
+        assert await geofence.get_geofence() is service
+        service.start()
+        deny_file.write_text('["KP"]')
+        os.utime(deny_file, ns=(2, 2))
+        for _ in range(100):
+            if service.is_denied("KP"):
+                break
+            await asyncio.sleep(0.01)
+        await geofence.stop_geofences()
+        return service
+
+    service = asyncio.run(run())
+    assert service.countries == frozenset({"KP"})
@@ -0,0 +1,67 @@
+"""Tests for IP-to-country resolution."""
+
+import asyncio
+
+import httpx
+
+from hyperliquid_bot.bot import geoip
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.bot.geoip import CountryResolver, HttpCountryBackend, LocalCountryBackend
+
+
+def test_local_backend_binary_search(tmp_path):
+    table = tmp_path / "ranges.csv"
+    table.write_text(
+        "# start,end,country\n"
+        "10.0.0.0,10.0.0.255,ir\n"
+        "1.0.0.0,1.0.0.255,AU\n"
+        "16777472,16778239,CN\n"
+        "2001:db8::,2001:db8::ffff,DE\n"
+    )
+    backend = LocalCountryBackend.from_csv(str(table))
+    assert backend.lookup_sync("10.0.0.7") == "IR"
+    assert backend.lookup_sync("1.0.0.0") == "AU"
+    assert backend.lookup_sync("1.0.1.5") == "CN"
+    assert backend.lookup_sync("1.0.4.0") == ""
+    assert backend.lookup_sync("0.0.0.1") == ""
+    assert backend.lookup_sync("2001:db8::1") == "DE"
+
+
+def test_resolver_caches_and_skips_failures():
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if "9.9.9.9" in request.url.path:
+            return httpx.Response(500)
+        return httpx.Response(200, json={"country": "us"})
+
+    backend = HttpCountryBackend("https://geo.test/{ip}/json", transport=httpx.MockTransport(handler))
+    resolver = CountryResolver(backend, maxsize=10, ttl=60)
+
+    async def run() -> list[str]:
+        results = [
+            await resolver.resolve("8.8.8.8, 10.0.0.1"),
+            await resolver.resolve("8.8.8.8"),
+            await resolver.resolve("9.9.9.9"),
+            await resolver.resolve("9.9.9.9"),
+            await resolver.resolve(None),
+        ]
+        await resolver.aclose()
+        return results
+
+    assert asyncio.run(run()) == ["US", "US", "", "", ""]
+    assert calls.count("/8.8.8.8/json") == 1
+    assert calls.count("/9.9.9.9/json") == 2
+
+
+def test_resolver_from_settings(monkeypatch, tmp_path):
+    table = tmp_path / "ranges.csv"
+    table.write_text("5.0.0.0,5.255.255.255,RU\n")
+    monkeypatch.setattr(geoip, "_resolver", None)
+    resolver = geoip.get_country_resolver(Settings(geoip_backend="local", geoip_db_path=str(table)))
+    assert geoip.get_country_resolver() is resolver
+    assert asyncio.run(resolver.resolve("5.1.2.3")) == "RU"
+    asyncio.run(geoip.close_country_resolver())
+    assert isinstance(geoip.get_country_resolver(Settings()).backend, HttpCountryBackend)
+    monkeypatch.setattr(geoip, "_resolver", None)
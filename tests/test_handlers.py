@@ -9,7 +9,7 @@ from hyperliquid_bot.bot.commands import (
 )
 from hyperliquid_bot.bot.middleware import ExecutionTimeMiddleware
 from aiogram import types
-from hyperliquid_bot.bot.db import get_engine, get_sessionmaker, Trade
+from hyperliquid_bot.bot.db import get_engine, get_sessionmaker, init_db, Trade
 from sqlalchemy import select
 
 
@@ -121,10 +121,11 @@ def test_trade_row_created_after_buy(monkeypatch, tmp_path):
     set_env(monkeypatch)
     db_url = f"sqlite+aiosqlite:///{tmp_path}/test.db"
     monkeypatch.setenv("DATABASE_URL", db_url)
+    asyncio.run(init_db())
     user = types.User(7)
     msg = DummyMessage("/buy ETH 1", from_user=user)
     asyncio.run(buy_sell_handler(msg, "buy"))
-    cb = types.CallbackQuery("confirm", msg, from_user=user)
+    cb = types.CallbackQuery(msg.markups[-1].inline_keyboard[0][0].callback_data, msg, from_user=user)
     asyncio.run(order_callback_handler(cb))
     get_engine()
     sessionmaker = get_sessionmaker()
@@ -135,3 +136,49 @@ def test_trade_row_created_after_buy(monkeypatch, tmp_path):
     symbol = asyncio.run(fetch_symbol())
     assert symbol == "ETH"
 
+
+
+def test_confirm_expired_preview_records_nothing(monkeypatch):
+    set_env(monkeypatch)
+    msg = DummyMessage("/buy ETH 1")
+    cb = types.CallbackQuery("confirm:unknown", msg)
+    asyncio.run(order_callback_handler(cb))
+    assert "expired" in msg.replies[-1]
+
+
+def test_cancel_callback_discards_preview(monkeypatch):
+    set_env(monkeypatch)
+    msg = DummyMessage("/buy ETH 1")
+    asyncio.run(buy_sell_handler(msg, "buy"))
+    keyboard = msg.markups[-1].inline_keyboard[0]
+    asyncio.run(order_callback_handler(types.CallbackQuery(keyboard[1].callback_data, msg)))
+    assert msg.replies[-1] == "Order cancelled."
+    asyncio.run(order_callback_handler(types.CallbackQuery(keyboard[0].callback_data, msg)))
+    assert "expired" in msg.replies[-1]
+
+
+def test_confirm_can_be_retried_after_submit_fails(monkeypatch):
+    set_env(monkeypatch)
+    from hyperliquid_bot.bot import commands
+
+    class FailingWriter:
+        async def submit(self, *args, **kwargs):
+            raise RuntimeError("writer stopped")
+
+    msg = DummyMessage("/buy ETH 1")
+    asyncio.run(buy_sell_handler(msg, "buy"))
+    confirm = msg.markups[-1].inline_keyboard[0][0].callback_data
+    monkeypatch.setattr(commands, "get_trade_writer", lambda: FailingWriter())
+    asyncio.run(order_callback_handler(types.CallbackQuery(confirm, msg)))
+    assert "again" in msg.replies[-1]
+
+    submitted = []
+
+    class Writer:
+        async def submit(self, telegram_id, **trade):
+            submitted.append(trade["symbol"])
+
+    monkeypatch.setattr(commands, "get_trade_writer", lambda: Writer())
+    asyncio.run(order_callback_handler(types.CallbackQuery(confirm, msg)))
+    assert msg.replies[-1] == "Order submitted!"
+    assert submitted == ["ETH"]
@@ -0,0 +1,278 @@
+"""Tests for histogram metrics and the Prometheus rendering."""
+
+import asyncio
+import multiprocessing
+import random
+import threading
+
+import pytest
+from aiogram import types
+
+from hyperliquid_bot.api import metrics
+from hyperliquid_bot.api.metrics import (
+    Counter,
+    FileMetricsStore,
+    Gauge,
+    Histogram,
+    MetricsPublisher,
+    QuantileSketch,
+    RedisMetricsStore,
+)
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.bot.middleware import ExecutionTimeMiddleware, handler_name
+
+
+def _registered(metric):
+    metrics.REGISTRY.remove(metric)
+    return metric
+
+
+def test_cumulative_buckets_sum_count_and_labels():
+    hist = _registered(Histogram("t_ms", "Test", ("handler",), buckets=[10, 100]))
+    for value, handler in [(5, "buy"), (10, "buy"), (50, "buy"), (5000, "buy"), (1, "sell")]:
+        hist.observe(value, handler)
+    lines = hist.render()
+    assert lines[:2] == ["# HELP t_ms Test", "# TYPE t_ms histogram"]
+    assert 't_ms_bucket{handler="buy",le="10"} 2' in lines
+    assert 't_ms_bucket{handler="buy",le="100"} 3' in lines
+    assert 't_ms_bucket{handler="buy",le="+Inf"} 4' in lines
+    assert 't_ms_sum{handler="buy"} 5065' in lines
+    assert 't_ms_count{handler="buy"} 4' in lines
+    assert 't_ms_bucket{handler="sell",le="+Inf"} 1' in lines
+    assert not any("_window" in line for line in lines)
+
+
+def test_sketch_relative_accuracy():
+    rng = random.Random(1)
+    values = sorted(rng.lognormvariate(3, 1) for _ in range(20_000))
+    sketch = QuantileSketch(alpha=0.01)
+    for v in values:
+        sketch.add(v)
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact
+    sketch.add(0)
+    assert sketch.quantile(0) == 0.0
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_window_forgets_old_observations():
+    now = [1000.0]
+    hist = _registered(Histogram("w_ms", "Test", buckets=[100], window=60, window_slices=6, clock=lambda: now[0]))
+    for _ in range(100):
+        hist.observe(500)
+    now[0] += 30
+    hist.observe(5)
+    assert 450 < hist.quantile(0.5) < 550
+    now[0] += 40  # the slow burst is now older than the window
+    assert 4.9 < hist.quantile(0.99) < 5.1
+    assert hist.count() == 101
+    assert 'w_ms_window{quantile="0.95"}' in "\n".join(hist.render())
+    now[0] += 120
+    assert hist.quantile(0.5) is None
+
+
+def test_threads_record_without_sharing_state():
+    counter = _registered(Counter("c_total", "Test", ("kind",)))
+    hist = _registered(Histogram("h", "Test", buckets=[1]))
+
+    def work() -> None:
+        for _ in range(1000):
+            counter.inc("a")
+            hist.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.value("a") == 8000
+    assert hist.count() == 8000
+    assert 'c_total{kind="a"} 8000' in counter.render()
+    counter.reset()
+    assert counter.value("a") == 0
+
+
+def test_series_cap_and_gauge():
+    counter = _registered(Counter("cap_total", "Test", ("user",), max_series=2))
+    for user in ("a", "b", "c", "d"):
+        counter.inc(user)
+    assert counter.samples() == {("a",): 1, ("b",): 1, ("other",): 2}
+    gauge = _registered(Gauge("g", "Test"))
+    assert gauge.render()[-1] == "g 0"
+    gauge.set(2.5)
+    assert gauge.value() == 2.5 and gauge.render()[-1] == "g 2.5"
+    gauge.reset()
+    assert gauge.value() == 0
+
+
+def test_middleware_labels_by_handler():
+    middleware = ExecutionTimeMiddleware()
+    before = metrics.LATENCY.count("buy")
+
+    async def handler(event, data):
+        return None
+
+    asyncio.run(middleware(handler, types.Message("/buy@my_bot ETH 1"), {}))
+    assert metrics.LATENCY.count("buy") == before + 1
+    assert metrics.LATENCY.quantile(0.5, "buy") is not None
+
+    class Resolved:
+        callback = handler
+
+    assert handler_name(handler, types.Message("/buy"), {"handler": Resolved()}) == "handler"
+    assert handler_name(handler, "event", {}) == "handler"
+    assert 'latency_ms_bucket{handler="buy",le="+Inf"}' in metrics.render_metrics()
+
+
+class FakeRedis:
+    """Synchronous stand-in for the Redis commands used by the metrics store."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+        self.sets: dict[str, set] = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member.encode())
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def srem(self, key, member):
+        self.sets[key].discard(member.encode())
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+
+def _publish_from_child(directory: str) -> None:
+    metrics.set_metrics_store(FileMetricsStore(directory))
+    metrics.ORDERS.reset()
+    metrics.LATENCY.reset()
+    for _ in range(3):
+        metrics.inc_orders()
+    metrics.observe_latency(40, "buy")
+    metrics.set_trade_queue_depth(2)
+    MetricsPublisher(metrics.get_metrics_store()).publish()
+
+
+def test_file_store_merges_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "_store", None)
+    monkeypatch.setattr(metrics, "_store_configured", False)
+    monkeypatch.setenv("METRICS_BACKEND", "file")
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path))
+    store = metrics.get_metrics_store()
+    assert isinstance(store, FileMetricsStore)
+    ctx = multiprocessing.get_context("fork")
+    for _ in range(2):
+        child = ctx.Process(target=_publish_from_child, args=(str(tmp_path),))
+        child.start()
+        child.join()
+        assert child.exitcode == 0
+    (tmp_path / "broken.json").write_text("{")
+    orders = metrics.ORDERS.value()
+    buys = metrics.LATENCY.count("buy")
+    text = metrics.render_metrics()
+    assert f"total_orders {orders + 6:g}" in text
+    assert f'latency_ms_count{{handler="buy"}} {buys + 2}' in text
+    assert 'latency_ms_window{handler="buy",quantile="0.5"}' in text
+    assert "trade_queue_depth" in text
+
+
+def test_stale_snapshots_drop_gauges_and_windows(tmp_path, monkeypatch):
+    store = FileMetricsStore(str(tmp_path), process_id="api")
+    monkeypatch.setattr(metrics, "_store", store)
+    sketch = QuantileSketch()
+    sketch.add(9000)
+    counts = [0] * (len(metrics.LATENCY.buckets) + 1)
+    snap = {"total_orders": [[[], 5]], "trade_queue_depth": [[[], 7]]}
+    FileMetricsStore(str(tmp_path), process_id="live").write(
+        {"ts": metrics.time.time(), "metrics": {**snap, "latency_ms": [[["live"], [counts, 10.0, 1, sketch.dump()]]]}}
+    )
+    FileMetricsStore(str(tmp_path), process_id="dead").write(
+        {"ts": metrics.time.time() - 7200, "metrics": {**snap, "latency_ms": [[["dead"], [counts, 10.0, 1, sketch.dump()]]]}}
+    )
+    text = metrics.render_metrics()
+    assert f"total_orders {metrics.ORDERS.value() + 10:g}" in text
+    assert f"trade_queue_depth {metrics.TRADE_QUEUE_DEPTH.value() + 7:g}" in text
+    assert 'latency_ms_count{handler="dead"} 1' in text
+    assert 'latency_ms_window{handler="live",quantile="0.5"}' in text
+    assert 'latency_ms_window{handler="dead"' not in text
+
+
+def test_unreadable_store_does_not_break_rendering(monkeypatch, caplog):
+    class BrokenStore:
+        process_id = "api"
+
+        def read(self):
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(metrics, "_store", BrokenStore())
+    assert "total_orders" in metrics.render_metrics()
+    assert "Could not read other processes' metrics" in caplog.text
+
+
+def test_publisher_writes_from_a_worker_thread():
+    writers = []
+
+    class RecordingStore:
+        process_id = "bot"
+
+        def write(self, snapshot):
+            writers.append(threading.current_thread())
+
+    publisher = MetricsPublisher(RecordingStore(), interval=60)
+
+    async def run():
+        publisher.start()
+        await asyncio.sleep(0.05)
+        await publisher.stop()
+
+    asyncio.run(run())
+    assert len(writers) == 2
+    assert threading.main_thread() not in writers
+
+
+def test_redis_store_and_publisher(monkeypatch):
+    client = FakeRedis()
+    api, bot = RedisMetricsStore(client, process_id="api"), RedisMetricsStore(client, process_id="bot")
+    bot.write({"metrics": {"total_orders": [[[], 4]], "unknown": [[[], 1]]}})
+    client.sadd(RedisMetricsStore.members, "metrics:gone")
+    assert api.read() == [{"metrics": {"total_orders": [[[], 4]], "unknown": [[[], 1]]}}]
+    assert client.smembers(RedisMetricsStore.members) == {b"metrics:bot"}
+    monkeypatch.setattr(metrics, "_store", api)
+    assert f"total_orders {metrics.ORDERS.value() + 4:g}" in metrics.render_metrics()
+
+    publisher = MetricsPublisher(api, interval=60)
+
+    async def run():
+        publisher.start()
+        await asyncio.sleep(0)
+        await publisher.stop()
+
+    asyncio.run(run())
+    assert "metrics:api" in client.data
+    publisher.store = None  # a failing write is logged, not raised
+    publisher.publish()
+
+
+def test_store_selection(monkeypatch):
+    monkeypatch.setattr(metrics, "_store", None)
+    monkeypatch.setattr(metrics, "_store_configured", False)
+    monkeypatch.setattr(metrics, "_publisher", None)
+    assert metrics.start_metrics_publisher(Settings(metrics_backend="memory")) is None
+    monkeypatch.setattr(metrics, "_store_configured", False)
+    monkeypatch.setattr(metrics, "redis", None)
+    with pytest.raises(RuntimeError):
+        metrics.get_metrics_store(Settings(metrics_backend="redis"))
+    metrics.set_metrics_store(RedisMetricsStore(FakeRedis(), process_id="p"))
+
+    async def run():
+        assert metrics.start_metrics_publisher() is metrics._publisher
+        await metrics.stop_metrics_publisher()
+
+    asyncio.run(run())
+    assert metrics._publisher is None
@@ -0,0 +1,150 @@
+"""Tests for batched and coalesced natural-language parsing."""
+
+import asyncio
+
+import pytest
+
+from hyperliquid_bot.bot import nl_parser
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.bot.nl_parser import BudgetGuard, HeuristicBackend, ParseBatcher, ParseCache, aparse_order
+from hyperliquid_bot.bot.symbols import get_symbol_index
+
+
+class RecordingBackend(HeuristicBackend):
+    """Local backend that records each batch and can stall or fail."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False) -> None:
+        super().__init__()
+        self.batches: list[list[str]] = []
+        self.delay = delay
+        self.fail = fail
+
+    async def parse_batch(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("model unavailable")
+        return await super().parse_batch(texts)
+
+
+def _run(batcher, phrases, guard):
+    async def main():
+        symbols = get_symbol_index()
+        return await asyncio.gather(
+            *(batcher.parse(p, guard, symbols) for p in phrases), return_exceptions=True
+        )
+
+    return [r if isinstance(r, BaseException) else r[0] for r in asyncio.run(main())]
+
+
+def test_identical_phrases_share_one_batch():
+    backend = RecordingBackend()
+    batcher = ParseBatcher(backend, max_batch=16, max_wait=0.01)
+    guard = BudgetGuard(monthly_budget=1000)
+    phrases = ["buy 1 btc", "Buy 1 BTC", "sell 2 eth", "long sol 3 with 5x"] * 2 + ["buy 1 btc"] * 2
+    results = _run(batcher, phrases, guard)
+    assert backend.batches == [["buy 1 btc", "sell 2 eth", "long sol 3 with 5x"]]
+    assert results[0] == results[1] == ("BTC", "buy", 1.0, None, None)
+    assert results[3] == ("SOL", "buy", 3.0, None, 5.0)
+    assert guard.spent == 3 + 3 + 5
+
+
+def test_full_batch_is_sent_without_waiting():
+    backend = RecordingBackend()
+    batcher = ParseBatcher(backend, max_batch=2, max_wait=0.05)
+    results = _run(batcher, ["buy 1 btc", "sell 2 eth", "buy 3 sol"], BudgetGuard(monthly_budget=1000))
+    assert [len(b) for b in backend.batches] == [2, 1]
+    assert results[2] == ("SOL", "buy", 3.0, None, None)
+
+
+def test_timeout_and_failure_fall_back_to_heuristic():
+    slow = ParseBatcher(RecordingBackend(delay=1), max_wait=0, timeout=0.01)
+    guard = BudgetGuard(monthly_budget=1000)
+    assert _run(slow, ["sell 2 eth"], guard) == [("ETH", "sell", 2.0, None, None)]
+    assert guard.spent == 3  # the estimate stays charged for a possibly billed request
+
+    broken = ParseBatcher(RecordingBackend(fail=True), max_wait=0)
+    guard = BudgetGuard(monthly_budget=1000)
+    assert _run(broken, ["sell 2 eth", "what now"], guard)[0] == ("ETH", "sell", 2.0, None, None)
+    assert guard.spent == 0
+
+
+class ShortBackend(HeuristicBackend):
+    def __init__(self, results) -> None:
+        super().__init__()
+        self.results = results
+
+    async def parse_batch(self, texts):
+        return self.results
+
+
+def test_malformed_batches_still_resolve_every_caller():
+    short = ParseBatcher(ShortBackend([]), max_wait=0)
+    phrases = ["buy 1 btc", "sell 2 eth"]
+    assert _run(short, phrases, BudgetGuard(monthly_budget=1000)) == [
+        ("BTC", "buy", 1.0, None, None),
+        ("ETH", "sell", 2.0, None, None),
+    ]
+    assert short._inflight == {} and not short._tasks
+
+    garbled = ParseBatcher(ShortBackend([None, None]), max_wait=0)
+    results = _run(garbled, phrases, BudgetGuard(monthly_budget=1000))
+    assert all(isinstance(r, Exception) for r in results)
+    assert garbled._inflight == {}
+    # The same phrase is parsed afresh rather than joining the failed batch.
+    garbled.backend = HeuristicBackend()
+    assert _run(garbled, phrases[:1], BudgetGuard(monthly_budget=1000)) == [("BTC", "buy", 1.0, None, None)]
+
+
+def test_per_phrase_errors_and_budget_fallback():
+    batcher = ParseBatcher(RecordingBackend(), max_wait=0)
+    guard = BudgetGuard(monthly_budget=1000)
+    ok, err = _run(batcher, ["buy 1 btc", "hello there"], guard)
+    assert ok == ("BTC", "buy", 1.0, None, None)
+    assert isinstance(err, ValueError)
+    assert guard.spent == 3
+
+    backend = RecordingBackend()
+    broke = ParseBatcher(backend, max_wait=0)
+    assert _run(broke, ["buy 1 btc"], BudgetGuard(monthly_budget=0)) == [("BTC", "buy", 1.0, None, None)]
+    assert backend.batches == []
+
+
+def test_aparse_order_uses_cache(monkeypatch):
+    monkeypatch.setattr(nl_parser, "_parse_cache", ParseCache())
+    monkeypatch.setattr(nl_parser, "_batcher", None)
+    settings = Settings(nl_batch_max_wait_ms=0)
+    guard = BudgetGuard(monthly_budget=1000)
+
+    async def main():
+        first = await aparse_order("ETH 0.5 with 10x", budget=guard, settings=settings)
+        again = await aparse_order("eth 0.5 with 10x", budget=guard, settings=settings)
+        assert (await aparse_order("long eth 1", budget=guard, settings=settings))["sz"] == "1.0"
+        return first, again
+
+    first, again = asyncio.run(main())
+    assert first == again
+    assert first["coin"] == "ETH" and first["leverage"] == 10
+    assert guard.spent == 4
+    assert nl_parser.get_parse_batcher() is nl_parser._batcher
+    with pytest.raises(ValueError):
+        asyncio.run(aparse_order("nothing to see", budget=guard, settings=settings))
+
+
+def test_fallback_after_timeout_is_not_cached(monkeypatch):
+    monkeypatch.setattr(nl_parser, "_parse_cache", ParseCache())
+    slow = RecordingBackend(delay=1)
+    monkeypatch.setattr(nl_parser, "_batcher", ParseBatcher(slow, max_wait=0, timeout=0.01))
+    guard = BudgetGuard(monthly_budget=1000)
+
+    async def main():
+        degraded = await aparse_order("sol 3", budget=guard)
+        healthy = RecordingBackend()
+        nl_parser._batcher = ParseBatcher(healthy, max_wait=0)
+        await aparse_order("sol 3", budget=guard)
+        await aparse_order("sol 3", budget=guard)
+        return degraded, healthy
+
+    degraded, healthy = asyncio.run(main())
+    assert degraded["coin"] == "SOL"
+    assert healthy.batches == [["sol 3"]]
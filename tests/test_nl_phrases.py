@@ -2,13 +2,21 @@
 
 import math
 
+import pytest
+
+from hyperliquid_bot.api import metrics
+from hyperliquid_bot.bot import nl_parser
 from hyperliquid_bot.bot.nl_parser import (
     BudgetGuard,
+    HeuristicParse,
+    _heuristic_parse,
+    _score_heuristic,
     confirm_order,
     order_preview,
     parse_order,
 )
 from hyperliquid_bot.bot.hyperliquid import build_order_json
+from hyperliquid_bot.bot.symbols import SymbolIndex
 
 cases = [
     ("Long BTC 0.1 at market", ("BTC", "buy", 0.1, None, None)),
@@ -66,3 +74,44 @@ def test_confirm_flow():
     assert "Confirm?" in preview
     confirmed = confirm_order(payload)
     assert confirmed["coin"] == "BTC"
+
+
+def test_heuristic_parse_token_rules():
+    # A number right after "@"/"at" is the price even when another number follows.
+    assert _heuristic_parse("buy @ 100 5 eth") == ("ETH", "buy", 100.0, 100.0, None)
+    assert _heuristic_parse("sell eth 2 3 at market") == ("ETH", "sell", 2.0, 3.0, None)
+    assert _heuristic_parse("long btc 1 2x 5x") == ("BTC", "buy", 1.0, None, 5)
+    assert _heuristic_parse("buy short eth 1")[1] == "sell"
+    with pytest.raises(ValueError):
+        _heuristic_parse("buy 10x with leverage")
+
+
+def test_heuristic_confidence_and_escalation(monkeypatch):
+    assert _score_heuristic("Buy 0.5 BTC @30000 3x") == (("BTC", "buy", 0.5, 30000.0, 3), 1.0, ())
+    assert _score_heuristic("eth 1").reasons == ("no_side",)
+    assert _score_heuristic("buy short eth 1").reasons == ("conflicting_sides",)
+    assert _score_heuristic("buy 1 btc eth").reasons == ("multiple_symbols",)
+    assert _score_heuristic("sell eth 2 3").reasons == ("ambiguous_price",)
+    assert _score_heuristic("buy 1 btc @ 1 2").reasons == ("extra_numbers",)
+    assert _score_heuristic("long btc 1 2x 5x").reasons == ("repeated_leverage",)
+    assert _score_heuristic("buy 1 zzz", SymbolIndex([])).reasons == ("unlisted_symbol",)
+    noisy = _score_heuristic("please buy 1 btc now thanks")
+    assert noisy.reasons == ("unknown_words",) and noisy.confidence == 0.75
+    assert noisy.escalation(0.8) == ("unknown_words",) and noisy.escalation(0.7) == ()
+    missing = _score_heuristic("buy 10x")
+    assert missing.parsed is None and missing.confidence == 0
+    assert missing.escalation(0.0) == ("missing_symbol", "missing_size")
+    assert HeuristicParse(None, 0.0, ()).escalation(0.5) == ("low_confidence",)
+
+    calls = []
+    monkeypatch.setattr(nl_parser, "_model_parse", lambda text, symbols: calls.append(text) or (("ETH", "buy", 1.0, None, None), 2.0))
+    monkeypatch.setattr(nl_parser, "_parse_cache", nl_parser.ParseCache())
+    guard = BudgetGuard(100)
+    escalations = metrics.NL_ESCALATIONS.value()
+    parse_order("buy 1 eth", budget=guard)
+    parse_order("eth 1", budget=guard)
+    assert calls == ["eth 1"] and guard.spent == 2
+    assert metrics.NL_ESCALATIONS.value() == escalations + 1
+    assert 'nl_escalation_reason_total{reason="no_side"}' in metrics.render_metrics()
+    # Without budget the heuristic parse of an escalated phrase is still used.
+    assert parse_order("sol 2", budget=BudgetGuard(0))["coin"] == "SOL"
@@ -0,0 +1,117 @@
+"""Tests for the natural-language parse cache."""
+
+import asyncio
+
+import pytest
+
+from hyperliquid_bot.api import metrics
+from hyperliquid_bot.bot import nl_parser
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.bot.nl_parser import BudgetGuard, ParseCache, normalise_phrase, parse_order
+
+
+class FakeRedis:
+    """Synchronous stand-in for the Redis commands used by the cache."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key: str):
+        return self.data.get(key)
+
+    def set(self, key: str, value: str, ex=None) -> None:
+        self.data[key] = value.encode()
+
+
+def test_repeated_phrase_skips_budget(monkeypatch):
+    monkeypatch.setattr(nl_parser, "_parse_cache", ParseCache())
+    guard = BudgetGuard(monthly_budget=100)
+    hits = metrics.PARSE_CACHE_HITS.value()
+    first = parse_order("ETH 0.5 with 10x", budget=guard)
+    spent = guard.spent
+    again = parse_order("  eth 0.5   WITH 10x ", budget=guard)
+    assert again == first
+    assert guard.spent == spent > 0
+    assert metrics.PARSE_CACHE_HITS.value() == hits + 1
+    assert "parse_cache_hits_total" in metrics.render_metrics()
+
+
+def test_budget_fallback_is_not_cached(monkeypatch):
+    monkeypatch.setattr(nl_parser, "_parse_cache", ParseCache())
+    calls = []
+    model_parse = nl_parser._model_parse
+
+    def counting(text, symbols):
+        calls.append(text)
+        return model_parse(text, symbols)
+
+    monkeypatch.setattr(nl_parser, "_model_parse", counting)
+    parse_order("eth 1", budget=BudgetGuard(monthly_budget=0))
+    assert calls == []
+    parse_order("eth 1", budget=BudgetGuard(monthly_budget=100))
+    assert calls == ["eth 1"]
+
+
+def test_version_change_invalidates():
+    cache = ParseCache()
+    parsed = ("BTC", "buy", 1.0, None, None)
+    cache.put("buy 1 btc", "u1", parsed)
+    assert cache.get("BUY 1 BTC", "u1") == parsed
+    assert cache.get("buy 1 btc", "u2") is None
+    assert len(cache.local) == 0
+    assert normalise_phrase(" Buy\t1  BTC ") == "buy 1 btc"
+
+
+def test_shared_redis_tier():
+    client = FakeRedis()
+    writer, reader = ParseCache(client=client, ttl=60), ParseCache(client=client)
+    writer.put("sell 2 eth", "u1", ("ETH", "sell", 2.0, None, None))
+    assert reader.get("sell 2 eth", "u1") == ("ETH", "sell", 2.0, None, None)
+    assert len(reader.local) == 1
+
+
+class DownRedis:
+    def get(self, key: str):
+        raise nl_parser.RedisError("connection refused")
+
+    def set(self, key: str, value: str, ex=None) -> None:
+        raise nl_parser.RedisError("connection refused")
+
+
+def test_redis_outage_falls_back_to_local_tier(caplog):
+    cache = ParseCache(client=DownRedis())
+    parsed = ("ETH", "buy", 1.0, None, None)
+
+    async def run():
+        assert await cache.aget("buy 1 eth", "u1") is None
+        await cache.aput("buy 1 eth", "u1", parsed)
+        return await cache.aget("buy 1 eth", "u1")
+
+    assert asyncio.run(run()) == parsed
+    cache.put("sell 1 eth", "u1", parsed)
+    assert cache.get("sell 1 eth", "u1") == parsed
+    assert "Parse cache lookup in Redis failed" in caplog.text
+
+
+def test_async_lookup_reads_shared_tier():
+    client = FakeRedis()
+    ParseCache(client=client).put("sell 2 eth", "u1", ("ETH", "sell", 2.0, None, None))
+    assert asyncio.run(ParseCache(client=client).aget("sell 2 eth", "u1")) == ("ETH", "sell", 2.0, None, None)
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setattr(nl_parser, "_parse_cache", None)
+    monkeypatch.setattr(nl_parser, "redis", None)
+    with pytest.raises(RuntimeError):
+        nl_parser.get_parse_cache(Settings(parse_cache_backend="redis"))
+
+    class FakeModule:
+        class Redis:
+            @staticmethod
+            def from_url(url: str) -> FakeRedis:
+                return FakeRedis()
+
+    monkeypatch.setattr(nl_parser, "redis", FakeModule)
+    cache = nl_parser.get_parse_cache(Settings(parse_cache_backend="redis"))
+    assert isinstance(cache.client, FakeRedis)
+    assert nl_parser.get_parse_cache() is cache
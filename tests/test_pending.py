@@ -0,0 +1,73 @@
+"""Tests for the pending order preview store."""
+
+import asyncio
+
+import pytest
+
+from hyperliquid_bot.bot import pending
+from hyperliquid_bot.bot.config import Settings
+
+
+class FakeRedis:
+    """Minimal async stand-in for the Redis commands used by the store."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, tuple[str, int]] = {}
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.data[key] = (value, ex)
+
+    async def getdel(self, key: str):
+        item = self.data.pop(key, None)
+        return None if item is None else item[0].encode()
+
+
+def test_memory_store_pops_once_and_expires():
+    store = pending.MemoryPendingOrderStore(ttl=10)
+    now = [0.0]
+    store._orders._clock = lambda: now[0]
+
+    async def run() -> None:
+        order_id = await store.put({"coin": "ETH"})
+        assert len(order_id) <= 16
+        assert await store.pop(order_id) == {"coin": "ETH"}
+        assert await store.pop(order_id) is None
+        stale = await store.put({"coin": "BTC"})
+        now[0] = 11
+        assert await store.pop(stale) is None
+
+    asyncio.run(run())
+
+
+def test_redis_store_round_trip():
+    client = FakeRedis()
+    store = pending.RedisPendingOrderStore(client, ttl=30)
+
+    async def run() -> None:
+        order_id = await store.put({"coin": "SOL", "isBuy": True})
+        assert client.data[store.prefix + order_id][1] == 30
+        assert await store.pop(order_id) == {"coin": "SOL", "isBuy": True}
+        assert await store.pop(order_id) is None
+        await store.restore(order_id, {"coin": "SOL"})
+        assert await store.pop(order_id) == {"coin": "SOL"}
+
+    asyncio.run(run())
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setattr(pending, "_store", None)
+    assert isinstance(pending.get_pending_orders(Settings()), pending.MemoryPendingOrderStore)
+
+    monkeypatch.setattr(pending, "_store", None)
+    monkeypatch.setattr(pending, "aioredis", None)
+    with pytest.raises(RuntimeError):
+        pending.get_pending_orders(Settings(pending_order_backend="redis"))
+
+    class FakeModule:
+        @staticmethod
+        def from_url(url: str) -> FakeRedis:
+            return FakeRedis()
+
+    monkeypatch.setattr(pending, "aioredis", FakeModule)
+    store = pending.get_pending_orders(Settings(pending_order_backend="redis", redis_url="redis://x"))
+    assert isinstance(store, pending.RedisPendingOrderStore)
@@ -0,0 +1,51 @@
+"""Tests for command routing and the compiled middleware chains of the dispatcher stub."""
+
+import asyncio
+
+import pytest
+from aiogram import types
+from aiogram.test_utils import TestDispatcher
+
+
+class Recording:
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    async def __call__(self, handler, event, data):
+        self.calls.append(self.name)
+        return await handler(event, data)
+
+
+def test_commands_route_with_bot_suffix():
+    seen = []
+
+    async def buy(message):
+        seen.append(message.text)
+
+    dp = TestDispatcher()
+    dp.message.register(buy, commands=["buy"])
+    for text in ("/buy BTC 1", "/buy@trading_bot BTC 1", "/buy"):
+        asyncio.run(dp.feed_update(types.Message(text)))
+    assert seen == ["/buy BTC 1", "/buy@trading_bot BTC 1", "/buy"]
+    with pytest.raises(ValueError, match="sell"):
+        asyncio.run(dp.feed_update(types.Message("/sell BTC 1")))
+
+
+def test_chain_is_compiled_once_and_rebuilt_on_registration():
+    calls = []
+
+    async def handler(message):
+        calls.append("handler")
+
+    dp = TestDispatcher()
+    dp.message.register(handler, commands=["price"])
+    dp.message.middleware(Recording("outer", calls))
+    asyncio.run(dp.feed_update(types.Message("/price BTC")))
+    chain = dp.message.resolve("/price")
+    assert dp.message.resolve("/price ETH") is chain
+
+    dp.message.middleware(Recording("inner", calls))
+    asyncio.run(dp.feed_update(types.Message("/price BTC")))
+    assert dp.message.resolve("/price") is not chain
+    assert calls == ["outer", "handler", "outer", "inner", "handler"]
@@ -19,3 +19,20 @@ def test_sentiment_endpoint(monkeypatch):
     data = resp.json()
     assert data["pair"] == "BTC-PERP"
     assert "score" in data and "summary" in data
+
+
+def test_bulk_sentiment_endpoint(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path}/bulk.db")
+    from hyperliquid_bot.sentiment import api
+    from hyperliquid_bot.sentiment.job import run_sentiment_job
+    from hyperliquid_bot.api.main import app
+
+    asyncio.run(run_sentiment_job(["BTC-PERP", "ETH-PERP", "SOL-PERP"]))
+    client = TestClient(app)
+    resp = client.get("/sentiment", params={"pairs": "SOL-PERP, BTC-PERP,DOGE-PERP,SOL-PERP"})
+    assert resp.status_code == 200
+    assert [row["pair"] for row in resp.json()] == ["SOL-PERP", "BTC-PERP"]
+    assert client.get("/sentiment/DOGE-PERP").status_code == 404
+    assert client.get("/sentiment", params={"pairs": " , "}).status_code == 400
+    monkeypatch.setattr(api, "MAX_PAIRS", 2)
+    assert client.get("/sentiment", params={"pairs": "A,B,C"}).status_code == 400
@@ -0,0 +1,145 @@
+"""Tests for the concurrent sentiment job."""
+
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+
+from hyperliquid_bot.bot import db
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.sentiment.job import run_sentiment_job
+from hyperliquid_bot.sentiment.models import PairSentiment, PairSentimentLatest
+
+
+class FakeSource:
+    def __init__(self, name, texts="{pair} pump", delay=0.0, failures=0, down_for=()):
+        self.name = name
+        self.down_for = set(down_for)
+        self.texts = texts
+        self.delay = delay
+        self.failures = failures
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+
+    async def fetch(self, pair):
+        self.calls.append(pair)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if pair in self.down_for:
+                raise ConnectionError("pair unavailable")
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("source unavailable")
+            return [self.texts.format(pair=pair)]
+        finally:
+            self.running -= 1
+
+
+def _settings(tmp_path, **overrides):
+    values = dict(
+        database_url=f"sqlite+aiosqlite:///{tmp_path}/sentiment.db",
+        sentiment_concurrency=4,
+        sentiment_source_timeout=1.0,
+        sentiment_retries=2,
+        sentiment_retry_backoff=0.001,
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+def _stored(settings):
+    async def run():
+        async with db.get_sessionmaker(settings)() as session:
+            rows = (await session.scalars(select(PairSentiment))).all()
+        return {row.pair: (row.score, row.summary) for row in rows}
+
+    return asyncio.run(run())
+
+
+def test_pairs_fetched_concurrently_within_the_limit(tmp_path):
+    settings = _settings(tmp_path)
+    source = FakeSource("fake", delay=0.02)
+    pairs = [f"P{i}" for i in range(40)]
+
+    start = time.perf_counter()
+    asyncio.run(run_sentiment_job(pairs, sources=[source], settings=settings))
+    elapsed = time.perf_counter() - start
+
+    assert source.peak == 4
+    assert elapsed < 40 * 0.02
+    stored = _stored(settings)
+    assert set(stored) == set(pairs)
+    assert stored["P0"] == (1.0, "Bullish")
+
+
+def test_slow_source_times_out_without_holding_up_the_run(tmp_path):
+    settings = _settings(tmp_path, sentiment_source_timeout=0.05, sentiment_retries=0)
+    slow = FakeSource("slow", texts="{pair} dump", delay=60)
+    fast = FakeSource("fast")
+
+    start = time.perf_counter()
+    asyncio.run(run_sentiment_job(["BTC", "ETH"], sources=[slow, fast], settings=settings))
+
+    assert time.perf_counter() - start < 5
+    assert _stored(settings) == {"BTC": (1.0, "Bullish"), "ETH": (1.0, "Bullish")}
+
+
+def test_failed_fetches_are_retried(tmp_path):
+    settings = _settings(tmp_path)
+    flaky = FakeSource("flaky", texts="{pair} dump", failures=2)
+
+    asyncio.run(run_sentiment_job(["SOL"], sources=[flaky], settings=settings))
+
+    assert flaky.calls == ["SOL"] * 3
+    assert _stored(settings) == {"SOL": (-1.0, "Bearish")}
+
+
+def test_pair_skipped_when_every_source_fails(tmp_path, caplog):
+    settings = _settings(tmp_path, sentiment_retries=1)
+    source = FakeSource("mixed", down_for={"ETH"})
+    asyncio.run(run_sentiment_job(["BTC", "ETH"], sources=[source], settings=settings))
+
+    assert _stored(settings) == {"BTC": (1.0, "Bullish")}
+    assert "Source mixed failed for ETH after 2 attempts" in caplog.text
+    assert "skipping" in caplog.text
+
+
+def test_reruns_upsert_one_row_per_pair_and_hour(tmp_path):
+    settings = _settings(tmp_path, sentiment_write_chunk_size=2)
+    pairs = [f"P{i}" for i in range(5)]
+    hour = datetime(2024, 5, 1, 12, 0)
+
+    async def run():
+        await run_sentiment_job(pairs, sources=[FakeSource("a")], at=hour.replace(minute=5), settings=settings)
+        await run_sentiment_job(pairs, sources=[FakeSource("b", texts="{pair} dump")], at=hour.replace(minute=50), settings=settings)
+        await run_sentiment_job(["P0"], sources=[FakeSource("c")], at=hour.replace(hour=13), settings=settings)
+        async with db.get_sessionmaker(settings)() as session:
+            rows = (await session.execute(select(PairSentiment.pair, PairSentiment.bucket, PairSentiment.ts, PairSentiment.score))).all()
+        return rows
+
+    rows = asyncio.run(run())
+    assert len(rows) == 6
+    noon = {r.pair: r for r in rows if r.bucket == hour}
+    assert set(noon) == set(pairs)
+    assert all(r.score == -1.0 and r.ts == hour.replace(minute=50) for r in noon.values())
+    assert [(r.pair, r.score) for r in rows if r.bucket == hour.replace(hour=13)] == [("P0", 1.0)]
+
+
+def test_latest_table_keeps_newest_row_per_pair(tmp_path):
+    settings = _settings(tmp_path)
+    hour = datetime(2024, 5, 1, 12, 0)
+
+    async def run():
+        await run_sentiment_job(["BTC", "ETH"], sources=[FakeSource("a")], at=hour, settings=settings)
+        # A backfill of an earlier hour must not replace the latest scores.
+        await run_sentiment_job(["BTC"], sources=[FakeSource("b", texts="{pair} dump")], at=hour.replace(hour=9), settings=settings)
+        await run_sentiment_job(["ETH"], sources=[FakeSource("c", texts="{pair} dump")], at=hour.replace(hour=13), settings=settings)
+        async with db.get_sessionmaker(settings)() as session:
+            rows = (await session.scalars(select(PairSentimentLatest).order_by(PairSentimentLatest.pair))).all()
+        return [(r.pair, r.bucket, r.score) for r in rows]
+
+    assert asyncio.run(run()) == [("BTC", hour, 1.0), ("ETH", hour.replace(hour=13), -1.0)]
@@ -0,0 +1,47 @@
+"""Tests for the token-indexed sentiment scorer."""
+
+from hyperliquid_bot.sentiment.scoring import DEFAULT_LEXICON, Lexicon, tokenize
+
+
+def test_only_whole_words_match():
+    assert DEFAULT_LEXICON.score("Software update: pumpkin season") == 0
+    assert DEFAULT_LEXICON.score("BTC up, ETH pump!") == 2
+    assert DEFAULT_LEXICON.score("MOON moon") == 2
+
+
+def test_negation_flips_the_following_words():
+    assert DEFAULT_LEXICON.score("not bullish") == -1
+    assert DEFAULT_LEXICON.score("I don't see a dump") == 1
+    assert DEFAULT_LEXICON.score("I don't think it will dump") == -1
+    assert DEFAULT_LEXICON.score("never going bearish, moon") == 2
+    # Overlapping windows flip each word once.
+    assert DEFAULT_LEXICON.score("not no bull") == -1
+
+
+def test_negation_does_not_cross_texts_or_clauses():
+    texts = ["this is not", "bullish"]
+    assert DEFAULT_LEXICON.aggregate(texts) == 0.5
+    assert tokenize(texts) == ["this", "is", "not", "\x02", "bullish"]
+    assert DEFAULT_LEXICON.score("not bad. bullish") == 1
+
+
+def test_window_cut_at_a_clause_does_not_hide_a_later_negator():
+    assert DEFAULT_LEXICON.score("no, not bullish") == DEFAULT_LEXICON.score("not bullish") == -1
+    assert DEFAULT_LEXICON.score("not. never bull") == -1
+
+
+def test_batch_matches_single_scores_and_handles_unicode():
+    texts = ["BTC to the moon 🚀", "dump incoming, not pumping", "", "Ça va up"]
+    assert DEFAULT_LEXICON.score_batch(texts) == [DEFAULT_LEXICON.score(t) for t in texts] == [1, -1, 0, 1]
+    assert DEFAULT_LEXICON.aggregate(texts) == 0.25
+    assert DEFAULT_LEXICON.aggregate([]) == 0
+    assert DEFAULT_LEXICON.score_batch([]) == []
+    assert DEFAULT_LEXICON.score_batch(["not", "bullish", "up\x02down"]) == [0, 1, 0]
+
+
+def test_custom_weights_and_clamping():
+    lexicon = Lexicon({"Rekt": -2.5, "wagmi": 3}, negators=["Ain't"], negation_window=1)
+    assert lexicon.score("ain't rekt") == 2.5
+    assert lexicon.score("wagmi wagmi rekt") == 3.5
+    assert lexicon.aggregate(["wagmi wagmi"]) == 1.0
+    assert lexicon.aggregate(["rekt"]) == -1.0
@@ -0,0 +1,53 @@
+"""Tests for the known-symbol index used by the NL parser."""
+
+import json
+
+import pytest
+
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.bot.nl_parser import _heuristic_parse
+from hyperliquid_bot.bot.symbols import SymbolIndex, get_symbol_index
+
+
+def test_resolve_names_aliases_and_perp_suffix():
+    index = SymbolIndex(["BTC", "ETH", "DOG-PERP"], {"bitcoin": "btc", "eth-perp": "ETH"})
+    assert index.resolve("btc") == "BTC"
+    assert index.resolve("Bitcoin") == "BTC"
+    assert index.resolve("eth-perp") == "ETH"
+    assert index.resolve("btc-perp") == "BTC"
+    assert index.resolve("dog-perp") == "DOG-PERP"
+    assert index.resolve("please") is None
+    assert "eth" in index and len(index) == 3
+
+
+def test_suggest_uses_prefix_trie():
+    index = SymbolIndex(["BTC", "BNB", "ETH"], {"bitcoin": "BTC"})
+    # Keys are walked alphabetically: "bitcoin", "bnb", "btc".
+    assert index.suggest("b") == ["BTC", "BNB"]
+    assert index.suggest("bit") == ["BTC"]
+    assert index.suggest("x") == []
+    assert index.suggest("bn", limit=1) == ["BNB"]
+
+
+def test_version_changes_with_universe():
+    assert SymbolIndex(["BTC"]).version == SymbolIndex(["btc"]).version
+    assert SymbolIndex(["BTC"]).version != SymbolIndex(["BTC", "ETH"]).version
+
+
+def test_load_snapshot_and_list(tmp_path):
+    listing = tmp_path / "list.json"
+    listing.write_text(json.dumps(["kPEPE", "WIF"]))
+    settings = Settings(instruments_path=str(listing))
+    index = get_symbol_index(settings)
+    assert get_symbol_index(settings) is index
+    assert index.resolve("wif") == "WIF"
+    default = get_symbol_index(Settings(instruments_path=""))
+    assert default.resolve("ethereum") == "ETH"
+
+
+def test_parser_skips_unknown_words():
+    assert _heuristic_parse("please buy 2 eth")[0] == "ETH"
+    assert _heuristic_parse("buy 1 bitcoin at 30000") == ("BTC", "buy", 1.0, 30000.0, None)
+    with pytest.raises(ValueError):
+        _heuristic_parse("please buy 2 unknowncoin")
+    assert _heuristic_parse("please buy 2 eth", SymbolIndex([]))[0] == "PLEASE"
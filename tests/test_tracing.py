@@ -0,0 +1,110 @@
+"""Tests for stage spans and sampled trace export."""
+
+import asyncio
+import json
+
+from aiogram import Bot, types
+from aiogram.test_utils import TestDispatcher
+
+from hyperliquid_bot.api import metrics
+from hyperliquid_bot.bot import tracing
+from hyperliquid_bot.bot.commands import setup_bot
+from hyperliquid_bot.bot.config import reload_settings
+from hyperliquid_bot.bot.db import init_db
+from hyperliquid_bot.bot.middleware import ExecutionTimeMiddleware
+from hyperliquid_bot.bot.trade_writer import stop_trade_writers
+from hyperliquid_bot.bot.tracing import close_trace_exporter, span, trace
+
+
+def test_sampled_trace_exported_as_json_line(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("TRACE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("TRACE_EXPORT_PATH", str(path))
+    before = metrics.STAGE_LATENCY.count("build_payload")
+
+    async def run() -> None:
+        dp = TestDispatcher()
+        await setup_bot(Bot("t"), dp)
+        dp.message.middleware(ExecutionTimeMiddleware())
+        await asyncio.gather(dp.feed_update(types.Message("/buy ETH 1")), dp.feed_update(types.Message("/sell")))
+
+    asyncio.run(run())
+    close_trace_exporter()
+    first, second = (json.loads(line) for line in path.read_text().splitlines())
+    assert first["name"] == "buy" and second["name"] == "sell"
+    assert [s["name"] for s in first["spans"]] == ["parse", "build_payload", "pending_put", "answer"]
+    assert [s["name"] for s in second["spans"]] == ["parse", "answer"]
+    assert all(s["offset_ms"] >= 0 and s["duration_ms"] >= 0 for s in first["spans"])
+    assert first["trace_id"] != second["trace_id"]
+    assert metrics.STAGE_LATENCY.count("build_payload") == before + 1
+    assert 'stage_latency_ms_bucket{stage="parse",le="+Inf"}' in metrics.render_metrics()
+
+
+def test_confirm_callback_exports_a_trace(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("TRACE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("TRACE_EXPORT_PATH", str(path))
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path}/trace.db")
+
+    class Chat(types.Message):
+        async def answer(self, text, reply_markup=None):
+            self.markup = reply_markup
+
+    async def run() -> None:
+        await init_db()
+        dp = TestDispatcher()
+        await setup_bot(Bot("t"), dp)
+        timing = ExecutionTimeMiddleware()
+        dp.message.middleware(timing)
+        dp.callback_query.middleware(timing)
+        message = Chat("/buy ETH 1")
+        await dp.feed_update(message)
+        await dp.feed_update(types.CallbackQuery(message.markup.inline_keyboard[0][0].callback_data, message))
+        await stop_trade_writers()
+
+    asyncio.run(run())
+    close_trace_exporter()
+    preview, confirm = (json.loads(line) for line in path.read_text().splitlines())
+    assert confirm["name"] == "order_callback_handler"
+    names = [s["name"] for s in confirm["spans"]]
+    assert [n for n in names if n in ("pending_pop", "trade_submit", "answer")] == ["pending_pop", "trade_submit", "answer"]
+
+
+def test_nested_spans_record_parents(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRACE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("TRACE_EXPORT_PATH", str(tmp_path / "t.jsonl"))
+    with trace("job") as root:
+        with span("outer"):
+            with span("inner"):
+                pass
+        with trace("ignored") as nested:
+            pass
+    close_trace_exporter()
+    assert nested is tracing._NOOP
+    spans = root.to_dict()["spans"]
+    assert [(s["name"], s["parent"]) for s in spans] == [("inner", 1), ("outer", None)]
+
+
+def test_disabled_and_unsampled_are_noops(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRACING_ENABLED", "false")
+    before = metrics.STAGE_LATENCY.count("off")
+    assert span("off") is tracing._NOOP and trace("off") is tracing._NOOP
+    with span("off"):
+        pass
+    assert metrics.STAGE_LATENCY.count("off") == before
+    monkeypatch.setenv("TRACING_ENABLED", "true")
+    monkeypatch.setenv("TRACE_SAMPLE_RATE", "0")
+    monkeypatch.setenv("TRACE_EXPORT_PATH", str(tmp_path / "t.jsonl"))
+    reload_settings()
+    assert trace("job") is tracing._NOOP
+    with span("on"):
+        pass
+    assert metrics.STAGE_LATENCY.count("on") >= 1
+    close_trace_exporter()
+
+
+def test_export_failure_is_logged(tmp_path, caplog):
+    exporter = tracing.JsonlTraceExporter(str(tmp_path / "missing" / "t.jsonl"))
+    with caplog.at_level("WARNING"):
+        exporter.export(tracing.Trace("job", exporter))
+    assert "Could not export trace" in caplog.text
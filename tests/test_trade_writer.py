@@ -0,0 +1,62 @@
+"""Tests for the batched trade writer."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from hyperliquid_bot.api import metrics
+from hyperliquid_bot.bot import db
+from hyperliquid_bot.bot.config import Settings
+from hyperliquid_bot.bot.trade_writer import TradeWriter, get_trade_writer, stop_trade_writers
+
+
+def test_concurrent_trades_grouped_into_batches(tmp_path):
+    settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path}/trades.db")
+    writer = TradeWriter(settings, max_batch=10, max_wait=0.05)
+    batches_before = metrics.TRADE_BATCH_SIZE.count()
+
+    async def run() -> tuple[int, int]:
+        await db.init_db(settings)
+        await asyncio.gather(
+            *(writer.submit(i % 5, "ETH", "buy", 1.0) for i in range(25))
+        )
+        await writer.stop()
+        async with db.get_sessionmaker(settings)() as session:
+            trades = await session.scalar(select(func.count()).select_from(db.Trade))
+            users = await session.scalar(select(func.count()).select_from(db.User))
+        return trades, users
+
+    trades, users = asyncio.run(run())
+    assert trades == 25
+    assert users == 5
+    assert metrics.TRADE_BATCH_SIZE.count() - batches_before == 3
+    text = metrics.render_metrics()
+    assert "trade_queue_depth 0" in text
+    assert 'trade_batch_size_bucket{le="10"}' in text
+
+
+def test_failed_batch_propagates_to_callers(tmp_path):
+    settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path}/missing.db")
+    writer = TradeWriter(settings, max_batch=5, max_wait=0)
+
+    async def run() -> None:
+        # Schema was never created, so the insert fails.
+        await writer.submit(1, "BTC", "sell", 2.0)
+
+    with pytest.raises(Exception):
+        asyncio.run(run())
+
+
+def test_shared_writer_per_database(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path}/shared.db")
+    writer = get_trade_writer()
+    assert get_trade_writer() is writer
+
+    async def run() -> None:
+        await db.init_db()
+        await writer.submit(3, "SOL", "buy", 4.0)
+        await stop_trade_writers()
+
+    asyncio.run(run())
+    assert get_trade_writer() is not writer
@@ -1,6 +1,22 @@
 """Tests for voice message stub."""
 
-from hyperliquid_bot.bot.voice import voice_to_order
+import asyncio
+import hashlib
+import threading
+
+import pytest
+
+from hyperliquid_bot.bot import voice
+from hyperliquid_bot.bot.voice import (
+    VoiceBusyError,
+    VoicePipeline,
+    avoice_to_order,
+    get_voice_pipeline,
+    read_voice,
+    stop_voice_pipeline,
+    transcribe_bytes,
+    voice_to_order,
+)
 from hyperliquid_bot.bot.nl_parser import parse_order, BudgetGuard
 
 
@@ -12,3 +28,112 @@ def test_voice_stub(tmp_path):
     text_order = parse_order(phrase, budget=guard)
     voice_order = voice_to_order(str(ogg), budget=guard)
     assert voice_order == text_order
+
+
+def _note(tmp_path, name: str, phrase: str) -> str:
+    path = tmp_path / f"{name}.ogg"
+    path.write_text(phrase)
+    return str(path)
+
+
+def test_duplicate_notes_transcribed_once(tmp_path):
+    calls = []
+
+    def counting(data: bytes) -> str:
+        calls.append(data)
+        return transcribe_bytes(data)
+
+    pipeline = VoicePipeline(counting, chunk_size=4)
+    first = _note(tmp_path, "a", "Long BTC 0.1 at market")
+    forwarded = _note(tmp_path, "b", "Long BTC 0.1 at market")
+
+    async def main():
+        texts = await asyncio.gather(pipeline.transcribe(1, first), pipeline.transcribe(2, forwarded))
+        texts.append(await pipeline.transcribe(3, forwarded))
+        await pipeline.stop()
+        return texts
+
+    assert asyncio.run(main()) == ["Long BTC 0.1 at market"] * 3
+    assert len(calls) == 1
+    assert read_voice(first, 4)[0] == hashlib.sha256(b"Long BTC 0.1 at market").hexdigest()
+
+
+def test_users_served_round_robin(tmp_path):
+    gate = threading.Event()
+    order = []
+
+    def gated(data: bytes) -> str:
+        gate.wait(5)
+        order.append(data.decode())
+        return data.decode()
+
+    pipeline = VoicePipeline(gated, workers=1, per_user_limit=5)
+
+    async def main():
+        jobs = [asyncio.create_task(pipeline.transcribe("alice", _note(tmp_path, "a1", "a1")))]
+        while not pipeline._inflight or pipeline.queued:
+            await asyncio.sleep(0.001)  # a1 is with the worker
+        for queued, name in enumerate(("a2", "a3"), 1):
+            jobs.append(asyncio.create_task(pipeline.transcribe("alice", _note(tmp_path, name, name))))
+            while pipeline.queued < queued:
+                await asyncio.sleep(0.001)
+        jobs.append(asyncio.create_task(pipeline.transcribe("bob", _note(tmp_path, "b1", "b1"))))
+        while pipeline.queued < 3:
+            await asyncio.sleep(0.001)
+        gate.set()
+        await asyncio.gather(*jobs)
+        await pipeline.stop()
+
+    asyncio.run(main())
+    assert order == ["a1", "a2", "b1", "a3"]
+
+
+def test_per_user_limit_and_size_limit(tmp_path):
+    gate = threading.Event()
+    pipeline = VoicePipeline(lambda data: gate.wait(5) and data.decode(), per_user_limit=1, max_bytes=8)
+
+    async def main():
+        job = asyncio.create_task(pipeline.transcribe(1, _note(tmp_path, "a", "buy 1")))
+        while not pipeline._inflight:
+            await asyncio.sleep(0.001)
+        with pytest.raises(VoiceBusyError):
+            await pipeline.transcribe(1, _note(tmp_path, "b", "sell 1"))
+        with pytest.raises(ValueError):
+            await pipeline.transcribe(2, _note(tmp_path, "c", "buy 1 btc now"))
+        gate.set()
+        assert await job == "buy 1"
+        await pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_transcriber_failure_and_stop(tmp_path):
+    def broken(data: bytes) -> str:
+        raise RuntimeError("decoder crashed")
+
+    pipeline = VoicePipeline(broken)
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await pipeline.transcribe(1, _note(tmp_path, "a", "buy 1"))
+        assert pipeline._per_user == {}
+        await pipeline.stop()
+
+    asyncio.run(main())
+
+
+def test_voice_to_order_through_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("VOICE_EXECUTOR", "process")
+    monkeypatch.setenv("VOICE_WORKERS", "1")
+    monkeypatch.setattr(voice, "_pipeline", None)
+    phrase = "Short ETH 2 at 3500"
+    guard = BudgetGuard(1000)
+
+    async def main():
+        order = await avoice_to_order(_note(tmp_path, "a", phrase), user_id=7, budget=guard)
+        assert get_voice_pipeline() is voice._pipeline
+        await stop_voice_pipeline()
+        return order
+
+    assert asyncio.run(main()) == parse_order(phrase, budget=guard)
+    assert voice._pipeline is None